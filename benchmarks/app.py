@@ -0,0 +1,192 @@
+"""
+    benchmarks.app
+    ~~~~~~~~~~~~~~
+
+    The application driven by the benchmarks.
+
+    It's a small but realistic goldman app: the native Login
+    model for authentication plus the American & Truck models
+    from the README with a to_one & to_many relationship
+    between them. Every request is authenticated with an
+    OAuth bearer token just like a real deployment.
+
+    The Dealership model has a geo pair of fields for the geo
+    benchmarks. The postgres schema needs the cube &
+    earthdistance extensions which may require a superuser.
+"""
+
+import goldman
+
+from goldman.models import DefaultSchemaModel, LoginModel
+from goldman.types import LatitudeType, LongitudeType, ResourceType, \
+    ToManyType, ToOneType
+from schematics.types import IntType, StringType
+
+
+PASSWORD = 'benchmarks'
+USERNAME = 'benchmarks'
+
+SCHEMA = """
+    DROP TABLE IF EXISTS dealerships, trucks, americans, logins;
+
+    CREATE EXTENSION IF NOT EXISTS cube;
+    CREATE EXTENSION IF NOT EXISTS earthdistance;
+
+    CREATE TABLE logins (
+        rid serial PRIMARY KEY, rtype text, creator int,
+        created timestamp, updated timestamp,
+        username text UNIQUE, locked boolean, login_date timestamp,
+        password text, salt text, token text UNIQUE
+    );
+
+    CREATE TABLE americans (
+        rid serial PRIMARY KEY, rtype text, creator int,
+        created timestamp, updated timestamp,
+        first_name text, last_name text, weight int
+    );
+
+    CREATE TABLE trucks (
+        rid serial PRIMARY KEY, rtype text, creator int,
+        created timestamp, updated timestamp,
+        make text, model text, year int,
+        owner int REFERENCES americans (rid)
+    );
+
+    CREATE TABLE dealerships (
+        rid serial PRIMARY KEY, rtype text, creator int,
+        created timestamp, updated timestamp,
+        name text, lat double precision, lon double precision
+    );
+
+    CREATE INDEX ON trucks (owner);
+    CREATE INDEX ON trucks (year);
+    CREATE INDEX ON dealerships USING GIST (ll_to_earth(lat, lon));
+    CREATE INDEX ON dealerships (lat, lon);
+"""
+
+
+class American(DefaultSchemaModel):
+    """ American model """
+
+    RTYPE = 'americans'
+
+    rtype = ResourceType(RTYPE)
+
+    first_name = StringType(max_length=150, required=True)
+    last_name = StringType(max_length=150, required=True)
+    weight = IntType(min_value=100)
+
+    trucks = ToManyType(field='owner', rtype='trucks')
+
+
+class Truck(DefaultSchemaModel):
+    """ Truck model """
+
+    RTYPE = 'trucks'
+
+    rtype = ResourceType(RTYPE)
+
+    make = StringType(max_length=50, required=True)
+    model = StringType(max_length=50)
+    year = IntType(min_value=1900, required=True)
+
+    owner = ToOneType(field='rid', rtype='americans')
+
+
+class Dealership(DefaultSchemaModel):
+    """ Dealership model """
+
+    RTYPE = 'dealerships'
+
+    rtype = ResourceType(RTYPE)
+
+    name = StringType(max_length=150, required=True)
+    lat = LatitudeType(geo='loc')
+    lon = LongitudeType(geo='loc')
+
+
+MODELS = [American, Dealership, LoginModel, Truck]
+
+
+class API(goldman.API):
+    """ The benchmarked API """
+
+    MIDDLEWARE = [
+        goldman.BearerTokenMiddleware(LoginModel.auth_token),
+    ]
+
+    RESOURCES = [
+        goldman.ModelResource(American),
+        goldman.ModelsResource(American),
+        goldman.ModelResource(Dealership),
+        goldman.ModelsResource(Dealership),
+        goldman.ModelResource(Truck),
+        goldman.ModelsResource(Truck),
+    ]
+
+    ROUTES = [
+        ('/token', goldman.OAuthROPCResource(LoginModel.auth_creds)),
+    ]
+
+
+def configure(store, sink=None):
+    """ Point goldman at the models, the store class, & the sink
+
+    It must be done before the API is built since that freezes
+    the config.
+    """
+
+    goldman.config.MODELS = MODELS
+    goldman.config.SERVER_TIMING = True
+    goldman.config.STORE = store
+    goldman.config.TIMING_SINK = sink
+
+
+def create_schema():
+    """ (Re)create the postgres tables of the benchmark models """
+
+    from goldman.stores.postgres.store import CONNECT
+
+    with CONNECT.primary.connection() as conn, conn.cursor() as curs:
+        curs.execute(SCHEMA)
+
+
+def seed(americans=50, trucks=4):
+    """ Populate the store with a login, americans, & trucks
+
+    Each American owns `trucks` trucks.
+    """
+
+    goldman.sess.login = None
+    goldman.sess.store = store = goldman.config.STORE()
+
+    login = LoginModel()
+    login.merge({
+        'locked': False,
+        'password': PASSWORD,
+        'rtype': LoginModel.RTYPE,
+        'username': USERNAME,
+    })
+    store.create(login)
+    goldman.sess.login = login
+
+    for idx in range(americans):
+        american = American()
+        american.merge({
+            'first_name': 'Joe %s' % idx,
+            'last_name': 'Patriot',
+            'rtype': American.RTYPE,
+            'weight': 250 + idx,
+        })
+        store.create(american)
+
+        for num in range(trucks):
+            truck = Truck()
+            truck.merge({
+                'make': ('Chevy', 'Dodge', 'Ford', 'GMC')[num % 4],
+                'model': 'Heavy Duty',
+                'owner': american.rid,
+                'rtype': Truck.RTYPE,
+                'year': 1990 + (idx + num) % 30,
+            })
+            store.create(truck)
@@ -0,0 +1,194 @@
+"""
+    benchmarks.client
+    ~~~~~~~~~~~~~~~~~
+
+    In-process WSGI client & the measurements taken with it.
+
+    Requests are built with falcon.testing.create_environ &
+    handed straight to the API so no sockets or servers are
+    involved. Only the framework, the app, & the store are
+    measured.
+
+    Three things are measured per scenario:
+
+        throughput - requests per second & the latency
+                     percentiles of a timed run
+
+        allocations - GC tracked objects that outlived their
+                      request without being freed by reference
+                      counting (cyclic garbage & leaks) during
+                      a run with the collector disabled
+
+        phases - the mean Server-Timing phases of the timed
+                 run collected by PHASES, which must be the
+                 goldman.config.TIMING_SINK of the API
+"""
+
+import gc
+import json
+import timeit
+
+from falcon.testing import create_environ
+
+
+class Response(object):
+    """ The status, headers, & body of a WSGI response """
+
+    def __init__(self, status, headers, body):
+
+        self.body = body
+        self.headers = dict((k.lower(), v) for k, v in headers)
+        self.status = status
+
+    @property
+    def code(self):
+        """ Return the int status code """
+
+        return int(self.status.split(' ', 1)[0])
+
+    @property
+    def json(self):
+        """ Return the JSON decoded body """
+
+        return json.loads(self.body)
+
+
+class Client(object):
+    """ Call the WSGI app in-process
+
+    :param app:
+        WSGI callable like a goldman.API instance
+    :param token:
+        optional OAuth bearer token sent on every request
+    """
+
+    def __init__(self, app, token=None):
+
+        self.app = app
+        self.token = token
+
+    def request(self, method, path, query='', body='', headers=None):
+        """ Perform the request & return a Response """
+
+        headers = dict(headers or {})
+        result = {}
+
+        if self.token:
+            headers.setdefault('Authorization', 'Bearer %s' % self.token)
+
+        env = create_environ(
+            body=body,
+            headers=headers,
+            method=method,
+            path=path,
+            query_string=query,
+            scheme='https',
+        )
+
+        def start_response(status, headers, exc_info=None):
+            """ Capture the status & headers """
+
+            result['status'] = status
+            result['headers'] = headers
+
+        body = ''.join(self.app(env, start_response))
+
+        return Response(result['status'], result['headers'], body)
+
+
+class Phases(object):
+    """ Accumulate the per-request Server-Timing records
+
+    The records are dropped while it's disabled.
+    """
+
+    def __init__(self):
+
+        self.enabled = True
+        self.records = []
+
+    def __call__(self, record):
+
+        if self.enabled:
+            self.records.append(record)
+
+    def clear(self):
+        """ Throw away the records collected so far """
+
+        self.records = []
+
+    def means(self):
+        """ Return a dict of phase names to mean ms per request """
+
+        totals = {}
+
+        for record in self.records:
+            for name, phase in record['phases'].items():
+                totals[name] = totals.get(name, 0) + phase['dur']
+
+        count = len(self.records) or 1
+
+        return {name: total / count for name, total in totals.items()}
+
+
+PHASES = Phases()
+
+
+def percentile(samples, pct):
+    """ Return the nearest rank percentile of sorted samples """
+
+    if not samples:
+        return None
+
+    idx = int(round(pct / 100.0 * (len(samples) - 1)))
+    return samples[idx]
+
+
+def measure(func, iterations, warmup):
+    """ Measure a scenario callable
+
+    The callable performs a single request & is invoked
+    `warmup` times before anything is measured.
+
+    :return: dict
+    """
+
+    phases = PHASES
+    phases.enabled = True
+
+    for _ in range(warmup):
+        func()
+
+    phases.clear()
+    samples = []
+    timer = timeit.default_timer
+
+    for _ in range(iterations):
+        start = timer()
+        func()
+        samples.append(timer() - start)
+
+    phase_means = phases.means()
+    phases.enabled = False
+
+    gc.collect()
+    gc.disable()
+    try:
+        before = gc.get_count()[0]
+        for _ in range(iterations):
+            func()
+        allocs = gc.get_count()[0] - before
+    finally:
+        gc.enable()
+        gc.collect()
+
+    total = sum(samples)
+    samples.sort()
+
+    return {
+        'allocs': float(allocs) / iterations,
+        'p50': percentile(samples, 50) * 1000,
+        'p95': percentile(samples, 95) * 1000,
+        'phases': phase_means,
+        'rps': iterations / total if total else 0,
+    }
@@ -0,0 +1,242 @@
+"""
+    benchmarks.geo
+    ~~~~~~~~~~~~~~
+
+    Geo filter benchmarks.
+
+    Dealerships are scattered randomly across the continental
+    US & each scenario searches them through the full request
+    lifecycle like the lifecycle benchmarks:
+
+        near           - within 25km of a point
+        near_sorted    - within 25km of a point closest first
+        within_box     - within a 1 by 2 degree bounding box
+        within_polygon - within a triangle
+
+    Postgres is the interesting store since the point is to
+    prove the filters are served by the GiST & B-tree indexes
+    even with millions of rows. It needs a throw away database
+    since the tables are dropped & recreated:
+
+        python benchmarks/geo.py --store postgres --points 5000000 \\
+            --pg-url postgresql://localhost/goldman_bench
+
+    Use `--explain` to print the query plans. The memory store
+    is a reference implementation that scans every row so it
+    should be run with far fewer points.
+
+    Results are compared against the same baseline file as the
+    lifecycle benchmarks & support the same options.
+"""
+
+from __future__ import print_function
+
+import argparse
+import goldman
+import json
+import random
+import sys
+
+import app
+
+from client import PHASES, Client, measure
+from lifecycle import BASELINE, JSONAPI, compare, get_store, report
+
+
+# bounding box of the continental US as min lat, min lon,
+# max lat, & max lon
+BOUNDS = (25.0, -124.0, 49.0, -67.0)
+
+LOAD = """
+    SELECT setseed(%(seed)s);
+
+    INSERT INTO dealerships (rtype, created, name, lat, lon)
+    SELECT 'dealerships', now(), 'Dealership ' || i,
+           %(min_lat)s + random() * (%(max_lat)s - %(min_lat)s),
+           %(min_lon)s + random() * (%(max_lon)s - %(min_lon)s)
+    FROM generate_series(1, %(count)s) i;
+
+    ANALYZE dealerships;
+"""
+
+QUERIES = {
+    'near': 'filter[loc__near]=39.1,-94.6,25000&page[limit]=10',
+    'near_sorted': 'filter[loc__near]=39.1,-94.6,25000&sort=_distance'
+                   '&page[limit]=10',
+    'within_box': 'filter[loc__within]=38.5,-95.5,39.5,-93.5'
+                  '&page[limit]=10',
+    'within_polygon': 'filter[loc__within]=38.5,-95.5,39.5,-94.5,'
+                      '38.5,-93.5&page[limit]=10',
+}
+
+
+def load(store, count, seed=0.42):
+    """ Scatter `count` dealerships randomly within BOUNDS
+
+    Postgres generates the rows server side. The memory store
+    is filled directly since creating millions of models one
+    at a time would take longer than the benchmark.
+    """
+
+    bounds = dict(zip(('min_lat', 'min_lon', 'max_lat', 'max_lon'),
+                      BOUNDS))
+
+    if store == 'postgres':
+        from goldman.stores.postgres.store import CONNECT
+
+        with CONNECT.primary.connection() as conn, conn.cursor() as curs:
+            curs.execute(LOAD, dict(bounds, count=count, seed=seed))
+        return
+
+    from goldman.stores.memory.store import DATABASE, Store
+
+    model = app.Dealership
+    rand = random.Random(seed)
+    table = DATABASE.table(model)
+
+    with DATABASE.lock:
+        for rid in range(1, count + 1):
+            row = {field: None for field in Store.field_cols(model)}
+            row.update({
+                'lat': rand.uniform(bounds['min_lat'], bounds['max_lat']),
+                'lon': rand.uniform(bounds['min_lon'], bounds['max_lon']),
+                'name': 'Dealership %s' % rid,
+                'rid': rid,
+                'rtype': model.RTYPE,
+            })
+            table.rows[rid] = row
+
+        table.seq = count
+
+
+def explain():
+    """ Print the postgres query plan of every scenario
+
+    The query params are processed just like the model_qps
+    middleware does & compiled by the store.
+    """
+
+    import goldman.queryparams.filter as filters
+    import goldman.queryparams.sort as sorts
+
+    from falcon.testing import create_environ
+    from goldman.request import Request
+    from goldman.stores.postgres.store import Store
+
+    model = app.Dealership
+    store = Store()
+
+    for name, query in sorted(QUERIES.items()):
+        req = Request(create_environ(query_string=query))
+        filtrs = filters.init(req, model)
+
+        where, param = store.filters_query(filtrs, model.RTYPE)
+        order = store.sorts_query(
+            sorts.init(req, model),
+            pseudo=store.pseudo_sorts_query(filtrs, model.RTYPE),
+        )
+
+        sql = 'EXPLAIN SELECT * FROM {}{}{} LIMIT 10'.format(
+            model.RTYPE, where, order)
+
+        print('%s:' % name)
+        for row in store.query(sql, param=param):
+            print('    %s' % row['QUERY PLAN'])
+
+
+def run(store, args):
+    """ Run the selected scenarios against a store
+
+    :return: dict of scenario names to results
+    """
+
+    app.configure(get_store(store, args.pg_url), sink=PHASES)
+    app.seed(americans=0)
+    load(store, args.points)
+
+    client = Client(app.API())
+    resp = client.request('POST', '/token', body='grant_type=password&'
+                          'username=%s&password=%s' % (app.USERNAME,
+                                                       app.PASSWORD),
+                          headers={'Content-Type': goldman.FORMURL_MIMETYPE})
+    client.token = resp.json['access_token']
+
+    if args.explain and store == 'postgres':
+        explain()
+
+    results = {}
+
+    for name, query in sorted(QUERIES.items()):
+        if args.scenario and name not in args.scenario:
+            continue
+
+        def _search(query=query):
+            """ Search the dealerships & ensure it succeeded """
+
+            resp = client.request('GET', '/dealerships', query=query,
+                                  headers=JSONAPI)
+
+            if resp.code != 200:
+                raise AssertionError('expected 200 got %s: %s' % (
+                    resp.status, resp.body[:500]))
+
+        results[name] = measure(_search, args.iterations, args.warmup)
+
+    return results
+
+
+def main():
+    """ Parse the arguments, run, compare, & report """
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[4])
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--explain', action='store_true',
+                        help='print the postgres query plans')
+    parser.add_argument('--iterations', '-n', default=200, type=int)
+    parser.add_argument('--no-phases', action='store_true')
+    parser.add_argument('--pg-url')
+    parser.add_argument('--points', default=None, type=int,
+                        help='defaults to 2,000,000 for postgres & '
+                             '20,000 for memory')
+    parser.add_argument('--save', action='store_true',
+                        help='save the results as the new baseline')
+    parser.add_argument('--scenario', action='append',
+                        help='only run the named scenario(s)')
+    parser.add_argument('--store', choices=('memory', 'postgres'),
+                        default='postgres')
+    parser.add_argument('--tolerance', default=0.10, type=float)
+    parser.add_argument('--warmup', default=20, type=int)
+    args = parser.parse_args()
+
+    if args.points is None:
+        args.points = 2000000 if args.store == 'postgres' else 20000
+
+    try:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    except (IOError, ValueError):
+        baseline = {}
+
+    regressions = 0
+    saved = dict(baseline)
+
+    for name, result in sorted(run(args.store, args).items()):
+        key = 'geo:%s:%s' % (args.store, name)
+        flags = compare(key, result, baseline, args.tolerance)
+        regressions += bool(flags)
+
+        report(key, result, flags, phases=not args.no_phases)
+        saved[key] = {k: v for k, v in result.items() if k != 'phases'}
+
+    if args.save:
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(saved, baseline_file, indent=4, sort_keys=True)
+        print('baseline saved to %s' % args.baseline)
+
+    if regressions:
+        print('%s scenario(s) regressed' % regressions)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
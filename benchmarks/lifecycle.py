@@ -0,0 +1,287 @@
+"""
+    benchmarks.lifecycle
+    ~~~~~~~~~~~~~~~~~~~~
+
+    End-to-end request lifecycle benchmarks.
+
+    Every scenario drives the benchmark app (see app.py) through
+    the full middleware, resource, store, & serializer stack:
+
+        get_single   - GET a truck
+        get_list     - GET trucks with filters, sort, page,
+                       include, & sparse fields
+        post_create  - POST a new truck
+        post_bulk    - POST 50 new trucks at once
+        patch_update - PATCH a truck
+        error_400    - GET trucks with an invalid filter
+        error_401    - GET a truck with a bogus bearer token
+        error_404    - GET a truck that doesn't exist
+        token        - POST to the OAuth 2.0 token endpoint
+
+    against the in-memory store, postgres, or both. Postgres
+    needs a throw away database since the tables are dropped &
+    recreated:
+
+        python benchmarks/lifecycle.py --store all \\
+            --pg-url postgresql://localhost/goldman_bench
+
+    Results can be saved as the baseline with `--save` & later
+    runs are compared against it. A scenario is flagged as a
+    regression if its throughput dropped or its allocations
+    grew by more than `--tolerance` & the exit status is 1.
+"""
+
+from __future__ import print_function
+
+import argparse
+import goldman
+import json
+import os
+import sys
+
+import app
+
+from client import PHASES, Client, measure
+
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'baseline.json')
+
+JSONAPI = {
+    'Accept': goldman.JSONAPI_MIMETYPE,
+    'Content-Type': goldman.JSONAPI_MIMETYPE,
+}
+
+
+def _truck_payload(rid=None, year=2001, count=None):
+    """ Return a JSON API encoded truck document
+
+    A `count` returns a bulk document of that many trucks.
+    """
+
+    data = {
+        'attributes': {'make': 'Ford', 'model': 'F-350', 'year': year},
+        'relationships': {
+            'owner': {'data': {'id': '1', 'type': 'americans'}},
+        },
+        'type': 'trucks',
+    }
+
+    if rid:
+        data['id'] = str(rid)
+    if count:
+        data = [data] * count
+
+    return json.dumps({'data': data})
+
+
+def scenarios(client):
+    """ Return a dict of scenario names to request callables
+
+    Each callable asserts the expected status so a broken
+    scenario is never mistaken for a fast one.
+    """
+
+    bulk = _truck_payload(count=50)
+    years = [2000]
+
+    def _check(resp, code):
+        """ Ensure the expected status code was returned """
+
+        if resp.code != code:
+            raise AssertionError('expected %s got %s: %s' % (
+                code, resp.status, resp.body[:500]))
+
+    def get_single():
+        _check(client.request('GET', '/trucks/1', headers=JSONAPI), 200)
+
+    def get_list():
+        query = 'filter[year__gte]=2000&filter[make]=Ford&sort=-year,make' \
+                '&page[limit]=10&page[offset]=0&include=owner' \
+                '&fields[trucks]=make,year,owner'
+        resp = client.request('GET', '/trucks', query=query, headers=JSONAPI)
+        _check(resp, 200)
+
+    def post_create():
+        resp = client.request('POST', '/trucks', body=_truck_payload(),
+                              headers=JSONAPI)
+        _check(resp, 201)
+
+    def post_bulk():
+        resp = client.request('POST', '/trucks', body=bulk, headers=JSONAPI)
+        _check(resp, 201)
+
+    def patch_update():
+        years[0] = 2000 + (years[0] + 1) % 20
+        body = _truck_payload(rid=2, year=years[0])
+        resp = client.request('PATCH', '/trucks/2', body=body,
+                              headers=JSONAPI)
+        _check(resp, 200)
+
+    def error_400():
+        resp = client.request('GET', '/trucks', query='filter[bogus]=1',
+                              headers=JSONAPI)
+        _check(resp, 400)
+
+    def error_401():
+        headers = dict(JSONAPI, Authorization='Bearer bogus')
+        _check(client.request('GET', '/trucks/1', headers=headers), 401)
+
+    def error_404():
+        resp = client.request('GET', '/trucks/999999999', headers=JSONAPI)
+        _check(resp, 404)
+
+    def token():
+        body = 'grant_type=password&username=%s&password=%s' % (
+            app.USERNAME, app.PASSWORD)
+        headers = {'Content-Type': goldman.FORMURL_MIMETYPE}
+        resp = client.request('POST', '/token', body=body, headers=headers)
+        _check(resp, 200)
+
+    return {
+        'error_400': error_400,
+        'error_401': error_401,
+        'error_404': error_404,
+        'get_list': get_list,
+        'get_single': get_single,
+        'patch_update': patch_update,
+        'post_bulk': post_bulk,
+        'post_create': post_create,
+        'token': token,
+    }
+
+
+def get_store(name, pg_url=None):
+    """ Return the store class by name & prepare it """
+
+    if name == 'memory':
+        from goldman.stores.memory.store import DATABASE, Store
+
+        DATABASE.clear()
+    else:
+        goldman.config.PG_URL = pg_url or os.environ.get('PG_URL')
+
+        if not goldman.config.PG_URL:
+            sys.exit('the postgres store needs --pg-url or PG_URL')
+
+        from goldman.stores.postgres.store import Store
+
+        app.create_schema()
+
+    return Store
+
+
+def run(store, args):
+    """ Run the selected scenarios against a store
+
+    :return: dict of scenario names to results
+    """
+
+    # every store gets a fresh config since the API froze the last
+    goldman.config = goldman.Config()
+
+    app.configure(get_store(store, args.pg_url), sink=PHASES)
+    app.seed()
+
+    client = Client(app.API())
+    resp = client.request('POST', '/token', body='grant_type=password&'
+                          'username=%s&password=%s' % (app.USERNAME,
+                                                       app.PASSWORD),
+                          headers={'Content-Type': goldman.FORMURL_MIMETYPE})
+    client.token = resp.json['access_token']
+
+    results = {}
+
+    for name, func in sorted(scenarios(client).items()):
+        if args.scenario and name not in args.scenario:
+            continue
+
+        results[name] = measure(func, args.iterations, args.warmup)
+
+    return results
+
+
+def compare(key, result, baseline, tolerance):
+    """ Return a list of regression messages versus the baseline """
+
+    base = baseline.get(key)
+    flags = []
+
+    if not base:
+        return flags
+
+    if result['rps'] < base['rps'] * (1 - tolerance):
+        flags.append('throughput %.0f -> %.0f req/s' % (base['rps'],
+                                                        result['rps']))
+
+    if result['allocs'] > base['allocs'] * (1 + tolerance) + 1:
+        flags.append('allocations %.1f -> %.1f objs/req' % (
+            base['allocs'], result['allocs']))
+
+    return flags
+
+
+def report(key, result, flags, phases=True):
+    """ Print the result of a single scenario """
+
+    print('%-22s %8.0f req/s  p50 %7.2fms  p95 %7.2fms  %8.1f objs/req%s' % (
+        key, result['rps'], result['p50'], result['p95'], result['allocs'],
+        '  REGRESSION' if flags else ''))
+
+    for flag in flags:
+        print('    ! %s' % flag)
+
+    if phases:
+        items = sorted(result['phases'].items(), key=lambda i: -i[1])
+        print('    %s' % ', '.join('%s %.2fms' % i for i in items))
+
+
+def main():
+    """ Parse the arguments, run, compare, & report """
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[4])
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--iterations', '-n', default=500, type=int)
+    parser.add_argument('--no-phases', action='store_true')
+    parser.add_argument('--pg-url')
+    parser.add_argument('--save', action='store_true',
+                        help='save the results as the new baseline')
+    parser.add_argument('--scenario', action='append',
+                        help='only run the named scenario(s)')
+    parser.add_argument('--store', choices=('all', 'memory', 'postgres'),
+                        default='memory')
+    parser.add_argument('--tolerance', default=0.10, type=float)
+    parser.add_argument('--warmup', default=50, type=int)
+    args = parser.parse_args()
+
+    try:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    except (IOError, ValueError):
+        baseline = {}
+
+    stores = ('memory', 'postgres') if args.store == 'all' else (args.store,)
+    regressions = 0
+    saved = dict(baseline)
+
+    for store in stores:
+        for name, result in sorted(run(store, args).items()):
+            key = '%s:%s' % (store, name)
+            flags = compare(key, result, baseline, args.tolerance)
+            regressions += bool(flags)
+
+            report(key, result, flags, phases=not args.no_phases)
+            saved[key] = {k: v for k, v in result.items() if k != 'phases'}
+
+    if args.save:
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(saved, baseline_file, indent=4, sort_keys=True)
+        print('baseline saved to %s' % args.baseline)
+
+    if regressions:
+        print('%s scenario(s) regressed' % regressions)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+    benchmarks.startup
+    ~~~~~~~~~~~~~~~~~~
+
+    Worker startup benchmarks.
+
+    Every scenario is run in fresh python interpreters so the
+    import time & memory are those a new worker pays on boot:
+
+        import       - import goldman
+        api          - import goldman & build an empty API
+        app          - import & build the benchmark app (see
+                       app.py) like a worker serving it would
+
+    The median import time, the max RSS, the number of modules
+    loaded, & which of the heavy optional 3rd party libs were
+    imported are reported per scenario:
+
+        python benchmarks/startup.py -n 20
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+
+HEAVY = ('boto', 'cgi', 'multiprocessing', 'phonenumbers', 'psycopg2',
+         'us')
+
+SCENARIOS = {
+    'api': 'import goldman\ngoldman.API()',
+    'app': 'import app\napp.API()',
+    'import': 'import goldman',
+}
+
+CHILD = '''
+import json, resource, sys, time
+start = time.time()
+%s
+msecs = (time.time() - start) * 1000
+print(json.dumps({
+    'heavy': [mod for mod in %r if mod in sys.modules],
+    'modules': len(sys.modules),
+    'msecs': msecs,
+    'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}))
+'''
+
+
+def run(code, iterations):
+    """ Run the code in fresh interpreters & return the results """
+
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [
+        os.path.dirname(os.path.abspath(__file__)),
+        env.get('PYTHONPATH'),
+    ]))
+
+    results = []
+
+    for _ in range(iterations):
+        out = subprocess.check_output(
+            [sys.executable, '-c', CHILD % (code, HEAVY)],
+            env=env,
+        )
+        results.append(json.loads(out.decode().strip().splitlines()[-1]))
+
+    return results
+
+
+def report(name, results):
+    """ Print the summary of a scenario's results """
+
+    msecs = sorted(result['msecs'] for result in results)
+    rss = max(result['rss'] for result in results)
+
+    print('%-8s %8.1fms median %8.1fms p95 %8d KB rss %5d modules  %s' % (
+        name,
+        msecs[len(msecs) // 2],
+        msecs[min(len(msecs) - 1, int(len(msecs) * 0.95))],
+        rss,
+        results[-1]['modules'],
+        ', '.join(results[-1]['heavy']) or '-',
+    ))
+
+
+def main():
+    """ Parse the arguments, run, & report """
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[4])
+    parser.add_argument('--iterations', '-n', default=10, type=int)
+    parser.add_argument('--scenario', action='append',
+                        help='only run the named scenario(s)')
+    args = parser.parse_args()
+
+    for name in sorted(args.scenario or SCENARIOS):
+        report(name, run(SCENARIOS[name], args.iterations))
+
+
+if __name__ == '__main__':
+    main()
@@ -3,19 +3,19 @@
     ~~~~~~~
 
     This is where we initialize the goldman God object.
+
+    The middlewares, (de)serializers, models, resources & API
+    are imported on first use so an app only pays for the ones
+    it uses & their 3rd party libs. See utils.lazy.
 """
 
+import importlib
 import threading
 
 sess = threading.local()  # pylint: disable=invalid-name
 
 
 from goldman.mimetypes import *
-from goldman.models import *
-from goldman.middleware import *
-from goldman.deserializers import *
-from goldman.serializers import *
-from goldman.resources import *
 
 
 from goldman.config import Config
@@ -23,4 +23,13 @@ from goldman.config import Config
 config = Config()  # pylint: disable=invalid-name
 
 
-from goldman.api import *
+from goldman.utils.lazy import lazy_module
+
+_LAZY = {'API': ('goldman.api', 'API')}
+
+for _pkg in ('deserializers', 'middleware', 'models', 'resources',
+             'serializers'):
+    _pkg = importlib.import_module('goldman.%s' % _pkg)
+    _LAZY.update((name, (_pkg.__name__, name)) for name in _pkg.__lazy__)
+
+lazy_module(__name__, _LAZY)
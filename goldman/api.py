@@ -11,19 +11,29 @@
 import falcon
 import goldman
 import json
+import logging
+import time
 
+from goldman import metrics
 from goldman.request import Request
 from goldman.response import Response
+from goldman.utils.timing_helpers import Timings, TimedMiddleware
 
 
 __all__ = ['API']
 
+LOG = logging.getLogger('goldman.timing')
+
 
 class API(falcon.API):
     """ Subclass the falcon.API object with our own
 
     Goldman uses custom request, response, & route loading
     techniques when compared to the falcon.API object.
+
+    Middleware with a `response_headers` list of static headers
+    has them merged into the default headers of the response
+    type once. They're then added to each response at once.
     """
 
     MIDDLEWARE = []
@@ -32,6 +42,12 @@ class API(falcon.API):
 
     def __init__(self):
 
+        goldman.config.freeze()
+
+        self.metered = goldman.config.METRICS
+        self.timing = goldman.config.SERVER_TIMING
+        self.timing_sink = goldman.config.TIMING_SINK
+
         middleware = [
             goldman.SecurityMiddleware(),
             goldman.HttpSpecsMiddleware(),
@@ -42,16 +58,127 @@ class API(falcon.API):
         ]
         middleware += self.MIDDLEWARE
 
+        headers = []
+
+        for component in middleware:
+            headers += getattr(component, 'response_headers', None) or []
+
+        if self.timing:
+            middleware = [TimedMiddleware(m) for m in middleware]
+
         super(API, self).__init__(
             middleware=middleware,
             request_type=Request,
-            response_type=Response,
+            response_type=Response.with_headers(headers),
         )
 
         self._load_resources()
         self._load_routes()
         self.set_error_serializer(self._error_serializer)
 
+    def __call__(self, env, start_response):
+        """ WSGI entry point instrumenting the request when enabled
+
+        If goldman.config.SERVER_TIMING is enabled a Timings object
+        is anchored on goldman.sess for the life of the request.
+        The `Server-Timing` header is injected as the response is
+        started so it covers any error composition done by falcon.
+
+        Afterwards, the structured record is handed to the
+        goldman.config.TIMING_SINK callable if one is configured.
+
+        If goldman.config.METRICS is enabled the latency & status
+        of the request are recorded by route & method.
+        """
+
+        timing = self.timing
+        metered = self.metered
+
+        goldman.sess.resource = None
+        goldman.sess.timings = None
+
+        if not timing and not metered:
+            return super(API, self).__call__(env, start_response)
+
+        method = env.get('REQUEST_METHOD')
+        start = time.time()
+        statuses = []
+
+        if timing:
+            timings = Timings(method, env.get('PATH_INFO'))
+            goldman.sess.timings = timings
+
+        def _start_response(status, headers, *args):
+            """ Capture the status & add the Server-Timing header """
+
+            statuses.append(status)
+
+            if timing:
+                timings.status = status
+                headers.append(('Server-Timing', timings.to_header()))
+
+            return start_response(status, headers, *args)
+
+        try:
+            body = super(API, self).__call__(env, _start_response)
+        finally:
+            goldman.sess.timings = None
+
+        # the response has started so a broken sink is only logged
+        if timing and self.timing_sink:
+            try:
+                self.timing_sink(timings.to_dict())
+            except Exception:  # pylint: disable=broad-except
+                LOG.exception('the timing sink failed')
+
+        if metered:
+            route = getattr(goldman.sess.resource, 'route', None) or 'none'
+            status = statuses[-1].split(' ', 1)[0] if statuses else '500'
+
+            metrics.request_latency.observe(time.time() - start,
+                                            (method, route))
+            metrics.responses.inc((method, route, status))
+            metrics.REGISTRY.flush()
+
+        return body
+
+    def add_route(self, uri_template, resource):
+        """ Register the route & stamp the template on the resource
+
+        The URI template is a low cardinality identifier of the
+        resource so it's used as the `route` label of the
+        request metrics.
+        """
+
+        if not getattr(resource, 'route', None):
+            resource.route = uri_template
+
+        super(API, self).add_route(uri_template, resource)
+
+    def _get_responder(self, req):
+        """ Commit the unit of work of the store after the responder
+
+        If the UnitOfWorkMiddleware began a unit of work it's
+        committed as soon as the responder returns, before falcon
+        composes the response, so a failed commit is still an
+        error response. Anything left is rolled back by the
+        middleware.
+        """
+
+        responder, params, resource = super(API, self)._get_responder(req)
+
+        def _responder(*args, **kwargs):
+            """ Call the responder & commit if it succeeded """
+
+            responder(*args, **kwargs)
+
+            store = getattr(goldman.sess, 'store', None)
+
+            if store is not None and store.queued is not None:
+                store.commit()
+
+        return _responder, params, resource
+
     def _load_resources(self):
         """ Load all the native goldman resources.
 
@@ -140,6 +267,6 @@ class API(falcon.API):
             error['links'] = {'about': ''}
 
         return (
-            goldman.config.JSONAPI_MIMETYPE,
+            goldman.JSONAPI_MIMETYPE,
             json.dumps({'errors': [error]}),
         )
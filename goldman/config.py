@@ -4,12 +4,20 @@
 
     Initialize some of our helpful constants used throughout
     the api & merge them with any app specific overrides.
+
+    The API freezes the config when it's built so the values
+    the middleware bind at construction can't go stale. Set any
+    overrides at runtime before building the API.
 """
 
 import importlib
 import os
 
 
+FILTERS = ('BOOL_FILTERS', 'DATE_FILTERS', 'ENUM_FILTERS', 'EQUAL_FILTERS',
+           'GEO_FILTERS', 'NUM_FILTERS', 'STR_FILTERS')
+
+
 class Config(object):
     """ Default configuration settings.
 
@@ -19,22 +27,53 @@ class Config(object):
 
     Any directives beginning with '_' will be considered
     private & not attached to the Config object.
+
+    The *_FILTERS & AGGREGATES operators are frozensets &
+    QUERY_FILTERS is all of the filters unless it's overridden.
+    Likewise HPKP_HEADER is derived from HPKP unless it's
+    overridden. These are recomputed after every override.
     """
 
-    # JSON API
+    # JSON API. A POST of a `data` array creates up to
+    # JSONAPI_BULK_LIMIT resources at once.
+    JSONAPI_BULK_LIMIT = 1000
     JSONAPI_VERSION = '1.0'
 
     # Query filter operators
-    BOOL_FILTERS = ('exists',)
-    DATE_FILTERS = ('after', 'before')
-    ENUM_FILTERS = ('in', 'len', 'nin')
-    EQUAL_FILTERS = ('eq', 'neq')
-    GEO_FILTERS = ('near', 'within')
-    NUM_FILTERS = ('gt', 'gte', 'lt', 'lte')
-    STR_FILTERS = ('contains', 'icontains', 'iexact', 'endswith', 'startswith')
+    BOOL_FILTERS = frozenset(('exists',))
+    DATE_FILTERS = frozenset(('after', 'before'))
+    ENUM_FILTERS = frozenset(('in', 'len', 'nin'))
+    EQUAL_FILTERS = frozenset(('eq', 'neq'))
+    GEO_FILTERS = frozenset(('near', 'within'))
+    NUM_FILTERS = frozenset(('gt', 'gte', 'lt', 'lte'))
+    STR_FILTERS = frozenset(('contains', 'icontains', 'iexact', 'endswith',
+                             'search', 'startswith'))
+
+    QUERY_FILTERS = BOOL_FILTERS | DATE_FILTERS | ENUM_FILTERS | \
+        EQUAL_FILTERS | GEO_FILTERS | NUM_FILTERS | STR_FILTERS
 
-    QUERY_FILTERS = BOOL_FILTERS + DATE_FILTERS + ENUM_FILTERS + \
-        EQUAL_FILTERS + GEO_FILTERS + NUM_FILTERS + STR_FILTERS
+    # Aggregate operators of the to-many relationships. A
+    # `count` counts the related resources while the rest apply
+    # to a field of them like `year__max`. See the aggregate
+    # query param.
+    AGGREGATES = frozenset(('count', 'max', 'min', 'sum'))
+
+    # The models & the store class (the ThreadLocalMiddleware
+    # creates a store once per thread & resets it before every
+    # request)
+    MODELS = ()
+    STORE = None
+
+    # Full text search. Fields opt-in to the `search` filter
+    # operator with `searchable=True` or `searchable='trigram'`
+    # & results can be sorted by relevance with RANK_SORT.
+    RANK_SORT = '_rank'
+    SEARCH_LANG = 'english'
+
+    # Geo filters on fields paired by their `geo` name. Results
+    # can be sorted by the meters from the point of a `near`
+    # filter with DISTANCE_SORT.
+    DISTANCE_SORT = '_distance'
 
     # Query pagination
     PAGE_LIMIT = 10
@@ -42,18 +81,111 @@ class Config(object):
     # Query sort preference
     SORT = 'created'
 
-    # Security stuff
+    # Security stuff. The HPKP_HEADER value is derived from the
+    # HPKP pins, unless it's set directly, & skipped if None.
+    HPKP = None
+    HPKP_HEADER = None
+    HSTS_HEADER = 'max-age=31536000; includeSubDomains'
     MAX_URI_LENGTH = 4000
     TLS_REQUIRED = True
 
+    # RATE_LIMIT_COUNT requests per RATE_LIMIT_DURATION seconds
+    # when the RateLimitMiddleware is used
+    RATE_LIMIT_COUNT = 100
+    RATE_LIMIT_DURATION = 60
+
     # URL prefix for the API
     BASE_URL = '/api'
 
     # WWW-Authenticate
     AUTH_REALM = 'JSON API'
 
+    # Postgres. The finds & searches of GET & HEAD requests are
+    # read from PG_REPLICA_URLS, a list of urls or (url, weight)
+    # tuples, until the request writes. Replicas lagging more
+    # than PG_REPLICA_MAX_LAG seconds are skipped & their lag &
+    # health is checked every PG_REPLICA_CHECK seconds. Each
+    # database has a pool of PG_POOL_MIN to PG_POOL_MAX
+    # connections. That caps the requests of a process using
+    # the database at once: the others wait PG_POOL_TIMEOUT
+    # seconds for a connection & then fail with a 503.
+    PG_URL = None
+    PG_REPLICA_URLS = ()
+    PG_REPLICA_CHECK = 5
+    PG_REPLICA_MAX_LAG = 5
+    PG_POOL_MIN = 1
+    PG_POOL_MAX = 20
+    PG_POOL_TIMEOUT = 5
+
+    # Request deadlines in seconds when the DeadlineMiddleware
+    # is used. Resources can override REQUEST_TIMEOUT with their
+    # TIMEOUT & clients can only shorten it with the header.
+    REQUEST_TIMEOUT = None
+    REQUEST_TIMEOUT_HEADER = 'Request-Timeout'
+
+    # S3 uploads are streamed in parts of S3_PART_SIZE bytes
+    # (S3 requires at least 5 MiB) & fail with a 413 once more
+    # than MAX_UPLOAD_SIZE bytes are read. S3_HOST & S3_PORT
+    # point to an S3 compatible stand-in instead of AWS. The
+    # S3_BUCKET, S3_KEY, & S3_SECRET are the defaults of the S3
+    # resources.
+    MAX_UPLOAD_SIZE = None
+    S3_BUCKET = None
+    S3_KEY = None
+    S3_SECRET = None
+    S3_HOST = None
+    S3_PORT = None
+    S3_PART_SIZE = 5 * 1024 * 1024
+    S3_SECURE = True
+
+    # S3 requests failing with a 5xx or a network error are
+    # retried up to S3_RETRIES times waiting S3_BACKOFF seconds
+    # doubled on each retry.
+    S3_RETRIES = 3
+    S3_BACKOFF = 0.1
+
+    # Background uploads of S3 resources with background=True.
+    # They're spooled to UPLOAD_DIR (the system temp dir if None)
+    # & sent by UPLOAD_WORKERS threads with at most
+    # UPLOAD_QUEUE_SIZE waiting. Their status is served by the
+    # UploadStatusResource routed at UPLOAD_STATUS_URL/{uid}.
+    UPLOAD_DIR = None
+    UPLOAD_QUEUE_SIZE = 100
+    UPLOAD_STATUS_URL = '/uploads'
+    UPLOAD_WORKERS = 4
+
+    # Derivatives of S3ModelImageResource uploads. A list of
+    # dicts like {'name': 'thumb', 'size': (150, 150), 'format':
+    # 'jpeg', 'quality': 85} made by IMAGE_WORKERS processes, one
+    # per CPU if None. They require PIL (or Pillow).
+    IMAGE_DERIVATIVES = ()
+    IMAGE_WORKERS = None
+
+    # Per-request instrumentation. The sink is a callable given
+    # a dict record of each request's phase timings.
+    SERVER_TIMING = False
+    TIMING_SINK = None
+
+    # Queries slower than SLOW_QUERY_MS are logged & a fraction
+    # of those (0.0 - 1.0) have their EXPLAIN ANALYZE captured
+    # in the background, for up to SLOW_QUERY_EXPLAIN_TIMEOUT
+    # seconds each
+    SLOW_QUERY_MS = 200
+    SLOW_QUERY_EXPLAIN = 0.0
+    SLOW_QUERY_EXPLAIN_TIMEOUT = 5
+
+    # Request metrics. Preforked servers should set METRICS_DIR
+    # to a directory shared by the workers where each writes a
+    # snapshot at most every METRICS_FLUSH seconds.
+    METRICS = False
+    METRICS_DIR = None
+    METRICS_FLUSH = 5
+
     def __init__(self):
 
+        self.__dict__['_frozen'] = False
+        self.__dict__['_overrides'] = set()
+
         try:
             module = os.environ.get('GOLDMAN_CONFIG_MODULE', '')
             module = importlib.import_module(module)
@@ -65,15 +197,70 @@ class Config(object):
         except (ImportError, ValueError):
             module = None
 
+        self._derive()
+
     def __getattr__(self, name):
         """ Return None if the attr isn't found
 
         Instead of throwing an exception if the attribute isn't
         found like python would ordinarily do & forcing each access
         to guard against... we conveniently return None.
+
+        Only unknown constants get here since every known one has
+        a default. Private names still raise so copy & friends
+        keep working.
         """
 
-        try:
-            return super(Config).__getattr__(name)
-        except AttributeError:
-            return None
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        return None
+
+    def __setattr__(self, name, val):
+        """ Override a constant unless the config is frozen """
+
+        if self._frozen:
+            raise AttributeError('goldman.config is frozen once the API '
+                                 'is built, set %s before' % name)
+
+        self.__dict__[name] = val
+        self._overrides.add(name)
+
+        self._derive()
+
+    def _derive(self):
+        """ Recompute the frozensets & derived values """
+
+        attrs = self.__dict__
+
+        for name in FILTERS:
+            attrs[name] = frozenset(getattr(self, name) or ())
+
+        attrs['AGGREGATES'] = frozenset(self.AGGREGATES or ())
+
+        if 'QUERY_FILTERS' in self._overrides:
+            attrs['QUERY_FILTERS'] = frozenset(self.QUERY_FILTERS or ())
+        else:
+            attrs['QUERY_FILTERS'] = frozenset().union(
+                *(attrs[name] for name in FILTERS))
+
+        if 'HPKP_HEADER' not in self._overrides:
+            attrs['HPKP_HEADER'] = None
+
+            if self.HPKP:
+                attrs['HPKP_HEADER'] = '{}; includeSubdomains; ' \
+                                       'max-age=31536000'.format(self.HPKP)
+
+    def freeze(self):
+        """ Resolve every constant into the instance & freeze it
+
+        The API calls this when it's built. Every constant is
+        then a plain instance attribute & any further override
+        raises an AttributeError.
+        """
+
+        for name in dir(self):
+            if name.isupper() and name not in self.__dict__:
+                self.__dict__[name] = getattr(self, name)
+
+        self.__dict__['_frozen'] = True
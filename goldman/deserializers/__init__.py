@@ -3,23 +3,26 @@
     ~~~~~~~~~~~~~
 
     All deserializers supported by our API
+
+    They're imported on first use, see utils.lazy.
 """
 
-from ..deserializers.base import Deserializer as BaseDeserializer
-from ..deserializers.comma_sep import Deserializer as CsvDeserializer
-from ..deserializers.form_data import Deserializer as FormDataDeserializer
-from ..deserializers.form_urlencoded import (
-    Deserializer as FormUrlEncodedDeserializer
-)
-from ..deserializers.json_7159 import Deserializer as JsonDeserializer
-from ..deserializers.jsonapi import Deserializer as JsonApiDeserializer
+from goldman.utils.lazy import lazy_module
 
 
-DESERIALIZERS = [
-    BaseDeserializer,
-    CsvDeserializer,
-    FormDataDeserializer,
-    FormUrlEncodedDeserializer,
-    JsonDeserializer,
-    JsonApiDeserializer,
-]
+lazy_module(__name__, {
+    'BaseDeserializer': ('.base', 'Deserializer'),
+    'CsvDeserializer': ('.comma_sep', 'Deserializer'),
+    'FormDataDeserializer': ('.form_data', 'Deserializer'),
+    'FormUrlEncodedDeserializer': ('.form_urlencoded', 'Deserializer'),
+    'JsonDeserializer': ('.json_7159', 'Deserializer'),
+    'JsonApiDeserializer': ('.jsonapi', 'Deserializer'),
+    'DESERIALIZERS': [
+        'BaseDeserializer',
+        'CsvDeserializer',
+        'FormDataDeserializer',
+        'FormUrlEncodedDeserializer',
+        'JsonDeserializer',
+        'JsonApiDeserializer',
+    ],
+})
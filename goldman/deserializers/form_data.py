@@ -16,6 +16,11 @@
     WARN: Currently we only accept 1 upload at a time!
           An error message will be sent if more than 1
           upload is detected.
+
+    The upload can be streamed to a sink, like an S3Upload,
+    as it's parsed instead of being read into memory. Either
+    way uploads larger than the max_size fail with a 413 as
+    soon as the limit is crossed.
 """
 
 import cgi
@@ -27,12 +32,89 @@ from ..deserializers.base import Deserializer as BaseDeserializer
 from goldman.utils.error_helpers import abort
 
 
+class FieldStorage(cgi.FieldStorage):
+    """ FieldStorage writing each part to open_file()
+
+    The stock FieldStorage buffers the first 1000 bytes of a
+    part in memory before spooling it to a temporary file. A
+    part is written to the file object open_file returns from
+    the first byte on instead.
+
+    The preamble before the first boundary is read like a
+    part without any headers & is left as is.
+    """
+
+    open_file = None
+
+    def make_file(self, binary=None):
+        """ Return the file object of open_file if there is one """
+
+        if self.open_file is None or not self.headers:
+            return cgi.FieldStorage.make_file(self, binary)
+
+        return self.open_file()  # pylint: disable=not-callable
+
+    def read_lines(self):
+        """ Read the part straight into make_file() """
+
+        if self.open_file is None or not self.headers:
+            return cgi.FieldStorage.read_lines(self)
+
+        self.file = self.make_file()
+        self._FieldStorage__file = None  # pylint: disable=invalid-name
+
+        if self.outerboundary:
+            self.read_lines_to_outerboundary()
+        else:
+            self.read_lines_to_eof()
+
+
+class CappedFile(object):
+    """ File object aborting once more than max_size is written
+
+    The writes are passed on to the file object it wraps.
+    """
+
+    def __init__(self, fileobj, max_size=None):
+
+        self.file = fileobj
+        self.max_size = max_size
+        self.size = 0
+
+    def __getattr__(self, name):
+
+        return getattr(self.file, name)
+
+    def seek(self, *args):
+        """ cgi rewinds every part but a sink may not seek """
+
+        if hasattr(self.file, 'seek'):
+            self.file.seek(*args)
+
+    def write(self, data):
+        """ Count the bytes written & abort past the max_size """
+
+        self.size += len(data)
+
+        if self.max_size is not None and self.size > self.max_size:
+            abort(exceptions.PayloadTooLarge(self.max_size))
+
+        self.file.write(data)
+
+
 class Deserializer(BaseDeserializer):
     """ RFC 2388 compliant deserializer """
 
     MIMETYPE = goldman.FILEUPLOAD_MIMETYPE
 
-    def deserialize(self, mimetypes):  # pylint: disable=arguments-differ
+    def __init__(self, req, resp):
+
+        super(Deserializer, self).__init__(req, resp)
+
+        self.files = []
+
+    # pylint: disable=arguments-differ
+    def deserialize(self, mimetypes, sink=None, max_size=None):
         """ Invoke the deserializer
 
         Upon successful deserialization a dict will be returned
@@ -43,19 +125,39 @@ class Deserializer(BaseDeserializer):
                 'content-type': <content-type of content>,
                 'file-ext': <file extension based on content-type>,
                 'file-name': <file name of content>,
+                'file-size': <size of content in bytes>,
             }
 
+        With a sink the content is the sink's file object which
+        is closed once the whole payload is parsed & valid. If
+        the payload is rejected its abort() method is called.
+
         :param mimetypes:
             allowed mimetypes of the object in the request
             payload
+        :param sink:
+            callable given the FieldStorage of the upload that
+            returns a file object to stream the upload to
+        :param max_size:
+            maximum upload size in bytes, defaults to
+            goldman.config.MAX_UPLOAD_SIZE
         :return:
             normalized dict
         """
 
         super(Deserializer, self).deserialize()
 
-        parts = self.parse(mimetypes)
-        data = self.normalize(parts)
+        if max_size is None:
+            max_size = goldman.config.MAX_UPLOAD_SIZE
+
+        try:
+            parts = self.parse(mimetypes, sink, max_size)
+            data = self.normalize(parts)
+        except Exception:
+            for fileobj in self.files:
+                if hasattr(fileobj, 'abort'):
+                    fileobj.abort()
+            raise
 
         return data
 
@@ -70,13 +172,39 @@ class Deserializer(BaseDeserializer):
 
         part = parts.list[0]
 
+        if part.file in self.files:
+            content = part.file.file
+            content.close()
+        else:
+            content = part.file.read()
+
         return {
-            'content': part.file.read(),
+            'content': content,
             'content-type': part.type,
             'file-ext': extensions.get(part.type),
             'file-name': part.filename,
+            'file-size': part.file.size,
         }
 
+    def _open_file(self, part, mimetypes, sink, max_size):
+        """ Return the file object a part is written to
+
+        The part is validated before any of it is read so an
+        upload that will be rejected is never streamed to the
+        sink. Only the first upload is streamed since more than
+        one is rejected anyway.
+        """
+
+        self._parse_part(part, mimetypes)
+
+        if sink and not self.files:
+            fileobj = CappedFile(sink(part), max_size)
+            self.files.append(fileobj)
+        else:
+            fileobj = CappedFile(cgi.FieldStorage.make_file(part), max_size)
+
+        return fileobj
+
     def _parse_top_level_content_type(self):
         """ Ensure a boundary is present in the Content-Type header
 
@@ -126,13 +254,30 @@ class Deserializer(BaseDeserializer):
 
         self._parse_section_three(part, mimetypes)
 
-    def parse(self, mimetypes):
-        """ Invoke the RFC 2388 spec compliant parser """
+    def parse(self, mimetypes, sink=None, max_size=None):
+        """ Invoke the RFC 2388 spec compliant parser
+
+        The parts are parsed with a FieldStorage sub-class whose
+        file parts are written to the file objects of _open_file
+        as they're read.
+        """
 
         self._parse_top_level_content_type()
 
+        deserializer = self
+
+        class Storage(FieldStorage):
+            """ FieldStorage of the parts of this request """
+
+            def open_file(self):
+                """ Return the file object of the part """
+
+                # pylint: disable=protected-access
+                return deserializer._open_file(self, mimetypes, sink,
+                                               max_size)
+
         link = 'tools.ietf.org/html/rfc2388'
-        parts = cgi.FieldStorage(
+        parts = Storage(
             fp=self.req.stream,
             environ=self.req.env,
         )
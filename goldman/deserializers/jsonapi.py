@@ -12,13 +12,19 @@
         1) A parser for spec compliant validations
         2) A normalizer for converting into a common
            format expected by our resources/responders.
+
+    A POST may have a `data` array of resource objects to create
+    them all at once. Each is parsed & normalized just like a
+    single one into a list.
 """
 
 import goldman
 import goldman.exceptions as exceptions
 
 from ..deserializers.json_7159 import Deserializer as JsonDeserializer
-from goldman.utils.error_helpers import abort
+from goldman.serializers.jsonapi_error import Serializer as \
+    JsonApiErrorSerializer
+from goldman.utils.error_helpers import abort, item_errors
 
 
 class Deserializer(JsonDeserializer):
@@ -97,10 +103,23 @@ class Deserializer(JsonDeserializer):
         :param body:
             the already vetted & parsed payload
         :return:
-            normalized dict
+            normalized dict or list of them for a `data` array
+        """
+
+        if isinstance(body['data'], list):
+            return [self._normalize_resource(resource)
+                    for resource in body['data']]
+
+        return self._normalize_resource(body['data'])
+
+    def _normalize_resource(self, resource):
+        """ Normalize a single resource object
+
+        :param resource:
+            dict JSON API resource object
+        :return: dict
         """
 
-        resource = body['data']
         data = {'rtype': resource['type']}
 
         if 'attributes' in resource:
@@ -199,7 +218,9 @@ class Deserializer(JsonDeserializer):
         rid = isinstance(resource.get('id'), unicode)
         rtype = isinstance(resource.get('type'), unicode)
 
-        if not rtype or (self.req.is_patching and not rid):
+        modifying = self.req.is_patching or self.req.is_putting
+
+        if not rtype or (modifying and not rid):
             self.fail('JSON API requires that every resource object MUST '
                       'contain a `type` top-level key. Additionally, when '
                       'modifying an existing resource object an `id` '
@@ -224,14 +245,32 @@ class Deserializer(JsonDeserializer):
         link = 'jsonapi.org/format/#document-top-level'
 
         try:
-            if not isinstance(body['data'], dict):
+            data = body['data']
+            bulk = isinstance(data, list) and self.req.is_posting
+
+            if not isinstance(data, dict) and not bulk:
+                raise TypeError
+            elif bulk and not all(isinstance(d, dict) for d in data):
                 raise TypeError
         except (KeyError, TypeError):
             self.fail('JSON API payloads MUST be a hash at the most '
                       'top-level; rooted at a key named `data` where the '
                       'value must be a hash. Currently, we only support '
                       'JSON API payloads that comply with the single '
-                      'Resource Object section.', link)
+                      'Resource Object section or, when creating, an '
+                      'array of them.', link)
+
+        if bulk and not data:
+            self.fail('When creating resources in bulk the `data` array '
+                      'MUST contain at least 1 resource object.', link)
+        elif bulk and len(data) > goldman.config.JSONAPI_BULK_LIMIT:
+            abort(exceptions.PayloadTooLarge(**{
+                'detail': 'When creating resources in bulk the `data` '
+                          'array MUST contain at most %s resource objects.'
+                          % goldman.config.JSONAPI_BULK_LIMIT,
+                'links': link,
+                'max_size': goldman.config.JSONAPI_BULK_LIMIT,
+            }))
 
         if 'errors' in body:
             self.fail('JSON API payloads MUST not have both `data` & '
@@ -249,9 +288,26 @@ class Deserializer(JsonDeserializer):
         """
 
         self._parse_top_level(body)
-        self._parse_resource(body['data'])
 
-        resource = body['data']
+        if not isinstance(body['data'], list):
+            self._parse_resource_object(body['data'])
+            return
+
+        errors = []
+
+        for idx, resource in enumerate(body['data']):
+            try:
+                self._parse_resource_object(resource)
+            except JsonApiErrorSerializer as exc:
+                errors += item_errors(exc, idx)
+
+        if errors:
+            abort(errors)
+
+    def _parse_resource_object(self, resource):
+        """ Parse a single resource object & everything in it """
+
+        self._parse_resource(resource)
 
         if 'attributes' in resource:
             self._parse_attributes(resource['attributes'])
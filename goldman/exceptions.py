@@ -425,6 +425,37 @@ class ContentLengthRequired(APIException):
         })
 
 
+"""
+    413 Payload Too Large
+    ~~~~~~~~~~~~~~~~~~~~~
+"""
+
+
+class PayloadTooLarge(APIException):
+    """ The uploaded file exceeds the maximum upload size
+
+    This exception requires a value of maximum size in bytes
+    to be passed in for a more detailed response. It also
+    supports detail & links overrides for payloads that are too
+    large for other reasons.
+    """
+
+    DETAIL = 'The file in your request has exceeded the maximum ' \
+             'upload size of %s bytes. Please shrink or compress it ' \
+             '& retry your request.'
+
+    def __init__(self, max_size, **kwargs):
+
+        super(PayloadTooLarge, self).__init__(**{
+            'code': 'payload_too_large',
+            'detail': kwargs.get('detail', self.DETAIL % max_size),
+            'links': kwargs.get('links',
+                                'tools.ietf.org/html/rfc7231#section-6.5.11'),
+            'status': falcon.HTTP_413,
+            'title': 'Payload is too large',
+        })
+
+
 """
     414 URI Too Long
     ~~~~~~~~~~~~~~~~
@@ -610,6 +641,22 @@ class ServiceUnavailable(APIException):
         })
 
 
+class DatabaseBusy(ServiceUnavailable):
+    """ Every database connection was in use for too long
+
+    The Retry-After header tells the client when to retry.
+    """
+
+    DETAIL = 'When handling your request every connection to the ' \
+             'database was busy. Please retry your request shortly.'
+
+    def __init__(self, retry_after=1, **kwargs):
+        super(DatabaseBusy, self).__init__(**kwargs)
+
+        self.code = 'database_busy'
+        self.headers = {'Retry-After': str(retry_after)}
+
+
 class DatabaseUnavailable(ServiceUnavailable):
     """ Something puked when accessing the database
 
@@ -619,3 +666,29 @@ class DatabaseUnavailable(ServiceUnavailable):
     DETAIL = 'When handling your request we experienced an unexpected ' \
              'error when communicating with the database. This is likely ' \
              'transitory so please retry your request.'
+
+
+"""
+    504 Gateway Timeout
+    ~~~~~~~~~~~~~~~~~~~
+"""
+
+
+class DeadlineExceeded(APIException):
+    """ The request ran out of time before it could be completed
+
+    This exception supports detail & links overrides.
+    """
+
+    DETAIL = 'Your request could not be completed within the time ' \
+             'allotted. This is usually caused by an expensive query ' \
+             'so please narrow down your filters & retry your request.'
+
+    def __init__(self, **kwargs):
+        super(DeadlineExceeded, self).__init__(**{
+            'code': 'deadline_exceeded',
+            'detail': kwargs.get('detail', self.DETAIL),
+            'links': kwargs.get('links'),
+            'status': '504 Gateway Timeout',
+            'title': 'The request took too long to complete',
+        })
@@ -0,0 +1,542 @@
+"""
+    metrics
+    ~~~~~~~
+
+    All of our metrics & the registry they're kept in.
+
+    The metrics are exposed in the Prometheus text format by
+    the MetricsResource. Three types are supported:
+
+        Counter - monotonically increasing value
+        Gauge - arbitrary value usually computed by a callback
+                at collection time
+        Histogram - cumulative bucketed observations with a
+                    running sum & count
+
+    Updates are lock free. Each thread increments its own shard
+    of a metric & the shards are only merged at collection time.
+    A shard is only ever mutated by the thread owning it so the
+    GIL is all the protection needed. The shards of threads that
+    exited are folded into a single retired shard at collection
+    time so servers churning threads don't leak them.
+
+    Preforked servers have a registry per process. If the
+    goldman.config.METRICS_DIR directory is configured each
+    process periodically writes a snapshot of its registry to a
+    file in that directory & collection merges the snapshots of
+    every process. The files are named by pid & process start so
+    a recycled pid never overwrites the file of a dead process.
+    Files of dead processes are kept so their counters &
+    histograms aren't lost but their gauges are dropped since
+    they're no longer current.
+"""
+
+import errno
+import glob
+import goldman
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import weakref
+
+
+# default histogram buckets in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+           float('inf'))
+
+LOG = logging.getLogger('goldman.metrics')
+
+# snapshot files are metrics_<pid>_<process start in ms>.json
+SNAPSHOT = re.compile(r'metrics_(\d+)_(\d+)\.json$')
+
+
+def _alive(pid):
+    """ Return True if a process with the pid is running """
+
+    try:
+        os.kill(pid, 0)
+    except OSError as exc:
+        return exc.errno == errno.EPERM
+    return True
+
+
+def _sum_into(values, other):
+    """ Sum the sample values of other into values
+
+    Counter samples are numbers & histogram samples are lists
+    summed by position. Lists are copied so values never shares
+    them with other.
+    """
+
+    for key, val in other.items():
+        if key not in values:
+            values[key] = list(val) if isinstance(val, list) else val
+        elif isinstance(val, list):
+            values[key] = [a + b for a, b in zip(values[key], val)]
+        else:
+            values[key] += val
+
+
+def _escape(val):
+    """ Escape a label value per the Prometheus text format """
+
+    val = str(val).replace('\\', r'\\').replace('\n', r'\n')
+    return val.replace('"', r'\"')
+
+
+def _fmt_float(val):
+    """ Format a number per the Prometheus text format """
+
+    if val == float('inf'):
+        return '+Inf'
+    return repr(float(val))
+
+
+def _fmt_labels(names, vals, extra=None):
+    """ Return the {key="val",...} label section of a sample """
+
+    pairs = ['%s="%s"' % (name, _escape(val)) for name, val in
+             zip(names, vals)]
+
+    if extra:
+        pairs.append('%s="%s"' % extra)
+
+    if not pairs:
+        return ''
+    return '{%s}' % ','.join(pairs)
+
+
+class Registry(object):
+    """ Collection of all the metrics in the process """
+
+    def __init__(self):
+
+        self._flushed = 0
+        self._lock = threading.Lock()
+        self._pid = None
+        self._started = None
+        self.metrics = []
+
+    def register(self, metric):
+        """ Add a metric to the registry """
+
+        with self._lock:
+            self.metrics.append(metric)
+
+    def snapshot(self):
+        """ Return the merged state of every metric in the process
+
+        :return: dict keyed by metric name
+        """
+
+        return {metric.name: metric.snapshot() for metric in self.metrics}
+
+    def flush(self, force=False):
+        """ Write the process snapshot to goldman.config.METRICS_DIR
+
+        The write is debounced to once per METRICS_FLUSH seconds
+        unless forced. The file is written to a temporary file
+        first & then renamed so readers never see a partial file.
+
+        This runs in the request path so a directory that's
+        missing or can't be written is only logged.
+        """
+
+        path = goldman.config.METRICS_DIR
+        now = time.time()
+
+        if not path:
+            return
+        elif not force and now - self._flushed < goldman.config.METRICS_FLUSH:
+            return
+
+        self._flushed = now
+
+        # the registry is created before a preforked server forks
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._started = int(now * 1000)
+
+        name = 'metrics_%s_%s.json' % (self._pid, self._started)
+
+        try:
+            fd, tmp = tempfile.mkstemp(dir=path, suffix='.tmp')
+            with os.fdopen(fd, 'w') as tmp_file:
+                json.dump(self.snapshot(), tmp_file)
+
+            os.rename(tmp, os.path.join(path, name))
+        except (IOError, OSError):
+            LOG.exception('the metrics snapshot could not be written to %s',
+                          path)
+
+    @staticmethod
+    def snapshot_files(path):
+        """ Return the snapshot files in the path & if they're live
+
+        A file is live if its process is running & it's the
+        newest file of that pid. Older files of the same pid
+        are of dead processes whose pid was recycled.
+
+        :return: list of (file name, bool) tuples
+        """
+
+        newest = {}
+        files = []
+
+        for name in glob.glob(os.path.join(path, 'metrics_*.json')):
+            match = SNAPSHOT.search(name)
+
+            if match:
+                pid, started = int(match.group(1)), int(match.group(2))
+                newest[pid] = max(newest.get(pid, 0), started)
+                files.append((name, pid, started))
+
+        return [(name, started == newest[pid] and _alive(pid))
+                for name, pid, started in files]
+
+    def collect(self):
+        """ Return the snapshot of every process merged together
+
+        Without a METRICS_DIR this is simply the snapshot of the
+        current process.
+
+        :return: dict keyed by metric name
+        """
+
+        path = goldman.config.METRICS_DIR
+
+        if not path:
+            return self.snapshot()
+
+        self.flush(force=True)
+        merged = {}
+
+        for name, live in self.snapshot_files(path):
+            try:
+                with open(name) as snap_file:
+                    snap = json.load(snap_file)
+            except (IOError, ValueError):
+                continue
+
+            for key, state in snap.items():
+                if state['type'] == 'gauge' and not live:
+                    continue
+                elif key not in merged:
+                    merged[key] = state
+                else:
+                    _sum_into(merged[key]['values'], state['values'])
+
+        return merged
+
+    def to_text(self):
+        """ Render the collected metrics in the Prometheus text format
+
+        :return: str
+        """
+
+        lines = []
+        snaps = self.collect()
+
+        for metric in self.metrics:
+            state = snaps.get(metric.name)
+
+            if state is not None:
+                lines.extend(metric.to_text(state))
+
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class _Owner(object):
+    """ Token only referenced by the thread local of a shard
+
+    It's collected when the thread exits so a weak reference to
+    it tells if the thread owning the shard is gone.
+    """
+
+    __slots__ = ('__weakref__',)
+
+
+class Metric(object):
+    """ Base metric object
+
+    The label values of a sample are joined into a single
+    string key so the snapshots are JSON friendly.
+
+    :param name:
+        string metric name
+    :param doc:
+        string description of the metric
+    :param labels:
+        tuple of string label names
+    """
+
+    TYPE = ''
+
+    def __init__(self, name, doc, labels=()):
+
+        self.doc = doc
+        self.labels = labels
+        self.name = name
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._retired = {}
+        self._shards = []
+
+        REGISTRY.register(self)
+
+    @property
+    def _shard(self):
+        """ Return the calling threads shard creating it if needed """
+
+        try:
+            return self._local.shard
+        except AttributeError:
+            owner = self._local.owner = _Owner()
+            shard = self._local.shard = {}
+
+            with self._lock:
+                self._shards.append((weakref.ref(owner), shard))
+            return shard
+
+    def _collect_shards(self):
+        """ Return the shards after retiring those of exited threads
+
+        The shard of an exited thread is summed into the retired
+        shard & released.
+        """
+
+        with self._lock:
+            live = []
+
+            for owner, shard in self._shards:
+                if owner() is None:
+                    _sum_into(self._retired, shard)
+                else:
+                    live.append((owner, shard))
+
+            self._shards = live
+
+            return [dict(self._retired)] + [shard for _, shard in live]
+
+    @staticmethod
+    def _key(labels):
+        """ Return the snapshot key of the label values """
+
+        return '\x00'.join(str(label) for label in labels)
+
+    def _values(self):
+        """ Return the shards merged into a single dict """
+
+        values = {}
+
+        for shard in self._collect_shards():
+            _sum_into(values, dict(shard))
+
+        return values
+
+    def snapshot(self):
+        """ Return the state of the metric for the registry """
+
+        return {'type': self.TYPE, 'values': self._values()}
+
+    def _header(self):
+        """ Return the HELP & TYPE lines of the metric """
+
+        return [
+            '# HELP %s %s' % (self.name, self.doc),
+            '# TYPE %s %s' % (self.name, self.TYPE),
+        ]
+
+    def to_text(self, state):
+        """ Render the metric state as Prometheus text lines """
+
+        lines = self._header()
+
+        for key, val in sorted(state['values'].items()):
+            labels = _fmt_labels(self.labels, key.split('\x00'))
+            lines.append('%s%s %s' % (self.name, labels, _fmt_float(val)))
+
+        return lines
+
+
+class Counter(Metric):
+    """ Monotonically increasing counter """
+
+    TYPE = 'counter'
+
+    def inc(self, labels=(), amount=1):
+        """ Increment the counter of the label values
+
+        :param labels:
+            tuple of label values in the order of the label names
+        :param amount:
+            number to increment by
+        """
+
+        shard = self._shard
+        key = self._key(labels)
+
+        shard[key] = shard.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """ Gauge computed by a callback at collection time
+
+    The callback should return a dict where the keys are tuples
+    of label values & the values are numbers.
+    """
+
+    TYPE = 'gauge'
+
+    def __init__(self, *args, **kwargs):
+
+        self._func = None
+        super(Gauge, self).__init__(*args, **kwargs)
+
+    def set_function(self, func):
+        """ Set the callback computing the gauge values """
+
+        self._func = func
+
+    def _values(self):
+        """ Evaluate the callback instead of merging shards """
+
+        if not self._func:
+            return {}
+
+        return {self._key(k): v for k, v in self._func().items()}
+
+
+class Histogram(Metric):
+    """ Cumulative bucketed histogram
+
+    Each sample is a list of the non-cumulative bucket counts
+    followed by the sum & count of the observations. They're
+    made cumulative when rendered.
+    """
+
+    TYPE = 'histogram'
+
+    def __init__(self, name, doc, labels=(), buckets=BUCKETS):
+
+        self.buckets = buckets
+        super(Histogram, self).__init__(name, doc, labels)
+
+    def observe(self, val, labels=()):
+        """ Observe a value for the label values
+
+        :param val:
+            number observed
+        :param labels:
+            tuple of label values in the order of the label names
+        """
+
+        shard = self._shard
+        key = self._key(labels)
+
+        try:
+            sample = shard[key]
+        except KeyError:
+            sample = shard[key] = [0] * (len(self.buckets) + 2)
+
+        for idx, bound in enumerate(self.buckets):
+            if val <= bound:
+                sample[idx] += 1
+                break
+
+        sample[-2] += val
+        sample[-1] += 1
+
+    def to_text(self, state):
+        """ Render the bucket, sum, & count lines of each sample """
+
+        lines = self._header()
+
+        for key, sample in sorted(state['values'].items()):
+            vals = key.split('\x00')
+            cumulative = 0
+
+            for idx, bound in enumerate(self.buckets):
+                cumulative += sample[idx]
+                labels = _fmt_labels(self.labels, vals,
+                                     extra=('le', _fmt_float(bound)))
+                lines.append('%s_bucket%s %s' % (self.name, labels,
+                                                 cumulative))
+
+            labels = _fmt_labels(self.labels, vals)
+            lines.append('%s_sum%s %s' % (self.name, labels,
+                                          _fmt_float(sample[-2])))
+            lines.append('%s_count%s %s' % (self.name, labels, sample[-1]))
+
+        return lines
+
+
+"""
+Metrics of the HTTP requests handled by the API. The route
+is the URI template the resource was registered with.
+"""
+
+# pylint: disable=invalid-name
+request_latency = Histogram(
+    'goldman_request_duration_seconds',
+    'HTTP request latency by route & method.',
+    labels=('method', 'route'),
+)
+responses = Counter(
+    'goldman_responses_total',
+    'HTTP responses by route, method, & status code.',
+    labels=('method', 'route', 'status'),
+)
+response_bytes = Counter(
+    'goldman_serializer_bytes_total',
+    'Bytes of response bodies produced by each serializer.',
+    labels=('mimetype',),
+)
+rate_limited = Counter(
+    'goldman_rate_limited_total',
+    'Requests rejected by the rate limiter with a 429.',
+)
+deadlines_exceeded = Counter(
+    'goldman_deadlines_exceeded_total',
+    'Requests aborted with a 504 by route for exceeding their deadline.',
+    labels=('route',),
+)
+
+
+"""
+Metrics of the store & its caching
+"""
+
+store_ops = Counter(
+    'goldman_store_operations_total',
+    'Store operations by operation & resource type.',
+    labels=('op', 'rtype'),
+)
+db_pool = Gauge(
+    'goldman_db_pool_connections',
+    'Database connections by pool & idle or used state.',
+    labels=('pool', 'state'),
+)
+db_replica_lag = Gauge(
+    'goldman_db_replica_lag_seconds',
+    'Replication lag of each read replica as of its last check.',
+    labels=('pool',),
+)
+db_replica_up = Gauge(
+    'goldman_db_replica_up',
+    'Read replicas healthy & caught up enough to serve reads.',
+    labels=('pool',),
+)
+cache_lookups = Counter(
+    'goldman_cache_lookups_total',
+    'Store cache lookups by bucket & hit or miss.',
+    labels=('bucket', 'result'),
+)
@@ -7,27 +7,38 @@
         http://falcon.readthedocs.org/en/stable/api/middleware.html
 
     Things like auth, logging, analytics, etc can go here.
+
+    They're imported on first use, see utils.lazy.
 """
 
-from ..middleware.basicauth import Middleware as BasicAuthMiddleware
-from ..middleware.bearer_token import Middleware as BearerTokenMiddleware
-from ..middleware.deserializer import Middleware as DeserializerMiddleware
-from ..middleware.http_specs import Middleware as HttpSpecsMiddleware
-from ..middleware.model_qps import Middleware as ModelQpsMiddleware
-from ..middleware.rate_limit import Middleware as RateLimitMiddleware
-from ..middleware.security import Middleware as SecurityMiddleware
-from ..middleware.serializer import Middleware as SerializerMiddleware
-from ..middleware.threadlocal import Middleware as ThreadLocalMiddleware
+from goldman.utils.lazy import lazy_module
 
 
-MIDDLEWARES = [
-    BasicAuthMiddleware,
-    BearerTokenMiddleware,
-    DeserializerMiddleware,
-    HttpSpecsMiddleware,
-    ModelQpsMiddleware,
-    RateLimitMiddleware,
-    SecurityMiddleware,
-    SerializerMiddleware,
-    ThreadLocalMiddleware,
-]
+lazy_module(__name__, {
+    'BasicAuthMiddleware': ('.basicauth', 'Middleware'),
+    'BearerTokenMiddleware': ('.bearer_token', 'Middleware'),
+    'DeadlineMiddleware': ('.deadline', 'Middleware'),
+    'DeserializerMiddleware': ('.deserializer', 'Middleware'),
+    'HttpSpecsMiddleware': ('.http_specs', 'Middleware'),
+    'ModelQpsMiddleware': ('.model_qps', 'Middleware'),
+    'NPlusOneMiddleware': ('.nplusone', 'Middleware'),
+    'RateLimitMiddleware': ('.rate_limit', 'Middleware'),
+    'SecurityMiddleware': ('.security', 'Middleware'),
+    'SerializerMiddleware': ('.serializer', 'Middleware'),
+    'ThreadLocalMiddleware': ('.threadlocal', 'Middleware'),
+    'UnitOfWorkMiddleware': ('.unit_of_work', 'Middleware'),
+    'MIDDLEWARES': [
+        'BasicAuthMiddleware',
+        'BearerTokenMiddleware',
+        'DeadlineMiddleware',
+        'DeserializerMiddleware',
+        'HttpSpecsMiddleware',
+        'ModelQpsMiddleware',
+        'NPlusOneMiddleware',
+        'RateLimitMiddleware',
+        'SecurityMiddleware',
+        'SerializerMiddleware',
+        'ThreadLocalMiddleware',
+        'UnitOfWorkMiddleware',
+    ],
+})
@@ -0,0 +1,82 @@
+"""
+    middleware.deadline
+    ~~~~~~~~~~~~~~~~~~~
+
+    Request deadlines so a pathological request can't hold a
+    worker thread & a database connection for minutes.
+
+    The number of seconds a request may take is determined by:
+
+        TIMEOUT - attribute of the resource routed to if not
+                  None
+
+        goldman.config.REQUEST_TIMEOUT - otherwise
+
+    The client can shorten it, but never lengthen it, with the
+    goldman.config.REQUEST_TIMEOUT_HEADER header in seconds.
+
+    The resulting deadline is anchored on goldman.sess where
+    the stores honor it. The postgres store cancels any query
+    still running at the deadline. Either way the request is
+    aborted with a 504.
+
+    It should be listed after the ThreadLocalMiddleware.
+"""
+
+import goldman
+import time
+
+
+class Middleware(object):
+    """ Request deadline middleware """
+
+    @staticmethod
+    def _header_timeout(req):
+        """ Return the float seconds of the client header or None """
+
+        val = req.get_header(goldman.config.REQUEST_TIMEOUT_HEADER)
+
+        try:
+            val = float(val)
+        except (TypeError, ValueError):
+            return None
+
+        return val if val > 0 else None
+
+    # pylint: disable=unused-argument
+    def process_request(self, req, resp):
+        """ Process the request before routing it.
+
+        The start is remembered so time spent in any middleware
+        before routing counts against the deadline.
+        """
+
+        goldman.sess.deadline = None
+        goldman.sess.deadline_start = time.time()
+
+    def process_resource(self, req, resp, resource):
+        """ Process the request after routing.
+
+        The deadline is only known once the resource is.
+        """
+
+        timeout = getattr(resource, 'TIMEOUT', None)
+        header = self._header_timeout(req)
+
+        if timeout is None:
+            timeout = goldman.config.REQUEST_TIMEOUT
+
+        if header is not None and (timeout is None or header < timeout):
+            timeout = header
+
+        if timeout is not None:
+            goldman.sess.deadline = goldman.sess.deadline_start + timeout
+
+    def process_response(self, req, resp, resource):
+        """ Process the request after the responder.
+
+        The deadline is cleared so it doesn't linger on the
+        thread after the request.
+        """
+
+        goldman.sess.deadline = None
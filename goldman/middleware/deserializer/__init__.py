@@ -10,7 +10,6 @@
     logic, rules, & RFC compliance.
 """
 
-import goldman
 
 from goldman.exceptions import (
     EmptyRequestBody,
@@ -23,11 +22,12 @@ class Middleware(object):
     """ Deserializer middleware object """
 
     @staticmethod
-    def _get_deserializer(mimetype):
-        """ Return a deserializer based on the mimetype
+    def _get_deserializer(mimetype, resource):
+        """ Return a deserializer of the resource based on the mimetype
 
         If a deserializer can't be determined by the mimetype then
-        return None.
+        return None. Only the resource's are considered so the
+        other deserializers are never imported.
 
         :param mimetype:
             string mimetype
@@ -35,7 +35,7 @@ class Middleware(object):
             deserializer class object or None
         """
 
-        for deserializer in goldman.DESERIALIZERS:
+        for deserializer in resource.DESERIALIZERS:
             if mimetype == deserializer.MIMETYPE:
                 return deserializer
         return None
@@ -58,5 +58,6 @@ class Middleware(object):
             elif req.content_type not in allowed:
                 abort(ContentTypeUnsupported(allowed))
             else:
-                deserializer = self._get_deserializer(req.content_type)
+                deserializer = self._get_deserializer(req.content_type,
+                                                      resource)
                 req.deserializer = deserializer(req, resp)
@@ -35,6 +35,10 @@ from goldman.utils.error_helpers import abort
 class Middleware(object):
     """ Falcon HTTP 1.1 middleware """
 
+    def __init__(self):
+
+        self.max_length = goldman.config.MAX_URI_LENGTH
+
     # pylint: disable=unused-argument
     def process_request(self, req, resp):
         """ Process the request before routing it.
@@ -74,7 +78,7 @@ class Middleware(object):
               check it.
         """
 
-        max_length = goldman.config.MAX_URI_LENGTH
+        max_length = self.max_length
 
         if req.expect:
             abort(exceptions.ExpectationUnmet)
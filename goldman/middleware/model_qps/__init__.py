@@ -21,9 +21,13 @@
 
     Currently supported query params are:
 
-        fields, filter, include, page, & sort
+        aggregate, fields, filter, include, page, & sort
+
+    The aggregate query param is our own extension & not part
+    of the JSON API specification.
 """
 
+import goldman.queryparams.aggregate as aggregates
 import goldman.queryparams.fields as fields
 import goldman.queryparams.filter as filters
 import goldman.queryparams.include as includes
@@ -49,6 +53,7 @@ class Middleware(object):
         try:
             model = resource.model
 
+            req.aggregates = aggregates.init(req, model)
             req.fields = fields.init(req, model)
             req.filters = filters.init(req, model)
             req.includes = includes.init(req, model)
@@ -0,0 +1,173 @@
+"""
+    middleware.nplusone
+    ~~~~~~~~~~~~~~~~~~~
+
+    N+1 query detector.
+
+    Relationships are lazily loaded one model at a time which
+    makes it trivial to issue a query per model in a loop
+    without noticing. This middleware counts the fingerprint of
+    every query the store reports via the post_query signal
+    during a request. When the same fingerprint is seen more
+    than `threshold` times the responder, the relationship field
+    being loaded (if any), & a stack sample are reported.
+
+    The middleware supports a few modes of operation:
+
+        warn - log every detection to the `goldman.nplusone`
+               logger. Intended for development.
+
+        raise - raise an NPlusOneDetected exception at the
+                offending query. Intended for test suites.
+
+        sample - like warn but only a `sample_rate` fraction
+                 of requests are inspected. Intended for
+                 production canaries.
+
+    It should be listed after the ThreadLocalMiddleware but
+    before any auth middleware so their queries are counted.
+"""
+
+import goldman
+import goldman.signals as signals
+import logging
+import random
+import traceback
+
+
+LOG = logging.getLogger('goldman.nplusone')
+
+
+class NPlusOneDetected(Exception):
+    """ Raised in `raise` mode when an N+1 query is detected """
+
+    def __init__(self, report):
+
+        self.report = report
+
+        super(NPlusOneDetected, self).__init__(
+            '%(fingerprint)s repeated %(count)s times by %(responder)s '
+            'loading %(relationship)s' % report
+        )
+
+
+class Middleware(object):
+    """ N+1 query detection middleware """
+
+    MODES = ('raise', 'sample', 'warn')
+
+    def __init__(self, mode='warn', threshold=5, sample_rate=0.01):
+
+        if mode not in self.MODES:
+            raise ValueError('mode must be one of %s' % ', '.join(self.MODES))
+
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+
+        signals.post_query.connect(self._on_query)
+        signals.pre_load.connect(self._on_pre_load)
+        signals.post_load.connect(self._on_post_load)
+
+    # pylint: disable=unused-argument
+    @staticmethod
+    def _get_state():
+        """ Return the requests detection state if inspected """
+
+        return getattr(goldman.sess, 'nplusone', None)
+
+    def _on_pre_load(self, sender, rel):
+        """ Track the relationship being loaded """
+
+        state = self._get_state()
+
+        if state is not None:
+            state['rels'].append(rel)
+
+    def _on_post_load(self, sender, rel):
+        """ Stop tracking the relationship that finished loading """
+
+        state = self._get_state()
+
+        if state is not None and state['rels']:
+            state['rels'].pop()
+
+    def _on_query(self, sender, fingerprint):
+        """ Count the query fingerprint & report on the threshold """
+
+        state = self._get_state()
+
+        if state is None:
+            return
+
+        count = state['counts'].get(fingerprint, 0) + 1
+        state['counts'][fingerprint] = count
+
+        if count == self.threshold + 1:
+            self._report(state, fingerprint, count)
+
+    def _report(self, state, fingerprint, count):
+        """ Report the N+1 according to the mode """
+
+        try:
+            rel = state['rels'][-1]
+            relationship = '%s (%s.%s)' % (rel.name, rel.rtype, rel.field)
+        except IndexError:
+            relationship = None
+
+        report = {
+            'count': count,
+            'fingerprint': fingerprint,
+            'relationship': relationship,
+            'responder': state['responder'],
+            'stack': ''.join(traceback.format_stack(limit=15)[:-3]),
+        }
+
+        if self.mode == 'raise':
+            raise NPlusOneDetected(report)
+
+        LOG.warning('N+1 query detected: %s repeated %s+ times by %s '
+                    'loading %s\n%s', fingerprint, count, report['responder'],
+                    relationship, report['stack'])
+
+    def process_request(self, req, resp):
+        """ Process the request before routing it.
+
+        Initialize the detection state if the request is to
+        be inspected.
+        """
+
+        if self.mode == 'sample' and random.random() >= self.sample_rate:
+            goldman.sess.nplusone = None
+        else:
+            goldman.sess.nplusone = {
+                'counts': {},
+                'rels': [],
+                'responder': '%s %s' % (req.method, req.path),
+            }
+
+    def process_resource(self, req, resp, resource):
+        """ Process the request after routing.
+
+        Identify the responder more precisely now that the
+        resource is known.
+        """
+
+        state = self._get_state()
+
+        if state is not None and resource:
+            name = resource.__class__.__module__
+            rtype = getattr(resource, 'rtype', None)
+
+            if rtype:
+                name = '%s(%s)' % (name, rtype)
+            state['responder'] = '%s %s' % (req.method, name)
+
+    def process_response(self, req, resp, resource):
+        """ Post-processing of the response (after routing).
+
+        Drop the detection state so the thread doesn't keep
+        counting queries outside of a request.
+        """
+
+        goldman.sess.nplusone = None
@@ -23,6 +23,8 @@
 import goldman
 import goldman.exceptions as exceptions
 
+from goldman import metrics
+
 from cachetools import TTLCache
 from goldman.utils.error_helpers import abort
 
@@ -55,6 +57,7 @@ class Middleware(object):
         val = self.cache.get(key, 0)
 
         if val == self.count:
+            metrics.rate_limited.inc()
             abort(exceptions.TooManyRequests(headers=self._error_headers))
         else:
             self.cache[key] = val + 1
@@ -15,7 +15,38 @@ from goldman.utils.error_helpers import abort
 
 
 class Middleware(object):
-    """ Falcon security middleware """
+    """ Falcon security middleware
+
+    We attempt to follow many of the 'hardening reponse headers'
+    best practices. These include things like:
+
+        HPKP: HTTP Public Key Pinning
+        HSTS: HTTP Srict Transport Security
+        X-Content-Type-Options:
+            prevents mime-sniffing so user generated content
+            isn't auto determined as something it shouldn't be.
+        XSS Protection: built in reflective XSS protection
+
+    They're static so they're built once as response_headers,
+    which the API adds to every response at once. A resource
+    can override them, or any other header, per route with its
+    HEADERS.
+    """
+
+    def __init__(self):
+
+        config = goldman.config
+
+        self.tls_required = config.TLS_REQUIRED
+        self.response_headers = [
+            ('Strict-Transport-Security', config.HSTS_HEADER),
+            ('X-Content-Type-Options', 'nosniff'),
+            ('X-Xss-Protection', '1; mode=block'),
+        ]
+
+        if config.HPKP_HEADER:
+            self.response_headers.insert(0, ('Public-Key-Pins',
+                                             config.HPKP_HEADER))
 
     # pylint: disable=unused-argument
     def process_request(self, req, resp):
@@ -24,42 +55,16 @@ class Middleware(object):
         We always enforce the use of SSL.
         """
 
-        if goldman.config.TLS_REQUIRED and req.protocol != 'https':
+        if self.tls_required and req.protocol != 'https':
             abort(TLSRequired)
 
-    def process_response(self, req, resp, resource):
-        """ Post-processing of the response (after routing).
-
-        We attempt to follow many of the 'hardening reponse headers'
-        best practices. These include things like:
+    def process_resource(self, req, resp, resource):
+        """ Process the request after routing.
 
-            HPKP: HTTP Public Key Pinning
-            HSTS: HTTP Srict Transport Security
-            X-Content-Type-Options:
-                prevents mime-sniffing so user generated content
-                isn't auto determined as something it shouldn't be.
-            XSS Protection: built in reflective XSS protection
+        The HEADERS of the resource override the defaults.
         """
 
-        hpkp = goldman.config.HPKP
-
-        if hpkp:
-            resp.set_header(
-                'Public-Key-Pins',
-                '{}; includeSubdomains; max-age=31536000'.format(hpkp),
-            )
-
-        resp.set_header(
-            'Strict-Transport-Security',
-            'max-age=31536000; includeSubDomains',
-        )
-
-        resp.set_header(
-            'X-Content-Type-Options',
-            'nosniff',
-        )
+        headers = getattr(resource, 'HEADERS', None)
 
-        resp.set_header(
-            'X-Xss-Protection',
-            '1; mode=block',
-        )
+        if headers:
+            resp.override_headers(headers)
@@ -7,6 +7,9 @@
 
     Any attributes anchored on the goldman.sess attribute is
     unique & isolated to the thread handling the request.
+
+    The store is created once per thread & reset before every
+    request so its connection bindings are reused.
 """
 
 import goldman
@@ -15,11 +18,29 @@ import goldman
 class Middleware(object):
     """ Thread local storage middleware. """
 
+    def __init__(self):
+
+        self.store = goldman.config.STORE
+
     # pylint: disable=unused-argument
     def process_request(self, req, resp):
         """ Process the request before routing it. """
 
         goldman.sess.req = req
 
-        if goldman.config.STORE:
-            goldman.sess.store = goldman.config.STORE()
+        if self.store:
+            store = getattr(goldman.sess, 'store', None)
+
+            if store.__class__ is self.store:
+                store.reset()
+            else:
+                goldman.sess.store = self.store()
+
+    def process_resource(self, req, resp, resource):
+        """ Process the request after routing.
+
+        The resource is anchored for anything that needs to
+        know how the request was routed, like the metrics.
+        """
+
+        goldman.sess.resource = resource
@@ -0,0 +1,48 @@
+"""
+    middleware.unit_of_work
+    ~~~~~~~~~~~~~~~~~~~~~~~
+
+    Run every request as a single unit of work of the store.
+
+    Everything the responder, signal handlers, & any other
+    middleware write is committed at once by the API as soon as
+    the responder returns. Models queued with
+    goldman.sess.store.queue(), like the login_date of the
+    authenticated login, are flushed in bulk right before the
+    commit.
+
+    If the request fails for any reason the unit of work is
+    never committed & it's rolled back here instead.
+
+    It should be listed first in the MIDDLEWARE of the API so
+    the writes of the auth middlewares are part of the unit of
+    work too.
+"""
+
+import goldman
+
+
+class Middleware(object):
+    """ Unit of work middleware """
+
+    # pylint: disable=unused-argument
+    def process_request(self, req, resp):
+        """ Process the request before routing it. """
+
+        store = getattr(goldman.sess, 'store', None)
+
+        if store is not None:
+            store.begin()
+
+    def process_response(self, req, resp, resource):
+        """ Process the request after the responder.
+
+        A successful responder was committed already so a unit
+        of work still open means the request failed & it's
+        rolled back.
+        """
+
+        store = getattr(goldman.sess, 'store', None)
+
+        if store is not None and store.queued is not None:
+            store.rollback()
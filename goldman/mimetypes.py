@@ -11,3 +11,4 @@ FILEUPLOAD_MIMETYPE = 'multipart/form-data'
 FORMURL_MIMETYPE = 'application/x-www-form-urlencoded'
 JSON_MIMETYPE = 'application/json'
 JSONAPI_MIMETYPE = 'application/vnd.api+json'
+TEXT_MIMETYPE = 'text/plain'
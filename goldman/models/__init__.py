@@ -4,15 +4,20 @@
 
     Module containing all of our models that are typically
     accessed in a CRUD like manner.
+
+    They're imported on first use, see utils.lazy.
 """
 
-from ..models.base import Model as BaseModel
-from ..models.default_schema import Model as DefaultSchemaModel
-from ..models.login import Model as LoginModel
+from goldman.utils.lazy import lazy_module
 
 
-MODELS = [
-    BaseModel,
-    DefaultSchemaModel,
-    LoginModel,
-]
+lazy_module(__name__, {
+    'BaseModel': ('.base', 'Model'),
+    'DefaultSchemaModel': ('.default_schema', 'Model'),
+    'LoginModel': ('.login', 'Model'),
+    'MODELS': [
+        'BaseModel',
+        'DefaultSchemaModel',
+        'LoginModel',
+    ],
+})
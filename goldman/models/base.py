@@ -12,7 +12,8 @@
 """
 
 from goldman.exceptions import ValidationFailure
-from goldman.types import ResourceType, ToManyType, ToOneType
+from goldman.types import LatitudeType, LongitudeType, ResourceType, \
+    ToManyType, ToOneType
 from goldman.utils.decorators import classproperty
 from goldman.utils.error_helpers import abort
 from schematics.exceptions import ConversionError, ModelValidationError
@@ -62,6 +63,26 @@ class Model(_SchematicsModel):
 
         return fields.keys()
 
+    @classproperty
+    def geo_fields(cls):  # NOQA
+        """ Return a dict of geo names to (lat, lon) field names
+
+        This is done by pairing a LatitudeType & LongitudeType
+        field with the same `geo` name.
+        """
+
+        lats = cls.get_fields_by_class(LatitudeType)
+        lons = cls.get_fields_by_class(LongitudeType)
+        pairs = {}
+
+        for key, val in cls.get_fields_with_prop('geo'):
+            if key in lats:
+                pairs.setdefault(val, [None, None])[0] = key
+            elif key in lons:
+                pairs.setdefault(val, [None, None])[1] = key
+
+        return {key: tuple(val) for key, val in pairs.items() if all(val)}
+
     @classproperty
     def relationships(cls):  # NOQA
         """ Return a list of all the fields that are relationships """
@@ -80,6 +101,17 @@ class Model(_SchematicsModel):
 
         return cls.get_fields_by_class(ResourceType)[0]
 
+    @classproperty
+    def searchable(cls):  # NOQA
+        """ Return a list of all the fields that are searchable
+
+        This is done on fields with `searchable=True` for full
+        text search or `searchable='trigram'` for trigram search.
+        """
+
+        return [key for key, val in cls.get_fields_with_prop('searchable')
+                if val]
+
     @classproperty
     def to_lower(cls):  # NOQA
         """ Return a list of all the fields that should be lowercased
@@ -27,11 +27,12 @@ class Model(BaseModel):
 
     creator = ToOneType(
         from_rest=False,
+        reject_update=True,
         rtype='logins',
         skip_exists=True,
     )
 
-    created = DateTimeType(from_rest=False)
+    created = DateTimeType(from_rest=False, reject_update=True)
     updated = DateTimeType(from_rest=False)
 
     rid = IntType(
@@ -42,10 +43,11 @@ class Model(BaseModel):
 
 # pylint: disable=unused-argument
 def pre_create(sender, model):
-    """ Callback before creating any new model
+    """ Callback before creating or upserting any new model
 
     Identify the creator of the new model & set the
-    created timestamp to now.
+    created timestamp to now. Neither is changed when an
+    upsert updates an existing model instead.
     """
 
     model.created = dt.utcnow()
@@ -62,4 +64,5 @@ def pre_save(sender, model):
 
 
 signals.pre_create.connect(pre_create)
+signals.pre_upsert.connect(pre_create)
 signals.pre_save.connect(pre_save)
@@ -38,6 +38,7 @@ class Model(DefaultSchemaModel):
         lower=True,
         max_length=25,
         required=True,
+        unique=True,
     )
 
     # security fields
@@ -59,6 +60,7 @@ class Model(DefaultSchemaModel):
     token = StringType(
         from_rest=False,
         to_rest=False,
+        unique=True,
     )
 
     @classmethod
@@ -115,6 +117,9 @@ class Model(DefaultSchemaModel):
         The login_date update will be debounced so writes don't
         occur on every hit of the the API. If the login_date
         was modified within 15 minutes then don't update it.
+
+        The update is queued so within a unit of work it's
+        flushed along with the other writes of the request.
         """
 
         goldman.sess.login = self
@@ -131,7 +136,7 @@ class Model(DefaultSchemaModel):
 
         if self.dirty:
             store = goldman.sess.store
-            store.update(self)
+            store.queue(self)
 
     def validate_username(self, data, value):
         """ Ensure the username is unique
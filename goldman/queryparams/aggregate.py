@@ -0,0 +1,184 @@
+"""
+    queryparams.aggregate
+    ~~~~~~~~~~~~~~~~~~~~~
+
+    Count or aggregate the to-many relationships of the primary
+    resources without loading the related resources. This is
+    not part of the JSON API spec but the results are returned
+    in the relationship object's meta which is documented here:
+
+        jsonapi.org/format/#document-resource-object-relationships
+
+    Like a filter the field & the operator are separated by a
+    double underscore while a count has no field:
+
+        aggregate[trucks]=count,year__max,price__sum
+
+    The operators are those in goldman.config.AGGREGATES. Each
+    relationship is aggregated for every primary resource with
+    a single grouped query.
+"""
+
+import goldman
+import re
+
+from goldman.exceptions import InvalidQueryParams
+from goldman.utils.model_helpers import rtype_to_model
+from schematics.types import DecimalType, NumberType
+
+
+LINK = 'jsonapi.org/format/#document-resource-object-relationships'
+PARAM = 'aggregate'
+REGEX = re.compile(r'aggregate\[([A-Za-z0-9_]+)\]')
+
+
+class Aggregate(object):
+    """ Aggregate parameter object
+
+    :param oper:
+        string aggregate operator
+    :param field:
+        string field name of the related resource or None if
+        the operator is a count
+    """
+
+    def __init__(self, oper, field=None):
+
+        self.field = field
+        self.oper = oper
+
+    def __eq__(self, other):
+        """ Compare other Aggregate objects or strings
+
+        :param other:
+            Aggregate instance or string
+        :return:
+            bool
+        """
+
+        return str(self) == str(other)
+
+    def __repr__(self):
+
+        name = self.__class__.__name__
+        return '%s(\'%s\', \'%s\')' % (name, self.oper, self.field)
+
+    def __str__(self):
+
+        if self.field:
+            return '%s__%s' % (self.field, self.oper)
+        return self.oper
+
+
+def _parse_param(key):
+    """ Parse the query param looking for the relationship
+
+    :param key:
+        The query parameter to the left of the equal sign
+    :return:
+        string relationship field name or None
+    """
+
+    match = REGEX.match(key)
+
+    if match:
+        return match.groups()[0]
+
+
+def _parse_aggregate(rel, val):
+    """ Return an Aggregate object of a single expression """
+
+    field_and_oper = val.split('__')
+
+    if len(field_and_oper) == 1:
+        return Aggregate(field_and_oper[0])
+    elif len(field_and_oper) == 2:
+        return Aggregate(field_and_oper[1], field=field_and_oper[0])
+
+    raise InvalidQueryParams(**{
+        'detail': 'The aggregate query param of "%s" on the "%s" '
+                  'relationship is not supported. Multiple operators '
+                  'are not allowed in a single expression.' % (val, rel),
+        'links': LINK,
+        'parameter': PARAM,
+    })
+
+
+def _validate_rel(rel, model):
+    """ Ensure the relationship is a to_many of the model """
+
+    if rel not in model.to_many:
+        raise InvalidQueryParams(**{
+            'detail': 'The aggregate query param of the "%s" field is '
+                      'not possible. It does not represent a to-many '
+                      'relationship on the primary resource.' % rel,
+            'links': LINK,
+            'parameter': PARAM,
+        })
+
+
+def _validate_aggregate(rel, agg, model):
+    """ Ensure the operator & field are supported by the model
+
+    A count takes no field while the rest require an attribute
+    of the related resource. A sum also requires a number.
+    """
+
+    if agg.oper not in goldman.config.AGGREGATES:
+        detail = 'The aggregate operator of "%s" is not supported. ' \
+                 'The supported operators are: %s.' % \
+                 (agg.oper, ', '.join(sorted(goldman.config.AGGREGATES)))
+    elif agg.oper == 'count' and agg.field:
+        detail = 'The count aggregate does not take a field. Use ' \
+                 'aggregate[%s]=count instead.' % rel
+    elif agg.oper == 'count':
+        return
+    elif not agg.field:
+        detail = 'The %s aggregate requires a field like ' \
+                 'aggregate[%s]=<field>__%s.' % (agg.oper, rel, agg.oper)
+    else:
+        rel_model = rtype_to_model(getattr(model, '_fields')[rel].rtype)
+        field = getattr(rel_model, '_fields').get(agg.field)
+
+        if field is None or agg.field in rel_model.relationships:
+            detail = 'The "%s" field is not an attribute of the "%s" ' \
+                     'relationship that can be aggregated.' % \
+                     (agg.field, rel)
+        elif agg.oper == 'sum' and \
+                not isinstance(field, (DecimalType, NumberType)):
+            detail = 'The sum aggregate of the "%s" field is not ' \
+                     'possible since it\'s not a number.' % agg.field
+        else:
+            return
+
+    raise InvalidQueryParams(**{
+        'detail': detail,
+        'links': LINK,
+        'parameter': PARAM,
+    })
+
+
+def init(req, model):
+    """ Return a dict of to_many fields to lists of Aggregates """
+
+    aggregates = {}
+
+    for key, val in req.params.items():
+        rel = _parse_param(key)
+
+        if not rel:
+            continue
+
+        _validate_rel(rel, model)
+
+        vals = val if isinstance(val, list) else val.split(',')
+        aggregates[rel] = []
+
+        for expr in vals:
+            agg = _parse_aggregate(rel, expr)
+            _validate_aggregate(rel, agg, model)
+
+            if agg not in aggregates[rel]:
+                aggregates[rel].append(agg)
+
+    return aggregates
@@ -19,6 +19,7 @@ from goldman.utils.model_helpers import rtype_to_model
 
 LINK = 'jsonapi.org/format/#fetching-sparse-fieldsets'
 PARAM = 'fields'
+REGEX = re.compile(r'fields\[([A-Za-z]+)\]')
 
 
 def _parse_param(key, val):
@@ -37,8 +38,7 @@ def _parse_param(key, val):
         fields on & a array of the fields.
     """
 
-    regex = re.compile(r'fields\[([A-Za-z]+)\]')
-    match = regex.match(key)
+    match = REGEX.match(key)
 
     if match:
         if not isinstance(val, list):
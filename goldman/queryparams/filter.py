@@ -10,8 +10,20 @@
         filter[name]=John
         filter[price__gt]=199
         filter[boss__exists]=true
-        filter[loc__geo_near]=40,90,1
+        filter[loc__near]=40,90,1000
+        filter[bio__search]=fast trucks
 
+    The `search` operator is only allowed on fields declared
+    with `searchable=True` or `searchable='trigram'`. See the
+    store for how each is evaluated.
+
+    The geo operators filter on the `geo` name pairing a
+    LatitudeType & LongitudeType field instead of a field:
+
+        near - lat, lon, & radius in meters
+        within - bounding box of the south west & north east
+                 lat, lon corners or a polygon of 3 or more
+                 lat, lon points
 
     The query parameter itself follows the JSON API convention
     for filtering:
@@ -24,11 +36,18 @@ import goldman
 import re
 
 from goldman.exceptions import InvalidQueryParams
+from goldman.utils.model_helpers import rtype_to_model
 from goldman.utils.str_helpers import str_to_bool, str_to_dt
 
 
 LINK = 'jsonapi.org/format/#fetching-filtering'
 PARAM = 'filter'
+REGEX = re.compile(r'filter\[([A-Za-z0-9_./]+)\]')
+
+# bounded cache of (model, query param key) to parsed keys
+KEY_CACHE_SIZE = 1000
+
+_KEYS = {}
 
 
 class Filter(object):
@@ -113,7 +132,7 @@ class FilterRel(Filter):
     generate queries.
 
     An example filter query of:
-        filter[creator.username]=john
+        filter[creator/username]=john
 
     would have the following `FilterRel` attribute values:
 
@@ -124,18 +143,33 @@ class FilterRel(Filter):
 
     foreign_field & foreign_rtype typically represent the
     same named properties on our goldman relationship types.
+
+    Nested relationships like `filter[owner/creator/username]`
+    have a hop per additional relationship in `hops`. Each hop
+    is a tuple of (local_field, foreign_rtype, foreign_field)
+    relative to the previous hop. The `path` property returns
+    all of the hops including the first one.
     """
 
     def __init__(self, foreign_field, foreign_filter, foreign_rtype,
-                 local_field, *args, **kwargs):
+                 local_field, field, oper, val, hops=()):
 
-        super(FilterRel, self).__init__(*args, **kwargs)
+        super(FilterRel, self).__init__(field, oper, val)
 
         self.foreign_filter = foreign_filter
         self.foreign_field = foreign_field
         self.foreign_rtype = foreign_rtype
+        self.hops = tuple(hops)
         self.local_field = local_field
 
+    @property
+    def path(self):
+        """ Return a tuple of every relationship hop in order """
+
+        first = (self.local_field, self.foreign_rtype, self.foreign_field)
+
+        return (first,) + self.hops
+
 
 def _parse_param(key):
     """ Parse the query param looking for filters
@@ -149,8 +183,7 @@ def _parse_param(key):
         tuple of string field name & string operator
     """
 
-    regex = re.compile(r'filter\[([A-Za-z0-9_./]+)\]')
-    match = regex.match(key)
+    match = REGEX.match(key)
 
     if match:
         field_and_oper = match.groups()[0].split('__')
@@ -182,58 +215,112 @@ def _validate_field(param, fields):
         })
 
 
-def _validate_rel(param, rels):
-    """ Validate relationship based filters
+def _validate_search(param, field, model):
+    """ Ensure the search operator is only used on searchable fields """
 
-    We don't support nested filters currently.
-
-    FIX: Ensure the relationship filter field exists on the
-         relationships model!
-    """
-
-    if param.field.count('/') > 1:
+    if param.oper == 'search' and field not in model.searchable:
         raise InvalidQueryParams(**{
-            'detail': 'The filter query param of "%s" is attempting to '
-                      'filter on a nested relationship which is not '
-                      'currently supported.' % param,
+            'detail': 'The filter query param of "%s" is not possible. The '
+                      '"%s" field of the "%s" resource is not searchable. '
+                      'Please modify your request & retry.' % (
+                          param, field, model.RTYPE),
             'links': LINK,
             'parameter': PARAM,
         })
-    elif '/' in param.field:
-        model_field = param.field.split('/')[0]
 
-        if model_field not in rels:
+
+def _parse_rel(param, model):
+    """ Walk & validate the relationship path of a filter
+
+    Every name in the path but the last must be a relationship
+    field on the model the previous relationship points to. The
+    last name must be a field on the final model.
+
+    :return: tuple of FilterRel args excluding the filter itself
+    """
+
+    names = param.field.split('/')
+    hops = []
+
+    for name in names[:-1]:
+        if name not in model.relationships:
             raise InvalidQueryParams(**{
                 'detail': 'The filter query param of "%s" is attempting to '
                           'filter on a relationship but the "%s" field is '
-                          'NOT a relationship field.' % (param, model_field),
+                          'NOT a relationship field.' % (param, name),
                 'links': LINK,
                 'parameter': PARAM,
             })
 
+        field_type = getattr(model, name)
+        local_field = getattr(field_type, 'local_field', name)
+
+        hops.append((local_field, field_type.rtype, field_type.field))
+        model = rtype_to_model(field_type.rtype)
+
+    if param.oper in goldman.config.GEO_FILTERS:
+        fields = model.geo_fields
+    else:
+        fields = model.all_fields
+
+    if names[-1] not in fields:
+        raise InvalidQueryParams(**{
+            'detail': 'The filter query param of "%s" is not possible. The '
+                      '"%s" resource does not have a "%s" field. Please '
+                      'modify your request & retry.' % (param, model.RTYPE,
+                                                        names[-1]),
+            'links': LINK,
+            'parameter': PARAM,
+        })
+
+    _validate_search(param, names[-1], model)
+
+    local_field, foreign_rtype, foreign_field = hops[0]
+
+    return foreign_field, names[-1], foreign_rtype, local_field, hops[1:]
+
+
+def _validate_geo(param):
+    """ Ensure the geo filter has the right number of floats """
+
+    count = len(param.val)
+
+    if param.oper == 'near' and count == 3 and param.val[2] >= 0:
+        return None
+    elif param.oper == 'within' and (count == 4 or
+                                     count >= 6 and not count % 2):
+        return None
+
+    return 'The query filter {} requires a lat, lon, & radius in ' \
+           'meters for near or a bounding box or polygon of lat, ' \
+           'lon points for within. Please modify your request & ' \
+           'retry'.format(param)
+
 
 def _validate_param(param):  # pylint: disable=too-many-branches
     """ Ensure the filter cast properly according to the operator """
 
+    config = goldman.config
     detail = None
 
-    if param.oper not in goldman.config.QUERY_FILTERS:
+    if param.oper not in config.QUERY_FILTERS:
         detail = 'The query filter {} is not a supported ' \
                  'operator. Please change {} & retry your ' \
                  'request'.format(param.oper, param)
 
-    elif param.oper in goldman.config.GEO_FILTERS:
+    elif param.oper in config.GEO_FILTERS:
         try:
             if not isinstance(param.val, list) or len(param.val) <= 2:
                 raise ValueError
             else:
                 param.val = [float(i) for i in param.val]
+                detail = _validate_geo(param)
         except ValueError:
             detail = 'The query filter {} requires a list ' \
                      'of floats for geo evaluation. Please ' \
                      'modify your request & retry'.format(param)
 
-    elif param.oper in goldman.config.ENUM_FILTERS:
+    elif param.oper in config.ENUM_FILTERS:
         if not isinstance(param.val, list):
             param.val = [param.val]
 
@@ -244,7 +331,7 @@ def _validate_param(param):  # pylint: disable=too-many-branches
                  'than once or have multiple values. Please modify ' \
                  'your request & retry'.format(param)
 
-    elif param.oper in goldman.config.BOOL_FILTERS:
+    elif param.oper in config.BOOL_FILTERS:
         try:
             param.val = str_to_bool(param.val)
         except ValueError:
@@ -252,7 +339,7 @@ def _validate_param(param):  # pylint: disable=too-many-branches
                      'for evaluation. Please modify your ' \
                      'request & retry'.format(param)
 
-    elif param.oper in goldman.config.DATE_FILTERS:
+    elif param.oper in config.DATE_FILTERS:
         try:
             param.val = str_to_dt(param.val)
         except ValueError:
@@ -260,7 +347,7 @@ def _validate_param(param):  # pylint: disable=too-many-branches
                      'epoch or ISO 8601 timestamp. Please ' \
                      'modify your request & retry'.format(param)
 
-    elif param.oper in goldman.config.NUM_FILTERS:
+    elif param.oper in config.NUM_FILTERS:
         try:
             param.val = int(param.val)
         except ValueError:
@@ -276,46 +363,71 @@ def _validate_param(param):  # pylint: disable=too-many-branches
         })
 
 
+def _parse_key(key, val, model):
+    """ Parse & validate the filter query param key of a model
+
+    Everything that only depends on the key, like the field,
+    operator, & relationship, is determined & validated once
+    per model & cached. The value is vetted per request & is
+    only used here for any error messages.
+
+    :return:
+        tuple of the string field, the string operator, & a
+        tuple of FilterRel args or None. If the key isn't a
+        filter query param then None.
+    """
+
+    try:
+        return _KEYS[(model, key)]
+    except KeyError:
+        pass
+
+    try:
+        field, oper = _parse_param(key)
+    except (TypeError, ValueError):
+        return None
+
+    param = Filter(field, oper, val)
+
+    if '/' in field:
+        rel = _parse_rel(param, model)
+    else:
+        rel = None
+
+        if oper in goldman.config.GEO_FILTERS:
+            _validate_field(param, model.geo_fields)
+        else:
+            _validate_field(param, model.all_fields)
+
+        _validate_search(param, field, model)
+
+    if len(_KEYS) >= KEY_CACHE_SIZE:
+        _KEYS.clear()
+    _KEYS[(model, key)] = ret = (field, oper, rel)
+
+    return ret
+
+
 def init(req, model):
     """ Return an array of Filter objects. """
 
-    fields = model.all_fields
-    rels = model.relationships
     params = []
 
     for key, val in req.params.items():
-        try:
-            field, oper = _parse_param(key)
-        except (TypeError, ValueError):
-            continue
-
-        try:
-            local_field, foreign_filter = field.split('/')
-            field_type = getattr(model, local_field)
+        parsed = _parse_key(key, val, model)
 
-            foreign_field = field_type.field
-            foreign_rtype = field_type.rtype
+        if not parsed:
+            continue
 
-            if hasattr(field_type, 'local_field'):
-                local_field = field_type.local_field
+        field, oper, rel = parsed
 
-            param = FilterRel(foreign_field, foreign_filter, foreign_rtype,
-                              local_field, field, oper, val)
-        except AttributeError:
-            raise InvalidQueryParams(**{
-                'detail': 'The filter query param "%s" specified a filter '
-                          'containing a "." indicating a relationship filter '
-                          'but a relationship by that name does not exist '
-                          'on the requested resource.' % key,
-                'links': LINK,
-                'parameter': PARAM,
-            })
-        except ValueError:
+        if rel:
+            param = FilterRel(*rel[:4], field=field, oper=oper, val=val,
+                              hops=rel[4])
+        else:
             param = Filter(field, oper, val)
 
         _validate_param(param)
-        _validate_rel(param, rels)
-        _validate_field(param, fields)
         params.append(param)
 
     return params
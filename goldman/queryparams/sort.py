@@ -8,6 +8,17 @@
     for sorting fields:
 
         jsonapi.org/format/#fetching-sorting
+
+    Resources with searchable fields can also be sorted by the
+    relevance of any `search` filters with the goldman.config
+    RANK_SORT pseudo field, most relevant first like:
+
+        sort=-_rank
+
+    Resources with geo fields can be sorted by the meters from
+    the point of a `near` filter, closest first like:
+
+        sort=_distance
 """
 
 import goldman
@@ -84,6 +95,32 @@ def _validate_field(param, fields):
         })
 
 
+def _validate_rank(param, searchable):
+    """ Ensure the rank pseudo field is only used if searchable """
+
+    if not searchable:
+        raise InvalidQueryParams(**{
+            'detail': 'The sort query param value of "%s" is not '
+                      'supported. The resource being requested has '
+                      'no searchable fields.' % param.raw_field,
+            'links': LINK,
+            'parameter': PARAM,
+        })
+
+
+def _validate_distance(param, geo_fields):
+    """ Ensure the distance pseudo field is only used if geo """
+
+    if not geo_fields:
+        raise InvalidQueryParams(**{
+            'detail': 'The sort query param value of "%s" is not '
+                      'supported. The resource being requested has '
+                      'no geo fields.' % param.raw_field,
+            'links': LINK,
+            'parameter': PARAM,
+        })
+
+
 def _validate_no_rels(param, rels):
     """ Ensure the sortable field is not on a relationship """
 
@@ -110,6 +147,13 @@ def init(req, model):
     params = [Sortable(param.lower()) for param in params]
 
     for param in params:
+        if param.field == goldman.config.RANK_SORT:
+            _validate_rank(param, model.searchable)
+            continue
+        elif param.field == goldman.config.DISTANCE_SORT:
+            _validate_distance(param, model.geo_fields)
+            continue
+
         _validate_no_rels(param, rels)
         _validate_field(param, fields)
 
@@ -24,6 +24,7 @@
 
 from falcon.request import Request as FalconRequest
 from goldman.utils.str_helpers import naked
+from goldman.utils.timing_helpers import phase
 
 
 class Request(FalconRequest):
@@ -87,6 +88,12 @@ class Request(FalconRequest):
 
         return self.method == 'POST'
 
+    @property
+    def is_putting(self):
+        """ Return True if the request method is PUT """
+
+        return self.method == 'PUT'
+
     def _init_content_type(self):
         """ Return the Content-Type request header excluding params
 
@@ -137,7 +144,8 @@ class Request(FalconRequest):
         deserializer.
         """
 
-        return self.deserializer.deserialize(*args, **kwargs)
+        with phase('deserialize'):
+            return self.deserializer.deserialize(*args, **kwargs)
 
     def get_body(self):
         """ Read in the request stream & return it as is
@@ -6,25 +6,36 @@
 
     Resources are responsible for registering responders & tend
     to follow the same general workflows for our Mongo documents.
+
+    They're imported on first use, see utils.lazy.
 """
 
-from ..resources.base import Resource as BaseResource
-from ..resources.json_7159 import Resource as JSONResource
-from ..resources.model import Resource as ModelResource
-from ..resources.models import Resource as ModelsResource
-from ..resources.oauth_ropc import Resource as OAuthROPCResource
-from ..resources.related import Resource as RelatedResource
-from ..resources.s3_model import Resource as S3ModelResource
-from ..resources.s3_model_image import Resource as S3ModelImageResource
+from goldman.utils.lazy import lazy_module
 
 
-RESOURCES = [
-    BaseResource,
-    JSONResource,
-    ModelResource,
-    ModelsResource,
-    OAuthROPCResource,
-    RelatedResource,
-    S3ModelResource,
-    S3ModelImageResource,
-]
+lazy_module(__name__, {
+    'BaseResource': ('.base', 'Resource'),
+    'JSONResource': ('.json_7159', 'Resource'),
+    'MetricsResource': ('.prometheus', 'Resource'),
+    'ModelResource': ('.model', 'Resource'),
+    'ModelsResource': ('.models', 'Resource'),
+    'OAuthROPCResource': ('.oauth_ropc', 'Resource'),
+    'QueryStatsResource': ('.query_stats', 'Resource'),
+    'RelatedResource': ('.related', 'Resource'),
+    'S3ModelResource': ('.s3_model', 'Resource'),
+    'S3ModelImageResource': ('.s3_model_image', 'Resource'),
+    'UploadStatusResource': ('.upload_status', 'Resource'),
+    'RESOURCES': [
+        'BaseResource',
+        'JSONResource',
+        'MetricsResource',
+        'ModelResource',
+        'ModelsResource',
+        'OAuthROPCResource',
+        'QueryStatsResource',
+        'RelatedResource',
+        'S3ModelResource',
+        'S3ModelImageResource',
+        'UploadStatusResource',
+    ],
+})
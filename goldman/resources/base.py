@@ -13,15 +13,33 @@ import types
 
 
 class Resource(object):
-    """ Base resource class """
+    """ Base resource class
+
+    The TIMEOUT is the number of seconds requests to the
+    resource are allowed to take when the DeadlineMiddleware is
+    used. It overrides goldman.config.REQUEST_TIMEOUT.
+
+    The HEADERS are set on every response of the resource,
+    overriding the API's default headers. A None value removes
+    a default header.
+
+    The `rondrs` responders are attached unless listed by name
+    in `disable` while the `opt_rondrs` responders are only
+    attached if listed by name in `enable`.
+    """
 
     DESERIALIZERS = []
+    HEADERS = {}
     SERIALIZERS = []
+    TIMEOUT = None
 
-    def __init__(self, disable=None):
+    def __init__(self, disable=None, enable=None):
 
         disable = disable or []
+        enable = enable or []
         rondrs = getattr(self, 'rondrs', [])
+        rondrs = rondrs + [rondr for rondr in getattr(self, 'opt_rondrs', [])
+                           if rondr.func_name in enable]
 
         for rondr in rondrs:
             func = types.MethodType(rondr, self)
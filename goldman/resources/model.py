@@ -13,10 +13,12 @@ import goldman
 import goldman.signals as signals
 
 from ..resources.base import Resource as BaseResource
+from goldman.utils.error_helpers import mod_fail
 from goldman.utils.responder_helpers import (
     find,
     from_rest,
     to_rest_model,
+    validate_rid,
 )
 
 
@@ -75,6 +77,59 @@ def on_patch(resc, req, resp, rid):
     signals.post_req_update.send(resc.model)
 
 
+def on_put(resc, req, resp, rid):
+    """ Deserialize the payload & create or update the single item
+
+    The item is created with the resource id of the URL if it
+    doesn't exist yet or updated otherwise in a single round
+    trip to the store. A 201 is returned if it was created.
+
+    The existing item is never read so the payload must be
+    valid on its own like a POST. Otherwise, like a PATCH,
+    optional fields missing from the payload are left as they
+    are & fields with `reject_update=True` can't be changed.
+
+    This responder is opt-in since the resource ids are usually
+    generated by the store. Enable it with `enable=['on_put']`.
+
+    The postgres store moves the sequence of a `serial` resource
+    id past an id created this way so later POSTs don't collide
+    with it. Any other kind of generated id, like a default
+    computed by the table, must not overlap the ids clients PUT.
+    """
+
+    signals.pre_req.send(resc.model)
+    signals.pre_req_upsert.send(resc.model)
+
+    validate_rid(resc.model, rid)
+
+    props = req.deserialize()
+    model = resc.model()
+
+    from_rest(model, props)
+    model.merge({model.rid_field: rid})
+
+    reject = model.get_fields_by_prop('reject_update', True)
+    unchanged = [field for field in reject if field in props]
+    created = goldman.sess.store.upsert(model, [model.rid_field],
+                                        unchanged=unchanged)
+
+    if created is None:
+        mod_fail('These fields cannot be updated: %s' % ', '.join(unchanged))
+
+    props = to_rest_model(model, includes=req.includes)
+    resp.last_modified = model.updated
+
+    if created:
+        resp.location = req.path
+        resp.status = falcon.HTTP_201
+
+    resp.serialize(props)
+
+    signals.post_req.send(resc.model)
+    signals.post_req_upsert.send(resc.model)
+
+
 class Resource(BaseResource):
     """ Single item resource & responders """
 
@@ -87,10 +142,11 @@ class Resource(BaseResource):
         goldman.JsonApiSerializer,
     ]
 
-    def __init__(self, model, disable=None):
+    def __init__(self, model, disable=None, enable=None):
 
         self.model = model
+        self.opt_rondrs = [on_put]
         self.rondrs = [on_delete, on_get, on_patch]
         self.rtype = model.RTYPE
 
-        super(Resource, self).__init__(disable)
+        super(Resource, self).__init__(disable, enable)
@@ -10,11 +10,15 @@ import goldman
 import goldman.signals as signals
 
 from ..resources.base import Resource as BaseResource
+from goldman.serializers.jsonapi_error import Serializer as \
+    JsonApiErrorSerializer
+from goldman.utils.error_helpers import abort, item_errors
 from goldman.utils.responder_helpers import (
     from_rest,
     to_rest_model,
     to_rest_models,
 )
+from schematics.exceptions import ConversionError, ValidationError
 
 
 def on_get(resc, req, resp):
@@ -39,13 +43,89 @@ def on_get(resc, req, resp):
     signals.post_req_search.send(resc.model)
 
 
+def _prefetch_exists(model, props):
+    """ Check the ToOne relationships of all the items at once
+
+    The store caches the answers so validating each item's
+    relationships doesn't probe the store again. Items whose
+    relationship is missing or doesn't convert are skipped since
+    validating them reports it.
+    """
+
+    fields = getattr(model, '_fields')
+
+    for name in model.to_one:
+        field = fields[name]
+        rids = set()
+
+        if field.skip_exists:
+            continue
+
+        for item in props:
+            try:
+                rid = field.to_native(item[name]).rid
+            except (ConversionError, KeyError, TypeError, ValidationError,
+                    ValueError):
+                continue
+
+            if rid:
+                rids.add(rid)
+
+        if rids:
+            goldman.sess.store.exists_many(field.rtype, field.field, rids)
+
+
+def _create_many(resc, req, resp, props):
+    """ Create all the new items of a bulk payload or none of them
+
+    Every item is processed before aborting so the errors of
+    all the invalid items are returned at once. Their source
+    pointers identify the item in the `/data` array.
+    """
+
+    errors = []
+    models = []
+
+    _prefetch_exists(resc.model, props)
+
+    for idx, item in enumerate(props):
+        model = resc.model()
+
+        try:
+            from_rest(model, item)
+        except JsonApiErrorSerializer as exc:
+            errors += item_errors(exc, idx)
+
+        models.append(model)
+
+    if errors:
+        abort(errors)
+
+    goldman.sess.store.create_many(models)
+
+    props = to_rest_models(models, includes=req.includes)
+    resp.status = falcon.HTTP_201
+    resp.serialize(props)
+
+
 def on_post(resc, req, resp):
-    """ Deserialize the payload & create the new single item """
+    """ Deserialize the payload & create the new single item
+
+    A bulk payload of several items creates them all instead.
+    """
 
     signals.pre_req.send(resc.model)
     signals.pre_req_create.send(resc.model)
 
     props = req.deserialize()
+
+    if isinstance(props, list):
+        _create_many(resc, req, resp, props)
+
+        signals.post_req.send(resc.model)
+        signals.post_req_create.send(resc.model)
+        return
+
     model = resc.model()
 
     from_rest(model, props)
@@ -0,0 +1,40 @@
+"""
+    resources.prometheus
+    ~~~~~~~~~~~~~~~~~~~~
+
+    Metrics resource object with responders.
+
+    Exposes the goldman.metrics registry in the Prometheus text
+    exposition format. It is NOT auto-routed & should be
+    registered in the API's ROUTES where the scraper expects
+    it:
+
+        ROUTES = [
+            ('/metrics', goldman.MetricsResource()),
+        ]
+
+    The request metrics are only collected when
+    goldman.config.METRICS is enabled.
+"""
+
+import goldman
+
+from ..resources.base import Resource as BaseResource
+from goldman.metrics import REGISTRY
+
+
+class Resource(BaseResource):
+    """ Metrics resource & responders """
+
+    DESERIALIZERS = []
+
+    SERIALIZERS = [
+        goldman.TextSerializer,
+    ]
+
+    def on_get(self, req, resp):  # pylint: disable=unused-argument
+        """ Serialize the metrics of every process """
+
+        resp.disable_caching()
+        resp.content_type = goldman.TEXT_MIMETYPE + '; version=0.0.4'
+        resp.serialize(REGISTRY.to_text())
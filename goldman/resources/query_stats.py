@@ -0,0 +1,45 @@
+"""
+    resources.query_stats
+    ~~~~~~~~~~~~~~~~~~~~~
+
+    Query statistics admin resource object with responders.
+
+    Exposes the per-fingerprint query statistics collected by
+    the postgres store. It is NOT auto-routed & should be
+    registered in the API's ROUTES behind whatever auth the
+    app uses for admin endpoints:
+
+        ROUTES = [
+            ('/admin/queries', goldman.QueryStatsResource()),
+        ]
+
+    A DELETE resets the statistics collected so far.
+"""
+
+import falcon
+import goldman
+
+from ..resources.base import Resource as BaseResource
+from goldman.stores.postgres.stats import STATS
+
+
+class Resource(BaseResource):
+    """ Query statistics resource & responders """
+
+    DESERIALIZERS = []
+
+    SERIALIZERS = [
+        goldman.JsonSerializer,
+    ]
+
+    def on_delete(self, req, resp):  # pylint: disable=unused-argument
+        """ Reset the query statistics """
+
+        STATS.reset()
+        resp.status = falcon.HTTP_204
+
+    def on_get(self, req, resp):  # pylint: disable=unused-argument
+        """ Serialize the query statistics """
+
+        resp.disable_caching()
+        resp.serialize(STATS.to_dict())
@@ -5,19 +5,27 @@
     AWS S3 object wrangling resource
 
     Currently, a multipart/form-data file upload is expected
-    on POST.
+    on POST. It's streamed to S3 as it's read.
+
+    With background=True the upload is spooled to disk instead
+    & a 202 is returned right away. A worker thread sends it
+    to S3 later & its status is served by the
+    UploadStatusResource.
 """
 
 import falcon
 import goldman
+import goldman.extensions as extensions
 import goldman.signals as signals
+import Queue
 import time
 
 from ..resources.base import Resource as BaseResource
+from boto.exception import S3ResponseError
 from goldman.exceptions import ServiceUnavailable
 from goldman.utils.error_helpers import abort
 from goldman.utils.responder_helpers import find
-from goldman.utils.s3_helpers import s3_connect, s3_upload
+from goldman.utils.s3_helpers import UPLOADS, S3Upload, Spool, s3_connect
 
 
 class Resource(BaseResource):
@@ -44,6 +52,13 @@ class Resource(BaseResource):
         self.key = kwargs.get('key', goldman.config.S3_KEY)
         self.secret = kwargs.get('secret', goldman.config.S3_SECRET)
 
+        # upload limits & mode
+        self.background = kwargs.get('background', False)
+        self.max_size = kwargs.get('max_size',
+                                   goldman.config.MAX_UPLOAD_SIZE)
+        self.part_size = kwargs.get('part_size',
+                                    goldman.config.S3_PART_SIZE)
+
         if not self.bucket:
             raise NotImplementedError('an S3 bucket is required')
         super(Resource, self).__init__()
@@ -61,7 +76,7 @@ class Resource(BaseResource):
     def _gen_s3_path(self, model, props):
         """ Return the part of the S3 path based on inputs
 
-        The path will be passed to the s3_upload method &
+        The path will be passed to the S3Upload object &
         will ultimately be merged with the standard AWS S3
         URL.
 
@@ -81,38 +96,110 @@ class Resource(BaseResource):
         return '%s/%s/%s/%s.%s' % (model.rtype, model.rid_value,
                                    self._s3_rtype, now, props['file-ext'])
 
+    def _open_upload(self, model, part, conn):
+        """ Return the file object the uploaded part is sent to
+
+        It's an S3Upload or the Spool of one in the background
+        mode.
+        """
+
+        path = self._gen_s3_path(model, {
+            'content-type': part.type,
+            'file-ext': extensions.get(part.type),
+            'file-name': part.filename,
+        })
+
+        upload = S3Upload(self.acl, self.bucket, conn, part.type, path,
+                          part_size=self.part_size)
+
+        return Spool(upload) if self.background else upload
+
+    def _uploaded(self, model, upload):
+        """ Send the post_upload signal once the upload is in S3
+
+        In the background mode it's called by the worker thread
+        that sent the upload.
+        """
+
+        signals.post_upload.send(self.model, model=model, url=upload.url)
+
     def on_post(self, req, resp, rid):
-        """ Deserialize the file upload & save it to S3
+        """ Deserialize the file upload & stream it to S3
 
         File uploads are associated with a model of some
         kind. Ensure the associating model exists first &
-        foremost.
+        foremost so nothing is uploaded for a missing model.
+
+        The upload is sent to S3 in parts of part_size bytes
+        while the request payload is read so no more than a
+        part is held in memory. Uploads over max_size bytes
+        are aborted with a 413.
+
+        In the background mode the post_upload signal is sent
+        by the worker thread once the upload is done.
         """
 
         signals.pre_req.send(self.model)
         signals.pre_req_upload.send(self.model)
 
-        props = req.deserialize(self.mimetypes)
         model = find(self.model, rid)
 
         signals.pre_upload.send(self.model, model=model)
 
+        conn = s3_connect(self.key, self.secret)
+
+        def sink(part):
+            """ Return the file object of the uploaded part """
+
+            return self._open_upload(model, part, conn)
+
         try:
-            conn = s3_connect(self.key, self.secret)
-            path = self._gen_s3_path(model, props)
-            s3_url = s3_upload(self.acl, self.bucket, conn, props['content'],
-                               props['content-type'], path)
-        except IOError:
+            props = req.deserialize(self.mimetypes, sink=sink,
+                                    max_size=self.max_size)
+        except (IOError, S3ResponseError):
             abort(ServiceUnavailable(**{
                 'detail': 'The upload attempt failed unexpectedly',
             }))
+
+        if self.background:
+            self._submit(resp, model, props['content'])
         else:
-            signals.post_upload.send(self.model, model=model, url=s3_url)
+            s3_url = props['content'].url
+            self._uploaded(model, props['content'])
 
             resp.location = s3_url
             resp.status = falcon.HTTP_201
 
             resp.serialize({'data': {'url': s3_url}})
 
-            signals.post_req.send(self.model)
-            signals.post_req_upload.send(self.model)
+        signals.post_req.send(self.model)
+        signals.post_req_upload.send(self.model)
+
+    def _submit(self, resp, model, spool):
+        """ Queue the spooled upload & respond with its status
+
+        The Location is the url of the upload's status resource.
+        """
+
+        store = goldman.config.STORE
+
+        def uploaded(s3_url):  # pylint: disable=unused-argument
+            """ Run from the worker thread with a store of its own """
+
+            goldman.sess.store = store() if store else None
+            self._uploaded(model, spool)
+
+        try:
+            uid = UPLOADS.submit(spool, callback=uploaded)
+        except Queue.Full:
+            spool.abort()
+            abort(ServiceUnavailable(**{
+                'detail': 'Too many uploads are in progress. Please '
+                          'retry your request shortly.',
+            }))
+
+        resp.location = '%s%s/%s' % (goldman.config.BASE_URL,
+                                     goldman.config.UPLOAD_STATUS_URL, uid)
+        resp.status = falcon.HTTP_202
+
+        resp.serialize({'data': UPLOADS.status(uid)})
@@ -6,12 +6,67 @@
 
     Uses the base s3_model resource but defines the allowed
     mimetypes when uploading.
+
+    Resized & recompressed derivatives of each image are made
+    in the background once it's in S3 if any are configured.
+    Their urls are stored in the derivatives_field of the model,
+    if there is one, & sent with the post_derivatives signal.
 """
 
+import goldman
+import goldman.signals as signals
+import Queue
+
 from ..resources.s3_model import Resource as S3ModelResource
+from goldman.utils.image_helpers import Derivatives, Tee
+from goldman.utils.s3_helpers import LOG, UPLOADS
 
 
 class Resource(S3ModelResource):
     """ S3 model image resource & responders """
 
     MIMETYPES = ['image/gif', 'image/jpeg', 'image/jpg', 'image/png']
+
+    def __init__(self, model, **kwargs):
+
+        self.derivatives = kwargs.get('derivatives',
+                                      goldman.config.IMAGE_DERIVATIVES)
+        self.derivatives_field = kwargs.get('derivatives_field')
+
+        super(Resource, self).__init__(model, **kwargs)
+
+    def _open_upload(self, model, part, conn):
+        """ Keep a local copy of the image to make derivatives of """
+
+        upload = super(Resource, self)._open_upload(model, part, conn)
+
+        return Tee(upload) if self.derivatives else upload
+
+    def _uploaded(self, model, upload):
+        """ Queue the derivatives once the image is in S3 """
+
+        super(Resource, self)._uploaded(model, upload)
+
+        if not self.derivatives:
+            return
+
+        job = Derivatives(upload, self.derivatives)
+        store = goldman.config.STORE
+
+        def derived(urls):
+            """ Record the urls from the worker thread """
+
+            goldman.sess.store = store() if store else None
+
+            if self.derivatives_field:
+                setattr(model, self.derivatives_field, urls)
+                goldman.sess.store.update(model)
+
+            signals.post_derivatives.send(self.model, model=model,
+                                          urls=urls)
+
+        try:
+            UPLOADS.submit(job, callback=derived)
+        except Queue.Full:
+            LOG.warning('too many uploads to make derivatives: %s', job.url)
+            job.discard()
@@ -0,0 +1,51 @@
+"""
+    resources.upload_status
+    ~~~~~~~~~~~~~~~~~~~~~~~
+
+    Background upload status resource object with responders.
+
+    S3 resources with background=True respond with a 202 & the
+    Location of this resource. It is NOT auto-routed & should
+    be registered in the API's ROUTES at the
+    goldman.config.UPLOAD_STATUS_URL:
+
+        ROUTES = [
+            ('/uploads/{uid}', goldman.UploadStatusResource()),
+        ]
+
+    The status is kept in the memory of the process that took
+    the upload so preforked servers need sticky routing or the
+    client will get a 404 from the other processes.
+"""
+
+import goldman
+import goldman.exceptions as exceptions
+
+from ..resources.base import Resource as BaseResource
+from goldman.utils.error_helpers import abort
+from goldman.utils.s3_helpers import UPLOADS
+
+
+class Resource(BaseResource):
+    """ Upload status resource & responders """
+
+    DESERIALIZERS = []
+
+    SERIALIZERS = [
+        goldman.JsonSerializer,
+    ]
+
+    def on_get(self, req, resp, uid):  # pylint: disable=unused-argument
+        """ Serialize the status of the upload
+
+        The status is one of pending, done, or failed & the url
+        is where the object is or will be once done.
+        """
+
+        status = UPLOADS.status(uid)
+
+        if not status:
+            abort(exceptions.DocumentNotFound())
+
+        resp.disable_caching()
+        resp.serialize({'data': status})
@@ -7,41 +7,96 @@
 """
 
 from falcon.response import Response as FalconResponse
+from goldman import metrics
+from goldman.utils.timing_helpers import phase
+
+
+def merge_headers(headers, overrides):
+    """ Return a new dict of the headers with the overrides
+
+    The names are lowercased like falcon stores them & an
+    override with a None value removes the header.
+
+    :param headers:
+        dict or list of (name, value) tuples
+    :param overrides:
+        dict or list of (name, value) tuples
+    :return:
+        dict
+    """
+
+    if isinstance(overrides, dict):
+        overrides = overrides.items()
+
+    merged = dict((name.lower(), val) for name, val in dict(headers).items())
+
+    for name, val in overrides:
+        if val is None:
+            merged.pop(name.lower(), None)
+        else:
+            merged[name.lower()] = val
+
+    return merged
 
 
 class Response(FalconResponse):
-    """ Subclass the default falcon response object """
+    """ Subclass the default falcon response object
+
+    The DEFAULT_HEADERS are added to every response at once.
+    The API builds its response type with with_headers() so the
+    static headers of its middleware are part of them.
+
+    A summary of the rational behind adding the headers
+    by default on a case-by-case basis is detailed below.
+
+    Vary Header
+    ~~~~~~~~~~~
+
+    The `Vary` header will let caches know which request
+    headers should be considered when looking up a cached
+    document.
+
+    The `Vary` header should specify `Accept` since our
+    resources commonly support multiple representations
+    of the data (serializers). The representation is
+    determined by the Accept header.
+
+    The `Vary` header should specify `Prefer` according
+    to RFC 7240.
+    """
+
+    # lowercased like falcon stores them
+    DEFAULT_HEADERS = {'vary': 'Accept, Prefer'}
 
     def __init__(self, *args, **kwargs):
 
         super(Response, self).__init__(*args, **kwargs)
 
         self.serializer = None
-        self._init_default_headers()
+        self._headers.update(self.DEFAULT_HEADERS)
 
-    def _init_default_headers(self):
-        """ Initialize the response object with default headers
+    @classmethod
+    def with_headers(cls, headers):
+        """ Return a sub-class with the headers in DEFAULT_HEADERS
 
-        A summary of the rational behind adding the headers
-        by default on a case-by-case basis is detailed below.
-
-        Vary Header
-        ~~~~~~~~~~~
+        :param headers:
+            dict or list of (name, value) tuples merged with
+            merge_headers
+        :return:
+            Response sub-class
+        """
 
-        The `Vary` header will let caches know which request
-        headers should be considered when looking up a cached
-        document.
+        return type(cls.__name__, (cls,), {
+            'DEFAULT_HEADERS': merge_headers(cls.DEFAULT_HEADERS, headers),
+        })
 
-        The `Vary` header should specify `Accept` since our
-        resources commonly support multiple representations
-        of the data (serializers). The representation is
-        determined by the Accept header.
+    def override_headers(self, headers):
+        """ Set or remove (with a None value) several headers
 
-        The `Vary` header should specify `Prefer` according
-        to RFC 7240.
+        See merge_headers.
         """
 
-        self.set_header('Vary', 'Accept, Prefer')
+        self._headers = merge_headers(self._headers, headers)
 
     def disable_caching(self):
         """ Add some headers so the client won't cache the response
@@ -49,14 +104,25 @@ class Response(FalconResponse):
         No return code, side-effects instead.
         """
 
-        self.set_header('Cache-Control', 'no-store')
-        self.set_header('Pragma', 'no-cache')
+        self.set_headers([
+            ('Cache-Control', 'no-store'),
+            ('Pragma', 'no-cache'),
+        ])
 
     def serialize(self, *args, **kwargs):
         """ Simple proxy to the serializer's serialize function
 
         This allows code to later run response.serialize() & have it
         always call the serialize method on the proper serializer.
+
+        The size of the serialized body is counted per mimetype.
         """
 
-        return self.serializer.serialize(*args, **kwargs)
+        with phase('serialize'):
+            ret = self.serializer.serialize(*args, **kwargs)
+
+        metrics.response_bytes.inc(
+            (self.serializer.MIMETYPE,), len(self.body or ''),
+        )
+
+        return ret
@@ -3,17 +3,24 @@
     ~~~~~~~~~~~
 
     Location of different serializers supported by our API
+
+    They're imported on first use, see utils.lazy.
 """
 
-from ..serializers.base import Serializer as BaseSerializer
-from ..serializers.comma_sep import Serializer as CsvSerializer
-from ..serializers.json_7159 import Serializer as JsonSerializer
-from ..serializers.jsonapi import Serializer as JsonApiSerializer
+from goldman.utils.lazy import lazy_module
 
 
-SERIALIZERS = [
-    BaseSerializer,
-    CsvSerializer,
-    JsonSerializer,
-    JsonApiSerializer,
-]
+lazy_module(__name__, {
+    'BaseSerializer': ('.base', 'Serializer'),
+    'CsvSerializer': ('.comma_sep', 'Serializer'),
+    'JsonSerializer': ('.json_7159', 'Serializer'),
+    'JsonApiSerializer': ('.jsonapi', 'Serializer'),
+    'TextSerializer': ('.text', 'Serializer'),
+    'SERIALIZERS': [
+        'BaseSerializer',
+        'CsvSerializer',
+        'JsonSerializer',
+        'JsonApiSerializer',
+        'TextSerializer',
+    ],
+})
@@ -101,8 +101,11 @@ class Serializer(BaseSerializer):
             },
         }
 
+        metas = data.pop('to_many_meta', {})
+
         for key, val in data['to_many'].items():
-            rels.update(self._serialize_to_many(key, val, rlink))
+            rels.update(self._serialize_to_many(key, val, rlink,
+                                                meta=metas.get(key)))
         del data['to_many']
 
         for key, val in data['to_one'].items():
@@ -144,7 +147,7 @@ class Serializer(BaseSerializer):
                 links[key] = val
         return links
 
-    def _serialize_to_many(self, key, vals, rlink):
+    def _serialize_to_many(self, key, vals, rlink, meta=None):
         """ Make a to_many JSON API compliant
 
         :spec:
@@ -155,6 +158,8 @@ class Serializer(BaseSerializer):
             array of dict's containing `rid` & `rtype` keys for the
             to_many, empty array if no values, & None if the to_manys
             values are unknown
+        :param meta:
+            dict of the to_many's aggregates, if requested
         :return:
             dict as documented in the spec link
         """
@@ -177,6 +182,9 @@ class Serializer(BaseSerializer):
         except TypeError:
             del rel[key]['data']
 
+        if meta:
+            rel[key]['meta'] = meta
+
         return rel
 
     def _serialize_to_one(self, key, val, rlink):
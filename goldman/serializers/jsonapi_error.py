@@ -27,7 +27,8 @@ class Serializer(HTTPStatus):
     silently removed.
 
     :param errors:
-        APIException object or list of them
+        APIException object or list of them. Already converted
+        error dicts are accepted too.
     """
 
     ERROR_OBJECT_FIELDS = [
@@ -46,7 +47,8 @@ class Serializer(HTTPStatus):
         if not isinstance(errors, list):
             errors = [errors]
 
-        self.errors = [e().to_dict() for e in errors]
+        self.errors = [e if isinstance(e, dict) else e().to_dict()
+                       for e in errors]
         super(Serializer, self).__init__(
             self.get_status(),
             body=self.get_body(),
@@ -0,0 +1,22 @@
+"""
+    serializers.text
+    ~~~~~~~~~~~~~~~~
+
+    Serializer for plain text responses
+"""
+
+import goldman
+
+from ..serializers.base import Serializer as BaseSerializer
+
+
+class Serializer(BaseSerializer):
+    """ Plain text serializer """
+
+    MIMETYPE = goldman.TEXT_MIMETYPE
+
+    def serialize(self, data):
+        """ The data is expected to already be a string """
+
+        super(Serializer, self).serialize(data)
+        self.resp.body = data
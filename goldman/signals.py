@@ -32,6 +32,9 @@ post_req_search = blinker.signal('post_req_search')
 pre_req_update = blinker.signal('pre_req_update')
 post_req_update = blinker.signal('post_req_update')
 
+pre_req_upsert = blinker.signal('pre_req_upsert')
+post_req_upsert = blinker.signal('post_req_upsert')
+
 
 """
 Signals for our file upload resources before & after an
@@ -44,6 +47,8 @@ post_req_upload = blinker.signal('post_req_upload')
 pre_upload = blinker.signal('pre_upload')
 post_upload = blinker.signal('post_upload')
 
+post_derivatives = blinker.signal('post_derivatives')
+
 
 """
 Signals for our base goldman models invoked by the store
@@ -67,3 +72,17 @@ post_search = blinker.signal('post_search')
 
 pre_update = blinker.signal('pre_update')
 post_update = blinker.signal('post_update')
+
+pre_upsert = blinker.signal('pre_upsert')
+post_upsert = blinker.signal('post_upsert')
+
+
+"""
+Signals invoked by the stores after every query & by our
+relationship types around loading the related model(s).
+"""
+
+post_query = blinker.signal('post_query')
+
+pre_load = blinker.signal('pre_load')
+post_load = blinker.signal('post_load')
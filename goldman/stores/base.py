@@ -7,8 +7,18 @@
     This should be sub-classed by other backend specific
     stores. The base store is used as an identity map & caching
     interface.
+
+    A store is reused by every request of a thread & reset()
+    before each one. The identity map holds a single model per
+    resource type & id for the rest of the request so finding,
+    searching, or loading the relationship of the same resource
+    again returns the model already in memory.
 """
 
+from collections import OrderedDict
+from goldman import metrics
+from goldman.utils.model_helpers import rtype_to_model
+
 
 class Cache(object):
     """ A very simple dictionary cache
@@ -24,14 +34,19 @@ class Cache(object):
     def get(self, key, bucket):
         """ Get a cached item by key
 
-        If the cached item isn't found the return None.
+        If the cached item isn't found the return None. Every
+        lookup is counted as a hit or miss per bucket.
         """
 
         try:
-            return self._cache[bucket][key]
+            val = self._cache[bucket][key]
         except (KeyError, TypeError):
+            metrics.cache_lookups.inc((bucket, 'miss'))
             return None
 
+        metrics.cache_lookups.inc((bucket, 'hit'))
+        return val
+
     def set(self, key, val, bucket):
         """ Set a cached item by key
 
@@ -44,24 +59,289 @@ class Cache(object):
 
         self._cache[bucket][key] = val
 
+    def clear(self, bucket):
+        """ Forget every cached item of the bucket """
+
+        self._cache.pop(bucket, None)
+
 
 class Store(object):
-    """ Base resource class """
+    """ Base resource class
+
+    A store can run a unit of work: begin() starts it, queue()
+    collects dirty models instead of saving them right away, &
+    commit() flushes the queued models then commits everything
+    written since begin() at once. The queued list is None
+    outside of a unit of work.
+
+    The identity map is a dict of (rtype, rid) keys to models
+    where the rid is a string so one from a URL matches.
+    """
 
     def __init__(self):
 
+        self.reset()
+
+    def reset(self):
+        """ Reset the per-request state so the store can be reused
+
+        The cache & identity map are emptied & any unit of work
+        left over is discarded. Stores with more state per
+        request extend this.
+        """
+
         self.cache = Cache()
+        self.identity = {}
+        self.queued = None
+
+    def identity_get(self, rtype, rid):
+        """ Return the model in the identity map or None """
+
+        model = self.identity.get((rtype, unicode(rid)))
+        result = 'miss' if model is None else 'hit'
+
+        metrics.cache_lookups.inc(('identity', result))
+
+        return model
+
+    def identity_set(self, model):
+        """ Put the written model in the identity map
+
+        It replaces any other model of the same resource since
+        it has the latest values.
+        """
+
+        if model.rid_value is not None:
+            self.identity[(model.RTYPE, unicode(model.rid_value))] = model
+
+        self.cache.clear('exists')
+
+        return model
+
+    def identity_discard(self, model):
+        """ Remove the deleted model from the identity map """
+
+        self.identity.pop((model.RTYPE, unicode(model.rid_value)), None)
+        self.cache.clear('exists')
+
+    def hydrate(self, model, rows):
+        """ Return a model per row using the identity map
+
+        A resource already in the identity map is returned as is,
+        with any changes not saved yet, instead of a new model.
+
+        :param model:
+            model class
+        :param rows:
+            list of dicts
+        :return:
+            list of models
+        """
+
+        identity = self.identity
+        rid_field = model.rid_field
+        rtype = model.RTYPE
+        models = []
+
+        for row in rows:
+            key = (rtype, unicode(row[rid_field]))
+
+            try:
+                models.append(identity[key])
+            except KeyError:
+                identity[key] = found = model(row)
+                models.append(found)
+
+        return models
+
+    @staticmethod
+    def flush_order(models):
+        """ Group the models by resource type in dependency order
+
+        A resource type with a ToOne to another resource type
+        being flushed comes after it so the rows it references
+        are written first. Cycles fall back to the queue order.
+
+        :return: list of lists of models
+        """
+
+        groups = OrderedDict()
+
+        for model in models:
+            groups.setdefault(model.RTYPE, []).append(model)
+
+        deps = {}
+
+        for rtype, group in groups.items():
+            fields = getattr(group[0], '_fields')
+            deps[rtype] = set(fields[field].rtype
+                              for field in group[0].to_one)
+            deps[rtype] &= set(groups)
+            deps[rtype].discard(rtype)
+
+        done = set()
+        ordered = []
+
+        while groups:
+            ready = [rtype for rtype in groups if deps[rtype] <= done]
+
+            for rtype in ready or list(groups)[:1]:
+                done.add(rtype)
+                ordered.append(groups.pop(rtype))
+
+        return ordered
+
+    def begin(self):
+        """ Start a unit of work """
+
+        raise NotImplementedError
+
+    def commit(self):
+        """ Flush the queued models & commit the unit of work """
+
+        raise NotImplementedError
+
+    def rollback(self):
+        """ Discard the queued models & undo the unit of work
+
+        The identity map should be emptied too since its models
+        may have values that were undone.
+        """
+
+        raise NotImplementedError
+
+    def flush(self):
+        """ Save the queued models in dependency order now """
+
+        groups = self.flush_order(self.queued or [])
+
+        if self.queued is not None:
+            self.queued = []
+
+        for group in groups:
+            for model in group:
+                self.save(model)
+
+    def queue(self, model):
+        """ Queue a dirty model to be saved by the next flush
+
+        Outside of a unit of work the model is saved right away.
+        Queueing the same model more than once saves it once.
+        """
+
+        if self.queued is None:
+            self.save(model)
+        elif not any(queued is model for queued in self.queued):
+            self.queued.append(model)
+
+    def save(self, model):
+        """ Create the model if it has no resource id or update it """
+
+        if not model.dirty:
+            return model
+        elif model.rid_value is None:
+            return self.create(model)
+
+        return self.update(model)
 
     def create(self, model):
         """ Create a new model """
 
         raise NotImplementedError
 
+    def create_many(self, models):
+        """ Create all of the new models or none of them """
+
+        raise NotImplementedError
+
     def delete(self, model):
         """ Create an existing model """
 
         raise NotImplementedError
 
+    def exists(self, rtype, field, val):
+        """ Return True if a model with the field value exists
+
+        See exists_many.
+        """
+
+        return unicode(val) in self.exists_many(rtype, field, [val])
+
+    def exists_many(self, rtype, field, vals):
+        """ Return the values of the field that models exist with
+
+        This is much cheaper than a find since no model is
+        hydrated. The resource ids in the identity map are known
+        to exist & the rest are probed at once. The answers are
+        cached for the rest of the request until a write.
+
+        :param vals:
+            list of values
+        :return:
+            set of the existing values as strings
+        """
+
+        by_rid = field == rtype_to_model(rtype).rid_field
+        found = set()
+        probe = []
+
+        for val in vals:
+            val_str = unicode(val)
+
+            if by_rid and (rtype, val_str) in self.identity:
+                hit = True
+            else:
+                hit = self.cache.get((rtype, field, val_str), 'exists')
+
+            if hit:
+                found.add(val_str)
+            elif hit is None:
+                probe.append(val)
+
+        if probe:
+            existing = set(unicode(val) for val in
+                           self.probe(rtype, field, probe))
+
+            for val in probe:
+                val = unicode(val)
+                self.cache.set((rtype, field, val), val in existing,
+                               'exists')
+
+            found |= existing
+
+        return found
+
+    def probe(self, rtype, field, vals):
+        """ Return the values of the field that models exist with
+
+        This is the store specific part of exists_many that's
+        always sent to the store.
+
+        :return: list of values
+        """
+
+        raise NotImplementedError
+
+    def aggregate(self, rtype, field, vals, aggregates):
+        """ Return the aggregates of the models grouped by a field
+
+        This is how the to-many relationships of many resources
+        are counted or aggregated without loading them. Only
+        the values with models are returned.
+
+        :param field:
+            field name of the models referencing the values
+        :param vals:
+            list of values
+        :param aggregates:
+            list of Aggregate objects
+        :return:
+            dict of the values as strings to dicts of the
+            Aggregate strings to their values
+        """
+
+        raise NotImplementedError
+
     def find(self, model, key, val):
         """ Find an existing model """
 
@@ -81,3 +361,58 @@ class Store(object):
         """ Modify an existing model """
 
         raise NotImplementedError
+
+    @staticmethod
+    def upsert_fields(model, conflict_fields):
+        """ Return the fields an upsert updates on a conflict
+
+        These are the dirty fields except the conflict fields,
+        the resource id, & the fields only written on create:
+        those with `reject_update=True` or an `on_create` value
+        but no `on_update` value.
+
+        :return: list
+        """
+
+        skip = set(conflict_fields) | {model.rid_field}
+        skip |= set(model.get_fields_by_prop('reject_update', True))
+        skip |= set(field for field, _ in
+                    model.get_fields_with_prop('on_create'))
+        skip -= set(field for field, _ in
+                    model.get_fields_with_prop('on_update'))
+
+        return [field for field in model.dirty_fields if field not in skip]
+
+    def upsert(self, model, conflict_fields, unchanged=None):
+        """ Create the model or update the one it conflicts with
+
+        See upsert_many for the details.
+
+        :return: True if created, False if updated, or None
+        """
+
+        return self.upsert_many([model], conflict_fields, unchanged)[0]
+
+    def upsert_many(self, models, conflict_fields, unchanged=None):
+        """ Create the models or update the ones they conflict with
+
+        Each model is created unless an existing model has the
+        same conflict_fields values, in which case the existing
+        one is updated with the upsert_fields instead. The models
+        must not conflict with each other.
+
+        The unchanged fields must already have the same value on
+        an existing model or it isn't updated at all.
+
+        The models are merged with the stored values.
+
+        :param conflict_fields:
+            list of field names of a unique constraint
+        :param unchanged:
+            list of field names
+        :return:
+            list of True if created, False if updated, or None if
+            not updated due to the unchanged fields per model
+        """
+
+        raise NotImplementedError
@@ -0,0 +1,6 @@
+"""
+    Memory
+    ~~~~~~
+
+    Our in-memory store modules contents.
+"""
@@ -0,0 +1,1114 @@
+"""
+    memory.store
+    ~~~~~~~~~~~~
+
+    Interface with helper routines for persisting, finding,
+    etc from a process local in-memory database.
+
+    It's a reference implementation of the postgres store with
+    the same query parameter semantics:
+
+        * filters follow SQL NULL semantics so a NULL value
+          never matches any filter operator
+        * string filters are evaluated like LIKE & ILIKE
+          patterns including the `%` & `_` wildcards
+        * full text search matches when every word of the
+          search is a word of the value. There's no stemming
+          or stop words so it's stricter than postgres
+        * trigram search is a case insensitive substring match
+          ranked by the similarity of the trigrams like pg_trgm
+        * near is the great circle distance on a sphere the
+          size of the earthdistance earth()
+        * sorts place NULLs last when ascending & first when
+          descending like postgres
+        * ties are always broken by the resource id so results
+          are deterministic
+
+    Every model is indexed by its resource id & any field with
+    `unique=True` which also enforces the uniqueness. Any other
+    find is a scan.
+
+    The database is module level & shared by every Store
+    instance in the process. Use DATABASE.clear() between test
+    cases to start over.
+"""
+
+import copy
+import goldman
+import goldman.exceptions as exceptions
+import goldman.signals as signals
+import math
+import re
+import threading
+
+from goldman import metrics
+from ..base import Store as BaseStore
+from goldman.queryparams.filter import Filter, FilterOr, FilterRel
+from goldman.queryparams.sort import Sortable
+from goldman.utils import deadline_helpers
+from goldman.utils.error_helpers import abort
+from goldman.utils.model_helpers import rtype_to_model
+from goldman.utils.timing_helpers import phase
+
+
+class Table(object):
+    """ All the rows of a single resource type
+
+    :param rid_field:
+        string field name of the resource id
+    :param unique:
+        list of string field names to index & keep unique
+    """
+
+    def __init__(self, rid_field, unique):
+
+        self.rid_field = rid_field
+        self.indexes = {field: {} for field in unique}
+        self.rows = {}
+        self.seq = 0
+
+    def conflicts(self, row, rid=None):
+        """ Return the first unique field conflicting with row
+
+        :param row:
+            dict row being written
+        :param rid:
+            resource id of the row being updated, if any
+        :return:
+            string field name or None
+        """
+
+        if rid is None and row.get(self.rid_field) in self.rows:
+            return self.rid_field
+
+        for field, index in self.indexes.items():
+            val = row.get(field)
+            found = index.get(val)
+
+            if val is not None and found is not None and found != rid:
+                return field
+
+        return None
+
+    def index(self, row):
+        """ Add the row to the unique indexes """
+
+        rid = row[self.rid_field]
+
+        for field, index in self.indexes.items():
+            if row.get(field) is not None:
+                index[row[field]] = rid
+
+    def unindex(self, row):
+        """ Remove the row from the unique indexes """
+
+        for field, index in self.indexes.items():
+            index.pop(row.get(field), None)
+
+
+class Database(object):
+    """ Tables of every resource type
+
+    A single lock guards all the writes. Reads copy the rows
+    they need under the lock & are evaluated afterwards.
+    """
+
+    def __init__(self):
+
+        self.lock = threading.RLock()
+        self.tables = {}
+
+    def clear(self):
+        """ Drop every table """
+
+        with self.lock:
+            self.tables = {}
+
+    def table(self, model):
+        """ Return the table of the model creating it if needed """
+
+        try:
+            return self.tables[model.RTYPE]
+        except KeyError:
+            with self.lock:
+                unique = model.get_fields_by_prop('unique', True)
+                table = Table(model.rid_field, unique)
+
+                return self.tables.setdefault(model.RTYPE, table)
+
+
+DATABASE = Database()
+
+
+_LIKE_CACHE = {}
+
+
+def _like(val, pattern, icase=False):
+    """ Evaluate a LIKE or ILIKE pattern against a value
+
+    The compiled regex of each pattern is cached.
+
+    :return: bool
+    """
+
+    key = (pattern, icase)
+
+    try:
+        regex = _LIKE_CACHE[key]
+    except KeyError:
+        parts = []
+
+        for char in pattern:
+            if char == '%':
+                parts.append('.*')
+            elif char == '_':
+                parts.append('.')
+            else:
+                parts.append(re.escape(char))
+
+        regex = re.compile(''.join(parts) + r'\Z',
+                           re.DOTALL | (re.IGNORECASE if icase else 0))
+
+        if len(_LIKE_CACHE) >= 1000:
+            _LIKE_CACHE.clear()
+        _LIKE_CACHE[key] = regex
+
+    return bool(regex.match(unicode(val)))
+
+
+_WORDS = re.compile(r'\w+', re.UNICODE)
+
+
+def _words(val):
+    """ Return a list of the lowercased words of a value """
+
+    return _WORDS.findall(unicode(val).lower())
+
+
+def _trigrams(val):
+    """ Return the set of trigrams of each word like pg_trgm """
+
+    grams = set()
+
+    for word in _words(val):
+        word = '  ' + word + ' '
+        grams.update(word[idx:idx + 3] for idx in range(len(word) - 2))
+
+    return grams
+
+
+def _search(val, arg, trigram=False):
+    """ Evaluate a full text or trigram search against a value
+
+    :return: bool
+    """
+
+    if trigram:
+        return _like(val, '%' + arg + '%', icase=True)
+
+    words = set(_words(arg))
+
+    return bool(words) and words.issubset(_words(val))
+
+
+def _rank(val, arg, trigram=False):
+    """ Return the relevance of a value to the search
+
+    :return: float
+    """
+
+    if trigram:
+        grams, other = _trigrams(val), _trigrams(arg)
+        union = len(grams | other)
+
+        return float(len(grams & other)) / union if union else 0.0
+
+    words = _words(val)
+    query = set(_words(arg))
+
+    return float(sum(word in query for word in words)) / (len(words) or 1)
+
+
+# radius in meters of the earthdistance earth()
+EARTH_RADIUS = 6378168
+
+
+def _distance(lat1, lon1, lat2, lon2):
+    """ Return the great circle distance in meters of two points """
+
+    lat1, lon1, lat2, lon2 = [math.radians(i) for i in
+                              (lat1, lon1, lat2, lon2)]
+
+    hav = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * \
+        math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+
+    return 2 * EARTH_RADIUS * math.asin(min(1, math.sqrt(hav)))
+
+
+def _in_polygon(lat, lon, val):
+    """ Evaluate if a point is in a polygon of lat, lon points
+
+    :return: bool
+    """
+
+    points = zip(val[0::2], val[1::2])
+    inside = False
+
+    for idx, (lat1, lon1) in enumerate(points):
+        lat2, lon2 = points[idx - 1]
+
+        if (lon1 > lon) != (lon2 > lon) and \
+                lat < (lat2 - lat1) * (lon - lon1) / (lon2 - lon1) + lat1:
+            inside = not inside
+
+    return inside
+
+
+def _geo(lat, lon, oper, arg):
+    """ Evaluate a near or within geo filter against a point
+
+    :return: bool
+    """
+
+    if oper == 'near':
+        return _distance(arg[0], arg[1], lat, lon) <= arg[2]
+    elif len(arg) == 4:
+        return arg[0] <= lat <= arg[2] and arg[1] <= lon <= arg[3]
+
+    return _in_polygon(lat, lon, arg)
+
+
+OPERATORS = {
+    'eq': lambda val, arg: val == arg,
+    'gt': lambda val, arg: val > arg,
+    'lt': lambda val, arg: val < arg,
+    'ne': lambda val, arg: val != arg,
+    'neq': lambda val, arg: val != arg,
+    'gte': lambda val, arg: val >= arg,
+    'lte': lambda val, arg: val <= arg,
+
+    'contains': lambda val, arg: _like(val, '%' + arg + '%'),
+    'icontains': lambda val, arg: _like(val, '%' + arg + '%', icase=True),
+    'iexact': lambda val, arg: _like(val, arg, icase=True),
+    'endswith': lambda val, arg: _like(val, '%' + arg),
+    'startswith': lambda val, arg: _like(val, arg + '%'),
+
+    'in': lambda val, arg: val in arg,
+    'nin': lambda val, arg: val not in arg,
+
+    'after': lambda val, arg: val > arg,
+    'before': lambda val, arg: val < arg,
+}
+
+AGGREGATORS = {
+    'max': max,
+    'min': min,
+    'sum': sum,
+}
+
+
+class Store(BaseStore):
+    """ In-memory database store
+
+    A unit of work journals the prior state of every row it
+    writes so a rollback can restore them. Unlike postgres the
+    writes are visible to other requests before the commit.
+    """
+
+    def __init__(self):
+
+        self.db = DATABASE
+
+        super(Store, self).__init__()
+
+    def reset(self):
+        """ Reset the per-request state so the store can be reused """
+
+        self.journal = None
+
+        super(Store, self).reset()
+
+    def _journal(self, table, rid, row):
+        """ Remember the row as it was before being written """
+
+        if self.journal is not None:
+            self.journal.append((table, rid, row))
+
+    def begin(self):
+        """ Start a unit of work """
+
+        self.journal = []
+        self.queued = []
+
+    def commit(self):
+        """ Flush the queued models & commit the unit of work
+
+        Signal handlers may queue more models while the queued
+        ones are flushed so the queue is flushed until it's
+        empty.
+        """
+
+        try:
+            while self.queued:
+                self.flush()
+        except BaseException:
+            self.rollback()
+            raise
+
+        self.journal = None
+        self.queued = None
+
+    def rollback(self):
+        """ Discard the queued models & restore the journaled rows """
+
+        self._undo(self.journal or [])
+
+        self.identity = {}
+        self.journal = None
+        self.queued = None
+
+    def _undo(self, journal):
+        """ Restore the journaled rows in reverse order """
+
+        with self.db.lock:
+            for table, rid, row in reversed(journal):
+                current = table.rows.pop(rid, None)
+
+                if current:
+                    table.unindex(current)
+                if row:
+                    table.rows[rid] = row
+                    table.index(row)
+
+    @staticmethod
+    def _query(op, rtype, key=None):
+        """ Report a synthetic query to the post_query signal
+
+        The fingerprint identifies the kind of lookup so things
+        like the N+1 detector work just like with postgres.
+        """
+
+        fprint = 'memory %s %s' % (op, rtype)
+
+        if key:
+            fprint += ' by %s' % key
+
+        signals.post_query.send(Store, fingerprint=fprint)
+
+    @staticmethod
+    def field_cols(model):
+        """ Return a list of the models fields that are stored
+
+        TIP: to_manys are not located on the table & are
+             instead application references.
+
+        :return: list
+        """
+
+        to_many = model.to_many
+
+        return [f for f in model.all_fields if f not in to_many]
+
+    @staticmethod
+    def to_pg(model):
+        """ Invoke the models to_primitive just like postgres """
+
+        return model.to_primitive(context={
+            'datetime_date': True,
+            'rel_ids': True,
+        })
+
+    @staticmethod
+    def cast(model, field, val):
+        """ Cast a value to the type of the models field
+
+        Postgres implicitly casts the parameterized inputs to
+        the column type so the same is done here using the
+        schematics field. ToOne fields are stored as the
+        resource id of the relationship.
+
+        :raise: ValueError if it can't be cast
+        """
+
+        field = getattr(model, '_fields').get(field)
+
+        if field is None or val is None:
+            return val
+
+        try:
+            val = field.to_native(val)
+        except Exception:  # pylint: disable=broad-except
+            raise ValueError('invalid value for %s' % field)
+
+        return getattr(val, 'rid', val)
+
+    def filters_predicate(self, model, filters):
+        """ Compile the Filter objects into a single row predicate
+
+        Every filter must match just like the AND'd WHERE
+        statement of the postgres store. Also like postgres the
+        relationship filters on the same path are merged so they
+        must all match the same related row.
+
+        :return: callable given a row returning a bool
+        """
+
+        paths = {}
+        preds = []
+
+        for filtr in filters:
+            if isinstance(filtr, FilterRel):
+                paths.setdefault(filtr.path, []).append(filtr)
+            else:
+                preds.append(self._predicate(model, filtr))
+
+        preds += [self._rel_predicate(rels) for rels in paths.values()]
+
+        return lambda row: all(pred(row) for pred in preds)
+
+    @staticmethod
+    def pseudo_sorts(model, filters):
+        """ Return the RANK_SORT & DISTANCE_SORT of the filters
+
+        Like postgres only the filters on the model itself count
+        & not those of relationship filters. The relevance is of
+        all the search filters & the distance is from the first
+        near filter.
+
+        :return: dict of pseudo sort fields to row callables
+        """
+
+        nears = []
+        searches = []
+        sorts = {}
+        trigram = model.get_fields_by_prop('searchable', 'trigram')
+
+        def _collect(filtrs):
+            for filtr in filtrs:
+                if isinstance(filtr, FilterOr):
+                    _collect(filtr)
+                elif isinstance(filtr, FilterRel):
+                    continue
+                elif filtr.oper == 'near':
+                    nears.append(filtr)
+                elif filtr.oper == 'search':
+                    searches.append((filtr.field, filtr.val,
+                                     filtr.field in trigram))
+
+        _collect(filters)
+
+        if nears:
+            lat, lon = model.geo_fields[nears[0].field]
+            point = nears[0].val[:2]
+
+            sorts[goldman.config.DISTANCE_SORT] = lambda row: None \
+                if row.get(lat) is None or row.get(lon) is None \
+                else _distance(point[0], point[1], float(row[lat]),
+                               float(row[lon]))
+
+        if searches:
+            sorts[goldman.config.RANK_SORT] = lambda row: sum(
+                _rank(row[f], val, trig) for f, val, trig in searches
+                if row.get(f) is not None)
+
+        return sorts
+
+    def _predicate(self, model, filtr):
+        """ Return a row predicate of a single filter expression """
+
+        if isinstance(filtr, FilterOr):
+            preds = [self._predicate(model, f) for f in filtr]
+            return lambda row: any(pred(row) for pred in preds)
+
+        elif isinstance(filtr, FilterRel):
+            return self._rel_predicate([filtr])
+
+        return self._row_test(model, filtr.field, filtr)
+
+    def _rel_predicate(self, rels):
+        """ Return a row predicate of FilterRels sharing a path
+
+        Just like the postgres EXISTS the rows at the end of
+        the path matching every foreign filter are determined
+        once. The path is then walked backwards collecting the
+        values each hop joins on until the local field values
+        of the resource being searched are known.
+        """
+
+        path = rels[0].path
+        model = rtype_to_model(path[-1][1])
+        tests = [self._row_test(model, rel.foreign_filter, rel)
+                 for rel in rels]
+
+        with self.db.lock:
+            rows = list(self.db.table(model).rows.values())
+
+        vals = set(row.get(path[-1][2]) for row in rows
+                   if all(test(row) for test in tests))
+
+        for idx in range(len(path) - 1, 0, -1):
+            local_field = path[idx][0]
+            foreign_field = path[idx - 1][2]
+            model = rtype_to_model(path[idx - 1][1])
+
+            with self.db.lock:
+                rows = list(self.db.table(model).rows.values())
+
+            vals.discard(None)
+            vals = set(row.get(foreign_field) for row in rows
+                       if row.get(local_field) in vals)
+
+        vals.discard(None)
+        local_field = path[0][0]
+
+        return lambda row: row.get(local_field) in vals
+
+    def _row_test(self, model, field, filtr):
+        """ Return a callable evaluating the filter on a row
+
+        Geo filters need both the lat & lon fields of the row
+        & any other filter only needs the value of the field.
+        """
+
+        if filtr.oper in goldman.config.GEO_FILTERS:
+            lat, lon = model.geo_fields[field]
+
+            return lambda row: row.get(lat) is not None and \
+                row.get(lon) is not None and \
+                _geo(float(row[lat]), float(row[lon]), filtr.oper, filtr.val)
+
+        test = self._test(model, field, filtr)
+        return lambda row: test(row.get(field))
+
+    def _test(self, model, field, filtr):
+        """ Return a callable evaluating the filter on a value
+
+        NULL values never match anything except the `exists`
+        operator.
+        """
+
+        oper = filtr.oper
+
+        if oper == 'exists':
+            return lambda val: (val is not None) == filtr.val
+
+        elif oper == 'search':
+            trigram = field in model.get_fields_by_prop('searchable',
+                                                         'trigram')
+            return lambda val: val is not None and \
+                _search(val, filtr.val, trigram)
+
+        try:
+            func = OPERATORS[oper]
+        except KeyError:
+            abort(exceptions.InvalidQueryParams(**{
+                'detail': 'The query filter operator of "%s" is not '
+                          'supported by this store.' % oper,
+                'parameter': 'filter',
+            }))
+
+        try:
+            if oper in goldman.config.STR_FILTERS:
+                arg = filtr.val
+            elif oper in goldman.config.ENUM_FILTERS:
+                arg = tuple(self.cast(model, field, v) for v in filtr.val)
+            else:
+                arg = self.cast(model, field, filtr.val)
+        except ValueError:
+            abort(exceptions.InvalidQueryParams(**{
+                'detail': 'The query filter {} has a value that could not '
+                          'be processed for that field.'.format(filtr),
+                'parameter': 'filter',
+            }))
+
+        return lambda val: val is not None and func(val, arg)
+
+    @staticmethod
+    def sort_rows(rows, sortables, rid_field, pseudo=None):
+        """ Sort the rows by the Sortables in place
+
+        Each sortable is applied in reverse order with a stable
+        sort after an initial sort by resource id so the rid is
+        always the final tie-breaker.
+
+        The goldman.config.RANK_SORT & DISTANCE_SORT pseudo
+        fields sort by the callables in the pseudo dict & are
+        skipped if missing.
+        """
+
+        pseudo = pseudo or {}
+        rows.sort(key=lambda row: row[rid_field])
+
+        for sortable in reversed(sortables):
+            field = sortable.field
+
+            if field in (goldman.config.DISTANCE_SORT,
+                         goldman.config.RANK_SORT):
+                func = pseudo.get(field)
+            else:
+                func = lambda row, f=field: row.get(f)
+
+            if func:
+                rows.sort(
+                    key=lambda row, f=func: (f(row) is None, f(row)),
+                    reverse=sortable.desc,
+                )
+
+    def aggregate(self, rtype, field, vals, aggregates):
+        """ Return the aggregates of the rows grouped by a field
+
+        Like postgres the NULL values are skipped so the
+        aggregates of a group with only NULL values are None.
+        The static `search_filters` of the model apply just like
+        a search.
+
+        :return: dict
+        """
+
+        model = rtype_to_model(rtype)
+
+        if getattr(model, 'search_query', None):
+            raise NotImplementedError('the memory store does not support '
+                                      'the search_query of %s' % rtype)
+
+        filters = [Filter(field, 'in', tuple(vals))]
+        filters += getattr(model, 'search_filters', []) or []
+        fields = getattr(model, '_fields')
+        groups = {}
+
+        metrics.store_ops.inc(('aggregate', rtype))
+
+        with phase('db'):
+            with self.db.lock:
+                rows = list(self.db.table(model).rows.values())
+
+            match = self.filters_predicate(model, filters)
+
+            for row in rows:
+                if match(row):
+                    groups.setdefault(unicode(row[field]), []).append(row)
+
+        self._query('aggregate', rtype, field)
+
+        result = {}
+
+        for val, rows in groups.items():
+            result[val] = {}
+
+            for agg in aggregates:
+                if agg.oper == 'count':
+                    result[val][str(agg)] = len(rows)
+                    continue
+
+                cols = [fields[agg.field].to_native(row[agg.field])
+                        for row in rows if row.get(agg.field) is not None]
+
+                try:
+                    func = AGGREGATORS[agg.oper]
+                except KeyError:
+                    abort(exceptions.InvalidQueryParams(**{
+                        'detail': 'The aggregate operator of "%s" is not '
+                                  'supported by this store.' % agg.oper,
+                        'parameter': 'aggregate',
+                    }))
+
+                result[val][str(agg)] = func(cols) if cols else None
+
+        return result
+
+    def create(self, model):
+        """ Given a model object instance create it """
+
+        metrics.store_ops.inc(('create', model.rtype))
+        signals.pre_create.send(model.__class__, model=model)
+        signals.pre_save.send(model.__class__, model=model)
+
+        param = copy.deepcopy(self.to_pg(model))
+
+        with phase('db'), self.db.lock:
+            result = self._insert(model, self.db.table(model), param)
+
+        self._query('create', model.rtype)
+
+        signals.post_create.send(model.__class__, model=model)
+        signals.post_save.send(model.__class__, model=model)
+
+        model.merge(result, clean=True)
+
+        return self.identity_set(model)
+
+    def create_many(self, models):
+        """ Given a list of model object instances create them
+
+        The models created before a failure are removed again
+        so either all or none of them are created.
+
+        :return: list of the models
+        """
+
+        outer, self.journal = self.journal, []
+
+        try:
+            for model in models:
+                self.create(model)
+        except BaseException:
+            self._undo(self.journal)
+            self.journal = []
+            raise
+        finally:
+            if outer is not None:
+                outer.extend(self.journal)
+            self.journal = outer
+
+        return models
+
+    def _insert(self, model, table, param):
+        """ Insert the dirty fields of the model as a new row
+
+        The database lock must be held.
+
+        :return: dict of the inserted row
+        """
+
+        row = {field: None for field in self.field_cols(model)}
+        rid_field = model.rid_field
+
+        for field in model.dirty_fields:
+            if field in row:
+                row[field] = param[field]
+
+        if row[rid_field] is None:
+            row[rid_field] = table.seq + 1
+
+        conflict = table.conflicts(row)
+        if conflict:
+            abort(exceptions.ResourceConflict(**{
+                'detail': 'A "%s" resource with the same "%s" value '
+                          'already exists.' % (model.rtype, conflict),
+            }))
+
+        if isinstance(row[rid_field], (int, long)):
+            table.seq = max(table.seq, row[rid_field])
+
+        self._journal(table, row[rid_field], None)
+        table.rows[row[rid_field]] = row
+        table.index(row)
+
+        return dict(row)
+
+    def delete(self, model):
+        """ Given a model object instance delete it """
+
+        metrics.store_ops.inc(('delete', model.rtype))
+        signals.pre_delete.send(model.__class__, model=model)
+
+        rid = self.to_pg(model)[model.rid_field]
+
+        with phase('db'), self.db.lock:
+            table = self.db.table(model)
+            row = table.rows.pop(rid, None)
+
+            if row:
+                self._journal(table, rid, row)
+                table.unindex(row)
+
+        self._query('delete', model.rtype)
+        self.identity_discard(model)
+
+        signals.post_delete.send(model.__class__, model=model)
+
+        return [row] if row else []
+
+    def find(self, rtype, key, val):
+        """ Given a resource type & a single key/val find the model
+
+        The rid & unique fields are looked up by index & any
+        other field requires a scan where the row with the
+        lowest rid wins.
+
+        A find by resource id returns the model in the identity
+        map if there is one. The find signals are sent either way.
+
+        :return: model or None
+        """
+
+        model = rtype_to_model(rtype)
+
+        metrics.store_ops.inc(('find', rtype))
+        signals.pre_find.send(model.__class__, model=model)
+
+        if key == model.rid_field:
+            found = self.identity_get(rtype, val)
+
+            if found is not None:
+                signals.post_find.send(model.__class__, model=found)
+                return found
+
+        try:
+            val = self.cast(model, key, val)
+        except ValueError:
+            val = None
+
+        with phase('db'), self.db.lock:
+            table = self.db.table(model)
+
+            if val is None:
+                row = None
+            elif key == table.rid_field:
+                row = table.rows.get(val)
+            elif key in table.indexes:
+                row = table.rows.get(table.indexes[key].get(val))
+            else:
+                rows = [r for r in table.rows.values() if r.get(key) == val]
+                row = min(rows, key=lambda r: r[table.rid_field]) \
+                    if rows else None
+
+            row = dict(row) if row else None
+
+        self._query('find', rtype, key)
+
+        result = None
+        if row:
+            with phase('hydrate'):
+                result = self.hydrate(model, [row])[0]
+            signals.post_find.send(model.__class__, model=result)
+
+        return result
+
+    def probe(self, rtype, field, vals):
+        """ Return the values of the field that rows exist with
+
+        The rid & unique fields are looked up by index & any
+        other field requires a scan.
+
+        :return: list of values
+        """
+
+        model = rtype_to_model(rtype)
+        casted = []
+
+        metrics.store_ops.inc(('exists', rtype))
+
+        for val in vals:
+            try:
+                casted.append((val, self.cast(model, field, val)))
+            except ValueError:
+                pass
+
+        with phase('db'), self.db.lock:
+            table = self.db.table(model)
+
+            if field == table.rid_field:
+                existing = table.rows
+            elif field in table.indexes:
+                existing = table.indexes[field]
+            else:
+                existing = set(row.get(field) for row in table.rows.values())
+
+            found = [val for val, cast in casted if cast in existing]
+
+        self._query('exists', rtype, field)
+
+        return found
+
+    def query(self, query, param=None):
+        """ Raw queries are not supported by the memory store """
+
+        raise NotImplementedError('the memory store has no query language')
+
+    def search(self, rtype, **kwargs):
+        """ Search for the model by assorted criteria
+
+        The same filtering, sorting, & pagination as the
+        postgres store. Models declaring a static
+        `search_query` can't be searched since that's SQL.
+        """
+
+        model = rtype_to_model(rtype)
+
+        if getattr(model, 'search_query', None):
+            raise NotImplementedError('the memory store does not support '
+                                      'the search_query of %s' % rtype)
+
+        filters = list(kwargs.get('filters', []))
+        filters += getattr(model, 'search_filters', []) or []
+        pages = kwargs.get('pages')
+        sorts = kwargs.get('sorts', [Sortable(goldman.config.SORT)])
+
+        metrics.store_ops.inc(('search', rtype))
+        signals.pre_search.send(model.__class__, model=model)
+        deadline_helpers.check()
+
+        with phase('db'):
+            with self.db.lock:
+                table = self.db.table(model)
+                rows = list(table.rows.values())
+
+            match = self.filters_predicate(model, filters)
+            rows = [dict(row) for row in rows if match(row)]
+            deadline_helpers.check()
+            self.sort_rows(rows, sorts, table.rid_field,
+                           pseudo=self.pseudo_sorts(model, filters))
+
+            total = len(rows)
+
+            if pages:
+                rows = rows[pages.offset:pages.offset + pages.limit]
+
+        self._query('search', rtype)
+
+        with phase('hydrate'):
+            models = self.hydrate(model, rows)
+
+        if models:
+            signals.post_search.send(model.__class__, models=rows)
+
+        if pages and rows:
+            pages.total = total
+
+        return models
+
+    def update(self, model):
+        """ Given a model object instance update it """
+
+        metrics.store_ops.inc(('update', model.rtype))
+        signals.pre_update.send(model.__class__, model=model)
+        signals.pre_save.send(model.__class__, model=model)
+
+        param = copy.deepcopy(self.to_pg(model))
+        rid = param[model.rid_field]
+
+        with phase('db'), self.db.lock:
+            table = self.db.table(model)
+
+            try:
+                row = dict(table.rows[rid])
+            except KeyError:
+                abort(exceptions.DocumentNotFound)
+
+            for field in model.dirty_fields:
+                if field in row:
+                    row[field] = param[field]
+
+            conflict = table.conflicts(row, rid=rid)
+            if conflict:
+                abort(exceptions.ResourceConflict(**{
+                    'detail': 'A "%s" resource with the same "%s" value '
+                              'already exists.' % (model.rtype, conflict),
+                }))
+
+            self._journal(table, rid, table.rows[rid])
+            self._journal(table, row[table.rid_field], None)
+
+            table.unindex(table.rows.pop(rid))
+            table.rows[row[table.rid_field]] = row
+            table.index(row)
+            result = dict(row)
+
+        self._query('update', model.rtype)
+
+        signals.post_update.send(model.__class__, model=model)
+        signals.post_save.send(model.__class__, model=model)
+
+        model.merge(result, clean=True)
+
+        return self.identity_set(model)
+
+    def upsert_many(self, models, conflict_fields, unchanged=None):
+        """ Create the models or update the ones they conflict with
+
+        The existing row is looked up by index when the conflict
+        fields are the resource id or a single unique field &
+        by scan otherwise. See the base store for the details.
+
+        :return:
+            list of True if created, False if updated, or None if
+            not updated due to the unchanged fields per model
+        """
+
+        results = []
+
+        for model in models:
+            metrics.store_ops.inc(('upsert', model.RTYPE))
+            signals.pre_upsert.send(model.__class__, model=model)
+            signals.pre_save.send(model.__class__, model=model)
+
+            param = copy.deepcopy(self.to_pg(model))
+
+            with phase('db'), self.db.lock:
+                table = self.db.table(model)
+                rid = self._upsert_rid(table, conflict_fields, param)
+
+                if rid is None:
+                    created = True
+                    result = self._insert(model, table, param)
+                elif any(table.rows[rid].get(field) != param.get(field)
+                         for field in unchanged or []):
+                    created = None
+                else:
+                    created = False
+                    result = self._upsert_update(model, table, rid, param,
+                                                 conflict_fields)
+
+            self._query('upsert', model.RTYPE)
+
+            if created is not None:
+                model.merge(result, clean=True)
+                self.identity_set(model)
+                signals.post_upsert.send(model.__class__, model=model)
+                signals.post_save.send(model.__class__, model=model)
+
+            results.append(created)
+
+        return results
+
+    @staticmethod
+    def _upsert_rid(table, conflict_fields, param):
+        """ Return the resource id of the row an upsert conflicts with
+
+        The database lock must be held.
+
+        :return: resource id or None
+        """
+
+        key = [param.get(field) for field in conflict_fields]
+
+        if list(conflict_fields) == [table.rid_field]:
+            return key[0] if key[0] in table.rows else None
+        elif len(conflict_fields) == 1 and conflict_fields[0] in \
+                table.indexes:
+            return table.indexes[conflict_fields[0]].get(key[0])
+
+        for rid, row in table.rows.items():
+            if key == [row.get(field) for field in conflict_fields]:
+                return rid
+
+        return None
+
+    def _upsert_update(self, model, table, rid, param, conflict_fields):
+        """ Update the existing row with the upsert_fields
+
+        The database lock must be held.
+
+        :return: dict of the updated row
+        """
+
+        row = dict(table.rows[rid])
+
+        for field in self.upsert_fields(model, conflict_fields):
+            if field in row:
+                row[field] = param[field]
+
+        conflict = table.conflicts(row, rid=rid)
+        if conflict:
+            abort(exceptions.ResourceConflict(**{
+                'detail': 'A "%s" resource with the same "%s" value '
+                          'already exists.' % (model.rtype, conflict),
+            }))
+
+        self._journal(table, rid, table.rows[rid])
+        table.unindex(table.rows.pop(rid))
+        table.rows[rid] = row
+        table.index(row)
+
+        return dict(row)
@@ -2,43 +2,461 @@
     postgres.connect
     ~~~~~~~~~~~~~~~~
 
-    A convenience class to assist in creation of the
-    psycopg2 database object.
+    Pools of psycopg2 connections to the primary database &
+    any read replicas.
+
+    Each query checks a connection out of a pool & returns it
+    right afterwards so a connection is only tied up for the
+    duration of a query. The exception is a transaction which
+    holds its connection until the commit or rollback.
+
+    A pool has at most goldman.config.PG_POOL_MAX connections
+    so that caps the number of requests of a process using a
+    database at once. A checkout waits up to PG_POOL_TIMEOUT
+    seconds, but no longer than the request deadline, for a
+    connection to be returned & then gives up with PoolBusy.
+
+    Reads the caller deems safe are routed to one of the
+    goldman.config.PG_REPLICA_URLS. A replica is chosen at
+    random by weight among the healthy ones lagging no more
+    than PG_REPLICA_MAX_LAG seconds behind. If there isn't a
+    usable replica the read goes to the primary.
+
+    The health & lag of a replica are checked at most every
+    PG_REPLICA_CHECK seconds by whichever thread routes to it
+    first after that. The lag query needs postgres 10+.
+
+    Queries of a request with a deadline are watched by a
+    single Watchdog thread that cancels them server side if
+    they're still running at the deadline.
 """
 
 import goldman
+import goldman.utils.deadline_helpers as deadline_helpers
+import heapq
+import itertools
 import psycopg2
 import psycopg2.extras
+import psycopg2.pool
+import random
+import threading
+import time
+
+from contextlib import contextmanager
+
+
+LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())
+    END AS lag;
+"""
+
+
+class PoolBusy(psycopg2.pool.PoolError):
+    """ Every connection of the pool stayed checked out too long """
+
+
+class Slots(object):
+    """ Counting semaphore whose acquire has a timeout
+
+    The python 2 threading.Semaphore can only block forever or
+    not at all.
+    """
+
+    def __init__(self, size):
+
+        self._cond = threading.Condition(threading.Lock())
+        self._free = size
+
+    def acquire(self, timeout):
+        """ Take a slot waiting up to timeout seconds for one
+
+        :return: boolean if a slot was taken
+        """
+
+        end = time.time() + timeout
+
+        with self._cond:
+            while not self._free:
+                remaining = end - time.time()
+
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+
+            self._free -= 1
+            return True
+
+    def release(self):
+        """ Give back a slot & wake up a waiting thread """
+
+        with self._cond:
+            self._free += 1
+            self._cond.notify()
+
+
+class ThreadedPool(psycopg2.pool.ThreadedConnectionPool):
+    """ psycopg2 pool setting up each new connection like we like """
+
+    def _connect(self, key=None):
+        """ Create a new autocommit connection aware of hstore """
+
+        conn = super(ThreadedPool, self)._connect(key)
+
+        conn.set_session(autocommit=True)
+        psycopg2.extras.register_hstore(conn)
+
+        return conn
+
+
+class Pool(object):
+    """ Lazily created pool of connections to a single database
+
+    :param name:
+        string name of the pool used by the metrics
+    :param dsn:
+        string connection url
+    :param weight:
+        relative share of the reads routed to a replica
+    """
+
+    def __init__(self, name, dsn, weight=1):
+
+        self.checked = 0
+        self.dsn = dsn
+        self.healthy = True
+        self.lag = 0
+        self.name = name
+        self.weight = weight
+
+        self._check_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._pool = None
+        self._slots = Slots(goldman.config.PG_POOL_MAX)
+
+    @property
+    def pool(self):
+        """ Return the psycopg2 pool creating it if needed """
+
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadedPool(
+                        goldman.config.PG_POOL_MIN,
+                        goldman.config.PG_POOL_MAX,
+                        self.dsn,
+                        cursor_factory=psycopg2.extras.RealDictCursor,
+                    )
+
+        return self._pool
+
+    @property
+    def usable(self):
+        """ Boolean if healthy & not lagging too far behind """
+
+        return self.healthy and \
+            self.lag <= goldman.config.PG_REPLICA_MAX_LAG
+
+    def check(self):
+        """ Refresh the health & lag if it's time to
+
+        Only one thread checks at a time & any others use the
+        previous results in the meantime. A pool without a free
+        connection is busy, not unhealthy, so the check is
+        simply retried next time.
+        """
+
+        if time.time() - self.checked < goldman.config.PG_REPLICA_CHECK:
+            return
+        elif not self._check_lock.acquire(False):
+            return
+
+        try:
+            with self.connection(timeout=0) as conn, \
+                    conn.cursor() as curs:
+                curs.execute(LAG_QUERY)
+                self.lag = float(curs.fetchone()['lag'] or 0)
+            self.healthy = True
+            self.checked = time.time()
+        except PoolBusy:
+            pass
+        except psycopg2.Error:
+            self.healthy = False
+            self.checked = time.time()
+        finally:
+            self._check_lock.release()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """ Check a connection out of the pool for the duration """
+
+        conn = self.getconn(timeout=timeout)
+
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def getconn(self, timeout=None):
+        """ Check a connection out of the pool
+
+        It must be returned with putconn. Prefer connection()
+        unless the connection outlives a single block, like a
+        transaction spanning several queries.
+
+        If every connection is checked out this waits for one
+        to be returned, up to timeout seconds & the request
+        deadline, instead of failing right away like psycopg2.
+
+        :param timeout:
+            seconds or None for goldman.config.PG_POOL_TIMEOUT
+        :raise: PoolBusy
+        """
+
+        if timeout is None:
+            timeout = goldman.config.PG_POOL_TIMEOUT
+
+        deadline = deadline_helpers.deadline()
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.time())
+
+        if not self._slots.acquire(timeout):
+            raise PoolBusy('no connection of the %s pool was returned '
+                           'within %ss' % (self.name, timeout))
+
+        try:
+            return self.pool.getconn()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn, close=False):
+        """ Return a connection checked out with getconn
+
+        Connections that were closed, like by a server restart,
+        are discarded instead of returned to the pool.
+        """
+
+        try:
+            self.pool.putconn(conn, close=close or bool(conn.closed))
+        finally:
+            self._slots.release()
+
+    def stats(self):
+        """ Return the idle & used connection counts
+
+        :return: dict of (pool, state) tuples to counts
+        """
+
+        # pylint: disable=protected-access
+        pool = self._pool
+        idle = len(pool._pool) if pool else 0
+        used = len(pool._used) if pool else 0
+
+        return {(self.name, 'idle'): idle, (self.name, 'used'): used}
+
+
+class Watchdog(object):
+    """ Cancel queries still running at their deadline
+
+    One daemon thread sleeps until the earliest deadline being
+    watched. Queries finishing in time simply drop out so the
+    common case costs a heap push & a dict pop.
+    """
+
+    def __init__(self):
+
+        self._cond = threading.Condition()
+        self._counter = itertools.count()
+        self._heap = []
+        self._thread = None
+        self._watched = {}
+
+    def _run(self):
+        """ Cancel the queries of any deadline that has passed
+
+        The cancel opens a connection to the server so it's sent
+        after releasing the lock or every watch() would wait on
+        a slow or unreachable database.
+        """
+
+        while True:
+            with self._cond:
+                conn = self._next()
+
+            try:
+                conn.cancel()
+            except psycopg2.Error:
+                pass
+
+    def _next(self):
+        """ Wait for the next deadline to pass, under the lock
+
+        :return: psycopg2 connection to cancel
+        """
+
+        while True:
+            while self._heap and self._heap[0][1] not in self._watched:
+                heapq.heappop(self._heap)
+
+            if not self._heap:
+                self._cond.wait()
+                continue
+
+            deadline, token = self._heap[0]
+            now = time.time()
+
+            if deadline > now:
+                self._cond.wait(deadline - now)
+                continue
+
+            heapq.heappop(self._heap)
+
+            return self._watched.pop(token)
+
+    def _start(self):
+        """ Start the thread if it isn't already, under the lock """
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run,
+                                            name='goldman-pg-watchdog')
+            self._thread.daemon = True
+            self._thread.start()
+
+    @contextmanager
+    def watch(self, conn, deadline):
+        """ Cancel the query of conn if it's running at deadline
+
+        :param conn:
+            psycopg2 connection about to run a query
+        :param deadline:
+            epoch timestamp or None to not watch at all
+        """
+
+        if deadline is None:
+            yield
+            return
+
+        token = next(self._counter)
+
+        with self._cond:
+            self._start()
+            self._watched[token] = conn
+            heapq.heappush(self._heap, (deadline, token))
+
+            if self._heap[0][1] == token:
+                self._cond.notify()
+
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._watched.pop(token, None)
+
+
+WATCHDOG = Watchdog()
 
 
 class Connect(object):
-    """ Custom psycopg2 connection object by the start """
+    """ The primary & replica pools of the configuration """
 
     def __init__(self):
 
-        self._conn = None
+        self._lock = threading.Lock()
+        self._primary = None
+        self._replicas = None
+
+    @property
+    def primary(self):
+        """ Return the Pool of goldman.config.PG_URL """
+
+        if self._primary is None:
+            with self._lock:
+                if self._primary is None:
+                    self._primary = Pool('primary', goldman.config.PG_URL)
+
+        return self._primary
 
     @property
-    def config(self):
-        """ Return the configuration as needed """
+    def replicas(self):
+        """ Return a list of Pools of goldman.config.PG_REPLICA_URLS
+
+        Each url can be a (url, weight) tuple to route more or
+        less of the reads to it than the others.
+        """
+
+        if self._replicas is None:
+            replicas = []
+
+            for idx, url in enumerate(goldman.config.PG_REPLICA_URLS or ()):
+                if isinstance(url, (list, tuple)):
+                    url, weight = url
+                else:
+                    weight = 1
+
+                replicas.append(Pool('replica%s' % idx, url, weight))
+
+            self._replicas = replicas
+
+        return self._replicas
 
-        return goldman.config.PG_URL
+    def route(self, read=False):
+        """ Return the Pool a query should be sent to
 
-    def connect(self):
-        """ Construct the psycopg2 connection instance
+        :param read:
+            boolean if the query can be served by a replica
+        :return: Pool
+        """
+
+        if not read or not self.replicas:
+            return self.primary
+
+        for replica in self.replicas:
+            replica.check()
+
+        usable = [replica for replica in self.replicas if replica.usable]
+
+        if not usable:
+            return self.primary
+
+        pick = random.uniform(0, sum(replica.weight for replica in usable))
+
+        for replica in usable:
+            pick -= replica.weight
+            if pick <= 0:
+                break
+
+        return replica  # pylint: disable=undefined-loop-variable
 
-        :return: psycopg2.connect instance
+    def pool_stats(self):
+        """ Return the connection counts for the db_pool gauge
+
+        :return: dict of (pool, state) tuples to counts
+        """
+
+        stats = {}
+
+        for pool in [self._primary] + (self._replicas or []):
+            if pool:
+                stats.update(pool.stats())
+
+        return stats
+
+    def replica_lag(self):
+        """ Return the lag in seconds for the db_replica_lag gauge
+
+        :return: dict of (pool,) tuples to seconds
         """
 
-        if self._conn:
-            return self._conn
+        return {(pool.name,): pool.lag for pool in self._replicas or []}
 
-        self._conn = psycopg2.connect(
-            self.config,
-            cursor_factory=psycopg2.extras.RealDictCursor,
-        )
+    def replica_up(self):
+        """ Return the health for the db_replica_up gauge
 
-        self._conn.set_session(autocommit=True)
-        psycopg2.extras.register_hstore(self._conn)
+        :return: dict of (pool,) tuples to 1 or 0
+        """
 
-        return self._conn
+        return {(pool.name,): int(pool.usable)
+                for pool in self._replicas or []}
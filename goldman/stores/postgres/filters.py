@@ -0,0 +1,496 @@
+"""
+    postgres.filters
+    ~~~~~~~~~~~~~~~~
+
+    Compile the filter query params into a SQL WHERE statement.
+
+    The Filter objects are turned into a small typed AST which
+    is compiled into a SQL fragment & a parameter extraction
+    plan. The compiled result only depends on the "shape" of
+    the filters, that is the fields, operators, & nesting but
+    NOT the values, so it's cached by shape. Requests repeating
+    a filter shape skip straight to extracting the values:
+
+        compiled = compile_filters(filters, table)
+        stmt, param = compiled.stmt, compiled.params(filters)
+
+    The values are ALWAYS parameterized inputs with positional
+    names like `%(f0)s` so two filters on the same field &
+    operator never clobber each other.
+
+    Relationship filters compile to a correlated EXISTS with a
+    JOIN per additional hop of a nested relationship. All the
+    AND'd filters on the same relationship path are merged into
+    a single EXISTS so they must match the SAME related
+    resource. For example:
+
+        filter[trucks/make]=Ford&filter[trucks/year__gte]=2000
+
+    on the americans resource compiles to:
+
+        WHERE EXISTS (SELECT 1 FROM trucks r0
+                      WHERE r0.owner = americans.rid
+                      AND r0.make = %(f0)s AND r0.year >= %(f1)s)
+
+    The columns of the resource being searched are always
+    qualified with its table name so they're never confused
+    with the columns of a related resource.
+
+    The `search` operator depends on how the field opted-in:
+
+        searchable=True - full text search compiled to
+            to_tsvector(SEARCH_LANG, col) @@ plainto_tsquery(..)
+            & ranked by ts_rank. Index it with:
+
+                CREATE INDEX ON t USING GIN
+                (to_tsvector('english', col));
+
+        searchable='trigram' - case insensitive substring match
+            compiled to ILIKE & ranked by the pg_trgm similarity.
+            Index it with:
+
+                CREATE INDEX ON t USING GIN (col gin_trgm_ops);
+
+    A trigram index also speeds up the contains & icontains
+    operators of the field since they're LIKE & ILIKE too.
+
+    The geo operators filter on a lat & lon column pair:
+
+        near - compiled to an earthdistance bounding cube test
+            that a GiST index can serve followed by the exact
+            great circle distance. Index it with:
+
+                CREATE INDEX ON t USING GIST
+                (ll_to_earth(lat, lon));
+
+        within - a bounding box is a BETWEEN on both columns
+            which a B-tree index on (lat, lon) can serve. A
+            polygon is prefiltered by its bounding box before
+            the exact point in polygon test.
+
+    The rank expression of the search filters & the distance
+    expression of the first `near` filter on the resource
+    being searched are compiled alongside the WHERE statement
+    for sorting by the RANK_SORT & DISTANCE_SORT pseudo fields.
+"""
+
+import goldman
+
+from operator import itemgetter
+
+from goldman.queryparams.filter import FilterOr, FilterRel
+from goldman.utils.model_helpers import rtype_to_model
+
+
+# bounded cache of filter shapes to Compiled objects
+COMPILED_CACHE_SIZE = 500
+
+OPERATORS = {
+    'eq': '=',
+    'gt': '>',
+    'lt': '<',
+    'ne': '<>',
+    'neq': '<>',
+    'gte': '>=',
+    'lte': '<=',
+
+    'contains': 'LIKE',
+    'icontains': 'ILIKE',
+    'iexact': 'ILIKE',
+    'endswith': 'LIKE',
+    'startswith': 'LIKE',
+
+    'in': 'IN',
+    'nin': 'NOT IN',
+
+    'after': '>',
+    'before': '<',
+}
+
+CASTS = {
+    'contains': lambda val: '%' + val + '%',
+    'icontains': lambda val: '%' + val + '%',
+    'endswith': lambda val: '%' + val,
+    'startswith': lambda val: val + '%',
+}
+
+_COMPILED = {}
+
+
+class Compare(object):
+    """ AST node comparing a column to a parameterized value
+
+    The `exists` operator has no value & instead compiles to
+    an IS NULL or IS NOT NULL test.
+
+    The `search` operator compiles according to the searchable
+    mode of the field. If `rank` is set its rank expression is
+    added to the plan.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, column, oper, path, exists=None, rank=False,
+                 searchable=None):
+
+        self.column = column
+        self.exists = exists
+        self.oper = oper
+        self.path = path
+        self.rank = rank
+        self.searchable = searchable
+
+    def compile(self, plan):
+        """ Return the SQL & add the value extraction to the plan """
+
+        if self.oper == 'exists':
+            test = 'IS NOT NULL' if self.exists else 'IS NULL'
+            return '{} {}'.format(self.column, test)
+
+        elif self.oper == 'search':
+            return self.compile_search(plan)
+
+        prop = plan.add(self.path, CASTS.get(self.oper))
+
+        return '{} {} %({})s'.format(self.column, OPERATORS[self.oper], prop)
+
+    def compile_search(self, plan):
+        """ Return the SQL of the full text or trigram search """
+
+        if self.searchable == 'trigram':
+            prop = plan.add(self.path, CASTS['icontains'])
+
+            if self.rank:
+                rank = plan.add(self.path)
+                plan.ranks.append('similarity({}, %({})s)'.format(
+                    self.column, rank))
+
+            return '{} ILIKE %({})s'.format(self.column, prop)
+
+        prop = plan.add(self.path)
+        lang = "'{}'".format(goldman.config.SEARCH_LANG)
+        vector = 'to_tsvector({}, {})'.format(lang, self.column)
+        query = 'plainto_tsquery({}, %({})s)'.format(lang, prop)
+
+        if self.rank:
+            plan.ranks.append('ts_rank({}, {})'.format(vector, query))
+
+        return '{} @@ {}'.format(vector, query)
+
+
+class Disjunction(object):
+    """ AST node OR'ing its children """
+
+    def __init__(self, children):
+
+        self.children = children
+
+    def compile(self, plan):
+        """ Return the parenthesized OR'd SQL of the children """
+
+        stmts = [child.compile(plan) for child in self.children]
+
+        return '({})'.format(' OR '.join(stmts))
+
+
+def _polygon(val):
+    """ Return the postgres polygon literal of lat, lon points """
+
+    points = zip(val[1::2], val[0::2])
+
+    return '(%s)' % ','.join('(%r,%r)' % point for point in points)
+
+
+def _bbox(val):
+    """ Return the bounding box of lat, lon points as a tuple
+
+    The tuple is the min lat, min lon, max lat, & max lon.
+    """
+
+    lats, lons = val[0::2], val[1::2]
+
+    return min(lats), min(lons), max(lats), max(lons)
+
+
+class Geo(object):
+    """ AST node of a geo filter on a lat & lon column pair
+
+    If `distance` is set the distance expression of a `near`
+    filter is added to the plan.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, lat, lon, oper, path, polygon=False,
+                 distance=False):
+
+        self.distance = distance
+        self.lat = lat
+        self.lon = lon
+        self.oper = oper
+        self.path = path
+        self.polygon = polygon
+
+    def compile(self, plan):
+        """ Return the SQL & add the value extraction to the plan """
+
+        if self.oper == 'near':
+            lat, lon, radius = [plan.add(self.path, itemgetter(idx))
+                                for idx in range(3)]
+
+            point = 'll_to_earth(%({})s, %({})s)'.format(lat, lon)
+            target = 'll_to_earth({}, {})'.format(self.lat, self.lon)
+            dist = 'earth_distance({}, {})'.format(point, target)
+
+            if self.distance:
+                plan.distances.append(dist)
+
+            return '(earth_box({}, %({})s) @> {} AND {} <= %({})s)'.format(
+                point, radius, target, dist, radius)
+
+        if self.polygon:
+            bbox = [plan.add(self.path, lambda val, i=idx: _bbox(val)[i])
+                    for idx in range(4)]
+        else:
+            bbox = [plan.add(self.path, itemgetter(idx))
+                    for idx in range(4)]
+
+        stmt = '{lat} BETWEEN %({0})s AND %({2})s AND ' \
+               '{lon} BETWEEN %({1})s AND %({3})s'.format(*bbox,
+                                                         lat=self.lat,
+                                                         lon=self.lon)
+
+        if self.polygon:
+            prop = plan.add(self.path, _polygon)
+            stmt += ' AND point({}, {}) <@ polygon(%({})s)'.format(
+                self.lon, self.lat, prop)
+
+        return '({})'.format(stmt)
+
+
+class Exists(object):
+    """ AST node of one or more filters on a relationship path
+
+    The path is a tuple of relationship hops as documented on
+    the FilterRel object. Each hop gets a table alias of r0,
+    r1, etc & the compares are against the last one.
+    """
+
+    def __init__(self, table, path, compares):
+
+        self.compares = compares
+        self.path = path
+        self.table = table
+
+    def compile(self, plan):
+        """ Return the SQL of the correlated EXISTS """
+
+        local_field, foreign_rtype, foreign_field = self.path[0]
+
+        stmt = 'EXISTS (SELECT 1 FROM {} r0'.format(foreign_rtype)
+        where = ['r0.{} = {}.{}'.format(foreign_field, self.table,
+                                         local_field)]
+
+        for idx, hop in enumerate(self.path[1:], 1):
+            local_field, foreign_rtype, foreign_field = hop
+            stmt += ' JOIN {rtype} r{idx} ON r{idx}.{ffield} = ' \
+                    'r{prev}.{lfield}'.format(ffield=foreign_field,
+                                              idx=idx,
+                                              lfield=local_field,
+                                              prev=idx - 1,
+                                              rtype=foreign_rtype)
+
+        where += [compare.compile(plan) for compare in self.compares]
+
+        return '{} WHERE {})'.format(stmt, ' AND '.join(where))
+
+
+class Plan(object):
+    """ Extraction plan of the parameterized filter values
+
+    Each step is the path of indexes to the Filter object in
+    the (possibly nested) list of filters, the parameter name,
+    & an optional cast of the value.
+
+    The ranks & distances are the SQL expressions of any
+    search & near filters on the resource being searched.
+    """
+
+    def __init__(self):
+
+        self.distances = []
+        self.ranks = []
+        self.steps = []
+
+    def add(self, path, cast=None):
+        """ Add a step & return the parameter name for the SQL """
+
+        prop = 'f%s' % len(self.steps)
+        self.steps.append((path, prop, cast))
+
+        return prop
+
+
+class Compiled(object):
+    """ The compiled WHERE statement of a filter shape
+
+    The sorts are a dict of the pseudo sort fields to their
+    SQL expression. The relevance of the search filters is
+    the RANK_SORT & the distance from the first near filter is
+    the DISTANCE_SORT. They're only present if applicable.
+    """
+
+    def __init__(self, stmt, plan):
+
+        self.plan = plan
+        self.sorts = {}
+        self.stmt = stmt
+
+        if plan.distances:
+            self.sorts[goldman.config.DISTANCE_SORT] = plan.distances[0]
+        if plan.ranks:
+            self.sorts[goldman.config.RANK_SORT] = ' + '.join(plan.ranks)
+
+    def params(self, filters):
+        """ Extract the parameter dict from the filters
+
+        :param filters:
+            list of filter objects of the compiled shape
+        :return:
+            dict
+        """
+
+        param = {}
+
+        for path, prop, cast in self.plan.steps:
+            filtr = filters
+
+            for idx in path:
+                filtr = filtr[idx]
+
+            param[prop] = cast(filtr.val) if cast else filtr.val
+
+        return param
+
+
+def _compare(filtr, path, table):
+    """ Return the Compare or Geo node of a filter
+
+    Relationship filters compare the last aliased hop & are
+    never used for sorting since the alias isn't visible
+    outside of the EXISTS.
+    """
+
+    if isinstance(filtr, FilterRel):
+        alias = 'r{}'.format(len(filtr.path) - 1)
+        field, rtype = filtr.foreign_filter, filtr.path[-1][1]
+    else:
+        alias = table
+        field, rtype = filtr.field, table
+
+    if filtr.oper in goldman.config.GEO_FILTERS:
+        lat, lon = rtype_to_model(rtype).geo_fields[field]
+
+        return Geo('{}.{}'.format(alias, lat), '{}.{}'.format(alias, lon),
+                   filtr.oper, path, polygon=len(filtr.val) > 4,
+                   distance=not isinstance(filtr, FilterRel))
+
+    column = '{}.{}'.format(alias, field)
+    searchable = None
+    if filtr.oper == 'search':
+        field_type = getattr(rtype_to_model(rtype), '_fields')[field]
+        searchable = getattr(field_type, 'searchable', None)
+
+    return Compare(column, filtr.oper, path, exists=filtr.val,
+                   rank=not isinstance(filtr, FilterRel),
+                   searchable=searchable)
+
+
+def _node(filtr, path, table):
+    """ Return the AST node of a single filter expression """
+
+    if isinstance(filtr, FilterOr):
+        return Disjunction([_node(f, path + (idx,), table) for idx, f in
+                            enumerate(filtr)])
+
+    elif isinstance(filtr, FilterRel):
+        return Exists(table, filtr.path, [_compare(filtr, path, table)])
+
+    return _compare(filtr, path, table)
+
+
+def _nodes(filters, table):
+    """ Return the AST nodes of the AND'd filters
+
+    Relationship filters on the same path are merged into a
+    single Exists node at the position of the first one.
+    """
+
+    exists = {}
+    nodes = []
+
+    for idx, filtr in enumerate(filters):
+        if isinstance(filtr, FilterRel) and filtr.path in exists:
+            compare = _compare(filtr, (idx,), table)
+            exists[filtr.path].compares.append(compare)
+        else:
+            node = _node(filtr, (idx,), table)
+            nodes.append(node)
+
+            if isinstance(node, Exists):
+                exists[filtr.path] = node
+
+    return nodes
+
+
+def _shape(filtr):
+    """ Return the hashable shape of a single filter expression
+
+    The value is only part of the shape with the `exists` &
+    `within` operators since it changes the SQL.
+    """
+
+    if isinstance(filtr, FilterOr):
+        return ('or',) + tuple(_shape(f) for f in filtr)
+
+    shape = (filtr.field, filtr.oper)
+
+    if filtr.oper == 'exists':
+        shape += (bool(filtr.val),)
+    elif filtr.oper == 'within':
+        shape += (len(filtr.val) > 4,)
+
+    if isinstance(filtr, FilterRel):
+        shape += (filtr.path, filtr.foreign_filter)
+
+    return shape
+
+
+def compile_filters(filters, table):
+    """ Return the Compiled WHERE statement of the filters
+
+    The filters are AND'd together. Without any filters the
+    statement is an empty string.
+
+    :param filters:
+        list of Filter, FilterOr, & FilterRel objects
+    :param table:
+        string table name of the resource being searched
+    :return:
+        Compiled object
+    """
+
+    shape = (table,) + tuple(_shape(filtr) for filtr in filters)
+
+    try:
+        return _COMPILED[shape]
+    except KeyError:
+        plan = Plan()
+        stmts = [node.compile(plan) for node in _nodes(filters, table)]
+
+        stmt = ' WHERE ' + ' AND '.join(stmts) if stmts else ''
+        compiled = Compiled(stmt, plan)
+
+        if len(_COMPILED) >= COMPILED_CACHE_SIZE:
+            _COMPILED.clear()
+        _COMPILED[shape] = compiled
+
+        return compiled
@@ -0,0 +1,373 @@
+"""
+    postgres.stats
+    ~~~~~~~~~~~~~~
+
+    Query observability for the postgres store.
+
+    Every query is normalized into a fingerprint where all the
+    literals & parameterized inputs are replaced with `?` so
+    queries that only differ by value are grouped together. An
+    example query of:
+
+        SELECT rid, username FROM logins
+        WHERE username = %(val)s OFFSET 0 LIMIT 10;
+
+    would have a fingerprint of:
+
+        select rid, username from logins
+        where username = ? offset ? limit ?;
+
+    Per fingerprint we keep call & error counts along with a
+    latency histogram to estimate the p50, p95, & p99.
+
+    Queries slower than goldman.config.SLOW_QUERY_MS are logged
+    to the `goldman.query` logger with their parameters redacted.
+    A goldman.config.SLOW_QUERY_EXPLAIN fraction of the slow
+    SELECT queries will additionally have their
+    `EXPLAIN (ANALYZE, BUFFERS)` output captured.
+
+    The EXPLAIN is run by a background thread on a connection of
+    its own so it never delays the request or touches its
+    transaction. It's limited to SLOW_QUERY_EXPLAIN_TIMEOUT
+    seconds & skipped if the pool has no idle connection.
+
+    WARN: EXPLAIN ANALYZE executes the query a second time so
+          keep the sampling fraction small.
+"""
+
+import goldman
+import logging
+import Queue
+import random
+import re
+import threading
+
+
+LOG = logging.getLogger('goldman.query')
+
+
+# upper bounds of the latency histogram buckets in milliseconds
+BUCKETS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000,
+           10000, float('inf'))
+
+# bounded cache of raw query strings to fingerprints
+FINGERPRINT_CACHE_SIZE = 1000
+
+FINGERPRINT_REGEXES = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'%\(\w+\)s|%s'), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)'), '(?+)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+_FINGERPRINTS = {}
+
+
+def fingerprint(query):
+    """ Normalize the SQL query into a fingerprint
+
+    String & numeric literals, parameterized inputs, & lists
+    of them are replaced with placeholders. Whitespace is
+    collapsed & the whole thing is lowercased.
+
+    :param query: str
+    :return: str
+    """
+
+    try:
+        return _FINGERPRINTS[query]
+    except KeyError:
+        ret = query
+
+        for regex, repl in FINGERPRINT_REGEXES:
+            ret = regex.sub(repl, ret)
+
+        ret = ret.strip().lower()
+
+        if len(_FINGERPRINTS) >= FINGERPRINT_CACHE_SIZE:
+            _FINGERPRINTS.clear()
+        _FINGERPRINTS[query] = ret
+
+        return ret
+
+
+def redact(param):
+    """ Return a copy of the query params with the values masked
+
+    The param names & value types are preserved which is enough
+    to troubleshoot without leaking user data into the logs.
+
+    :param param: dict or None
+    :return: dict or None
+    """
+
+    if not param:
+        return param
+
+    return {key: '<%s>' % type(val).__name__ for key, val in param.items()}
+
+
+class Histogram(object):
+    """ Fixed bucket latency histogram
+
+    Percentiles are estimated by interpolating within the
+    bucket the percentile lands in.
+    """
+
+    def __init__(self):
+
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0
+
+    def observe(self, msecs):
+        """ Count a latency in milliseconds """
+
+        for idx, bound in enumerate(BUCKETS):
+            if msecs <= bound:
+                self.counts[idx] += 1
+                break
+
+        self.total += 1
+
+    def percentile(self, pct):
+        """ Estimate the latency in milliseconds of a percentile
+
+        :param pct: float between 0 & 100
+        :return: float or None
+        """
+
+        if not self.total:
+            return None
+
+        rank = self.total * pct / 100.0
+        seen = 0
+
+        for idx, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = BUCKETS[idx - 1] if idx else 0
+                upper = BUCKETS[idx]
+
+                if upper == float('inf'):
+                    return lower
+                return lower + (upper - lower) * (rank - seen) / count
+
+            seen += count
+
+        return BUCKETS[-2]
+
+
+class QueryStat(object):
+    """ Statistics of a single query fingerprint """
+
+    def __init__(self, fprint):
+
+        self.fingerprint = fprint
+
+        self.calls = 0
+        self.errors = 0
+        self.histogram = Histogram()
+        self.max = 0
+        self.plan = None
+        self.slow = 0
+        self.total = 0
+
+    def to_dict(self):
+        """ Convert the QueryStat into a dict, durations are in ms """
+
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'fingerprint': self.fingerprint,
+            'max': self.max,
+            'mean': self.total / self.calls if self.calls else None,
+            'p50': self.histogram.percentile(50),
+            'p95': self.histogram.percentile(95),
+            'p99': self.histogram.percentile(99),
+            'plan': self.plan,
+            'slow': self.slow,
+            'total': self.total,
+        }
+
+
+class Explainer(object):
+    """ Background thread capturing the plans of slow queries
+
+    Queries waiting to be explained are dropped once `size` of
+    them are queued so a burst of slow queries can't pile up.
+    """
+
+    def __init__(self, size=10):
+
+        self._lock = threading.Lock()
+        self._queue = Queue.Queue(size)
+        self._thread = None
+
+    def _run(self):
+        """ Explain the queued queries one at a time """
+
+        while True:
+            stat, pool, query, param = self._queue.get()
+            plan = self.explain(pool, query, param)
+
+            if plan is not None:
+                stat.plan = plan
+
+    @staticmethod
+    def explain(pool, query, param):
+        """ Return the EXPLAIN (ANALYZE, BUFFERS) output of a query
+
+        It runs in a transaction that's always rolled back with
+        a local statement_timeout so the pooled connection is
+        left as it was.
+
+        :param pool:
+            postgres.connect.Pool to check a connection out of
+        :return: str or None on any failure
+        """
+
+        timeout = int(goldman.config.SLOW_QUERY_EXPLAIN_TIMEOUT * 1000)
+        stmt = 'BEGIN; SET LOCAL statement_timeout = {}; ' \
+               'EXPLAIN (ANALYZE, BUFFERS) '.format(timeout)
+
+        try:
+            with pool.connection(timeout=0) as conn, \
+                    conn.cursor() as curs:
+                try:
+                    curs.execute(stmt + query, param)
+                    rows = curs.fetchall()
+                finally:
+                    curs.execute('ROLLBACK')
+
+            return '\n'.join(row['QUERY PLAN'] for row in rows)
+        except Exception:  # pylint: disable=broad-except
+            LOG.exception('failed to EXPLAIN query: %s', query)
+            return None
+
+    def submit(self, stat, pool, query, param):
+        """ Queue the query to have its plan set on the stat """
+
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run,
+                                                name='goldman-pg-explain')
+                self._thread.daemon = True
+                self._thread.start()
+
+        try:
+            self._queue.put_nowait((stat, pool, query, param))
+        except Queue.Full:
+            pass
+
+
+class QueryStats(object):
+    """ Process wide per-fingerprint query statistics
+
+    A single lock guards the fingerprint table since the
+    updates themselves are tiny.
+    """
+
+    def __init__(self):
+
+        self._explainer = Explainer()
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _get(self, fprint):
+        """ Return the QueryStat of a fingerprint creating it if needed """
+
+        try:
+            return self._stats[fprint]
+        except KeyError:
+            return self._stats.setdefault(fprint, QueryStat(fprint))
+
+    def record(self, query, param, secs, pool=None):
+        """ Record a successfully executed query
+
+        Slow queries are logged & possibly explained in the
+        background.
+
+        :param query:
+            string query
+        :param param:
+            parameters for the query
+        :param secs:
+            float seconds the query took
+        :param pool:
+            postgres.connect.Pool the query ran on or None to
+            never explain it
+        """
+
+        fprint = fingerprint(query)
+        msecs = secs * 1000
+        threshold = goldman.config.SLOW_QUERY_MS
+        slow = threshold is not None and msecs >= threshold
+
+        with self._lock:
+            stat = self._get(fprint)
+            stat.calls += 1
+            stat.histogram.observe(msecs)
+            stat.max = max(stat.max, msecs)
+            stat.total += msecs
+
+            if slow:
+                stat.slow += 1
+
+        if slow:
+            LOG.warning('slow query %.2fms: %s param: %s', msecs,
+                        ' '.join(query.split()), redact(param))
+
+            rate = goldman.config.SLOW_QUERY_EXPLAIN
+            is_select = query.lstrip().upper().startswith('SELECT')
+
+            if pool and rate and is_select and random.random() < rate:
+                self._explainer.submit(stat, pool, query, param)
+
+        return fprint
+
+    def record_error(self, query, param, exc):
+        """ Record & log a query that failed to execute
+
+        :param query:
+            string query
+        :param param:
+            parameters for the query
+        :param exc:
+            the exception raised by psycopg2
+        """
+
+        fprint = fingerprint(query)
+
+        with self._lock:
+            self._get(fprint).errors += 1
+
+        LOG.error('query failed: %s param: %s exc: %s exc code: %s',
+                  ' '.join(query.split()), redact(param), exc,
+                  getattr(exc, 'pgcode', None))
+
+        return fprint
+
+    def reset(self):
+        """ Throw away all the statistics collected so far """
+
+        with self._lock:
+            self._stats = {}
+
+    def to_dict(self):
+        """ Return the statistics ordered by most total time first
+
+        :return: dict
+        """
+
+        with self._lock:
+            stats = [stat.to_dict() for stat in self._stats.values()]
+
+        stats.sort(key=lambda stat: stat['total'], reverse=True)
+
+        return {
+            'queries': stats,
+            'slow_query_ms': goldman.config.SLOW_QUERY_MS,
+        }
+
+
+STATS = QueryStats()
@@ -4,52 +4,84 @@
 
     Interface with helper routines for persisting, finding,
     etc from a postgresql database.
+
+    The finds & searches of GET & HEAD requests are read from
+    a replica if any are configured. Once a request has written
+    anything, or issued any other query, the rest of its reads
+    go to the primary so it always reads its own writes.
+
+    Queries of a request with a deadline are cancelled by the
+    server if still running at the deadline & the request is
+    aborted with a 504.
+
+    Within a unit of work every write, & any query after the
+    first write, is part of a single transaction. The queued
+    models are flushed with a statement per resource type.
+
+    A write violating a foreign key fails with a validation
+    error of the relationship so ToOne fields can skip their
+    exists check, with `skip_exists=True`, & lean on it. A
+    delete of a row still referenced fails with a 409.
+
+    A request that can't check out a connection within
+    PG_POOL_TIMEOUT fails with a 503 & a Retry-After header.
+    A busy replica falls back to the primary.
 """
 
 import goldman
 import goldman.exceptions as exceptions
 import goldman.signals as signals
+import psycopg2
+import re
+import time
 
+from goldman import metrics
 from ..base import Store as BaseStore
-from ..postgres.connect import Connect
-from goldman.queryparams.filter import FilterOr, FilterRel
+from ..postgres.connect import Connect, PoolBusy, WATCHDOG
+from ..postgres.filters import compile_filters
+from ..postgres.stats import STATS
+from goldman.queryparams.filter import Filter
 from goldman.queryparams.sort import Sortable
+from goldman.utils import deadline_helpers
 from goldman.utils.error_helpers import abort
 from goldman.utils.model_helpers import rtype_to_model
+from goldman.utils.timing_helpers import phase
 
 
 CONNECT = Connect()
+metrics.db_pool.set_function(CONNECT.pool_stats)
+metrics.db_replica_lag.set_function(CONNECT.replica_lag)
+metrics.db_replica_up.set_function(CONNECT.replica_up)
 
+# errors of a lost connection where a replica read is retried
+# on the primary
+DISCONNECTS = (psycopg2.InterfaceError, psycopg2.OperationalError)
 
-ERRORS_TABLE = {
-    '42883': 'One or more of the query filters had an unexpected value '
-             'that could not be processed. This is a rare scenario & '
-             'it is unclear which field has the issue. Please review '
-             'your filters for any irregularities.',
-}
-
+# handlers of these may queue more models after a flush
+POST_SAVE_SIGNALS = (signals.post_create, signals.post_save,
+                     signals.post_update)
 
-FILTER_TABLE = {
-    'eq': '=',
-    'gt': '>',
-    'lt': '<',
-    'ne': '<>',
-    'gte': '>=',
-    'lte': '<=',
+# request methods whose reads are safe to route to a replica
+SAFE_METHODS = ('GET', 'HEAD')
 
-    'contains': 'LIKE',
-    'icontains': 'ILIKE',
-    'iexact': 'ILIKE',
-    'endswith': 'LIKE',
-    'startswith': 'LIKE',
+# query_canceled as issued by the Watchdog at a deadline
+CANCELED = '57014'
 
-    'in': 'IN',
-    'nin': 'NOT IN',
+# foreign_key_violation, unique_violation, & from the detail
+# message of either the key's columns, which may be several or
+# an expression, & the table still referencing a deleted row
+FOREIGN_KEY = '23503'
+UNIQUE = '23505'
+KEY_COL = re.compile(r'Key \((.+?)\)=')
+NOT_PRESENT = 'is not present in table'
+REFERENCED = re.compile(r'is still referenced from table "([^"]+)"')
 
-    'near': '<=',
 
-    'after': '>',
-    'before': '<',
+ERRORS_TABLE = {
+    '42883': 'One or more of the query filters had an unexpected value '
+             'that could not be processed. This is a rare scenario & '
+             'it is unclear which field has the issue. Please review '
+             'your filters for any irregularities.',
 }
 
 
@@ -62,9 +94,45 @@ def handle_exc(exc):
     :param exc: psycopg2 exception
     """
 
-    err = ERRORS_TABLE.get(exc.pgcode)
-
-    if err:
+    code = getattr(exc, 'pgcode', None)
+    err = ERRORS_TABLE.get(code)
+
+    if isinstance(exc, PoolBusy):
+        abort(exceptions.DatabaseBusy)
+    elif code == CANCELED and deadline_helpers.deadline() is not None:
+        deadline_helpers.exceeded()
+    elif code in (FOREIGN_KEY, UNIQUE):
+        detail = getattr(getattr(exc, 'diag', None), 'message_detail', '')
+        detail = detail or ''
+        column = KEY_COL.search(detail)
+        column = column.group(1) if column else None
+        referenced = REFERENCED.search(detail)
+
+        if code == FOREIGN_KEY and referenced:
+            abort(exceptions.ResourceConflict(**{
+                'detail': 'The resource is still referenced by "%s" '
+                          'resources & can\'t be deleted until they no '
+                          'longer are.' % referenced.group(1),
+            }))
+        elif code == FOREIGN_KEY and NOT_PRESENT in detail and column \
+                and ',' not in column:
+            abort(exceptions.ValidationFailure(
+                '/data/relationships/%s' % column,
+                detail='The related resource was not found',
+            ))
+        elif code == UNIQUE and column and ',' in column:
+            abort(exceptions.ResourceConflict(**{
+                'detail': 'A resource with the same combination of "%s" '
+                          'values already exists.' % column,
+            }))
+        elif code == UNIQUE and column:
+            abort(exceptions.ResourceConflict(**{
+                'detail': 'A resource with the same "%s" value already '
+                          'exists.' % column,
+            }))
+
+        abort(exceptions.ResourceConflict)
+    elif err:
         abort(exceptions.InvalidQueryParams(**{
             'detail': err,
             'parameter': 'filter',
@@ -74,14 +142,36 @@ def handle_exc(exc):
 
 
 class Store(BaseStore):
-    """ PostgreSQL database store """
+    """ PostgreSQL database store
+
+    A store is reset per request so it tracks whether the
+    request is safe to read from a replica & if it has written
+    anything yet.
+    """
 
     def __init__(self):
 
-        self.conn = CONNECT.connect()
+        self.txn = None
 
         super(Store, self).__init__()
 
+    def reset(self):
+        """ Reset the per-request state so the store can be reused
+
+        A transaction left open by the last request is rolled
+        back so its connection is returned to the pool.
+        """
+
+        if self.txn is not None:
+            self._finish('ROLLBACK')
+
+        req = getattr(goldman.sess, 'req', None)
+
+        self.replica_reads = getattr(req, 'method', None) in SAFE_METHODS
+        self.wrote = False
+
+        super(Store, self).reset()
+
     @staticmethod
     def dirty_cols(model):
         """ Get the models dirty columns in a friendly SQL format
@@ -143,159 +233,315 @@ class Store(BaseStore):
         return cols or None
 
     @staticmethod
-    def filters_query(filters):
+    def filters_query(filters, table):
         """ Turn the tuple of filters into SQL WHERE statements
 
         The key (column name) & operator have already been vetted
         so they can be trusted but the value could still be evil
         so it MUST be a parameterized input!
 
-        That is done by creating a param dict where they key name
-        & val look like:
+        The statement is compiled once per distinct shape of
+        filters & cached. See the postgres.filters module for
+        the gory details.
+
+        :return: tuple (string, dict)
+        """
 
-            '{}_{}'.format(key, oper): val
+        compiled = compile_filters(filters, table)
 
-        The key is constructed the way it is to ensure uniqueness,
-        if we just used the key name then it could get clobbered.
+        return compiled.stmt, compiled.params(filters)
 
-        Ultimately the WHERE statement will look something like:
+    @staticmethod
+    def pages_query(pages):
+        """ Turn the tuple of pages into a SQL LIMIT/OFFSET query """
 
-            age >= {age_gte}
+        try:
+            return ' OFFSET {0} LIMIT {1}'.format(pages.offset, pages.limit)
+        except AttributeError:
+            return ''
 
-        where age_gte is the key name in the param dict with a
-        value of the evil user input. In the end, a string
-        statement & dict param are returned as a tuple if any
-        filters were provided otherwise None.
+    @staticmethod
+    def pseudo_sorts_query(filters, table):
+        """ Return a dict of the pseudo sort fields to SQL
 
-        :return: tuple (string, dict)
+        These are the RANK_SORT & DISTANCE_SORT expressions of
+        the filters using the same parameters as the
+        filters_query.
         """
 
-        def _cast_val(filtr):
-            """ Perform any needed casting on the filter value
+        return compile_filters(filters, table).sorts
 
-            This could be tasks like including '%' signs at
-            certain anchor points based on the filter or
-            even wrapping it in certain functions.
-            """
-
-            val = filtr.val
+    @staticmethod
+    def sorts_query(sortables, pseudo=None):
+        """ Turn the Sortables into a SQL ORDER BY query
 
-            if filtr.oper in ('contains', 'icontains'):
-                val = '%' + filtr.val + '%'
-            elif filtr.oper == 'endswith':
-                val = '%' + filtr.val
-            elif filtr.oper == 'startswith':
-                val = filtr.val + '%'
+        The goldman.config.RANK_SORT & DISTANCE_SORT pseudo
+        fields sort by the expressions in the pseudo dict & are
+        skipped if missing.
+        """
 
-            return val
+        pseudo = pseudo or {}
+        stmts = []
 
-        def _filter(filtr):
-            """ Process each individual Filter object """
+        for sortable in sortables:
+            field = sortable.field
 
-            oper = FILTER_TABLE[filtr.oper]
-            prop = '{field}_{oper}'.format(
-                field=filtr.field.replace('.', '_'),
-                oper=filtr.oper,
-            )
+            if field in (goldman.config.DISTANCE_SORT,
+                         goldman.config.RANK_SORT):
+                if field not in pseudo:
+                    continue
+                field = pseudo[field]
 
-            if isinstance(filtr, FilterRel):
-                stmt = _filter_rel(filtr, oper, prop)
+            if sortable.desc:
+                stmts.append('{} DESC'.format(field))
             else:
-                stmt = '{field} {oper} %({prop})s'.format(
-                    field=filtr.field,
-                    oper=oper,
-                    prop=prop,
-                )
+                stmts.append('{} ASC'.format(field))
+
+        if not stmts:
+            return ''
+
+        return ' ORDER BY {}'.format(', '.join(stmts))
+
+    @staticmethod
+    def to_pg(model):
+        """ Invoke the models to_primitive properly for pg """
+
+        return model.to_primitive(context={
+            'datetime_date': True,
+            'rel_ids': True,
+        })
 
-            return stmt, {prop: _cast_val(filtr)}
+    def begin(self):
+        """ Start a unit of work
 
-        def _filter_or(filters):
-            """ Given a FilterOr object return a SQL query """
+        Nothing is sent to the database until the first write.
+        Reads before then are routed like they otherwise would.
+        """
 
-            param = {}
-            stmts = []
+        self.queued = []
 
-            for filtr in filters:
-                vals = _filter(filtr)
+    def commit(self):
+        """ Flush the queued models & commit the unit of work
 
-                param.update(vals[1])
-                stmts.append(vals[0])
+        Signal handlers may queue more models while the queued
+        ones are flushed so the queue is flushed until it's
+        empty.
 
-            stmt = ' OR '.join(stmts)
-            stmt = '({})'.format(stmt)
+        If nothing was written yet & the flush is a single
+        statement, it's sent on its own without the BEGIN &
+        COMMIT round trips since a lone statement is atomic. It
+        can only be known to be alone if no post_* save handlers
+        are connected that could queue more after it.
+        """
 
-            return stmt, param
+        try:
+            while self.queued:
+                groups = self.flush_order(self.queued)
+                lone = self.txn is None and len(groups) == 1 and \
+                    not any(sig.receivers for sig in POST_SAVE_SIGNALS)
 
-        def _filter_rel(rel, oper, prop):
-            """ Given a FilterRel object return a SQL sub query """
+                self.queued = []
+                self._flush(groups, lone=lone)
 
-            stmt = """
-                   {field} IN (SELECT {foreign_field} FROM {foreign_rtype}
-                               WHERE {foreign_filter} {oper} %({prop})s)
-                   """
+            self.queued = None
 
-            return stmt.format(
-                field=rel.local_field,
-                foreign_field=rel.foreign_field,
-                foreign_filter=rel.foreign_filter,
-                foreign_rtype=rel.foreign_rtype,
-                oper=oper,
-                prop=prop,
-            )
+            if self.txn is not None:
+                self._finish('COMMIT')
+        except BaseException:
+            self.rollback()
+            raise
+
+    def rollback(self):
+        """ Discard the queued models & rollback the unit of work """
+
+        self.identity = {}
+        self.queued = None
+
+        if self.txn is not None:
+            self._finish('ROLLBACK')
+
+    def flush(self):
+        """ Save the queued models now within the unit of work
+
+        Useful when the responder needs the queued models to
+        have been written, like to get their resource ids.
+        """
+
+        groups = self.flush_order(self.queued or [])
+
+        if self.queued is not None:
+            self.queued = []
+
+        self._flush(groups)
+
+    def _flush(self, groups, lone=False):
+        """ Save the groups of models with a statement per group
+
+        :param lone:
+            boolean if a single group is the last statement of
+            the unit of work so it can skip the BEGIN, unless the
+            pre_* handlers queue more
+        """
+
+        for group in groups:
+            group = [model for model in group if model.dirty]
+
+            if not group:
+                continue
+
+            for model in group:
+                op = 'create' if model.rid_value is None else 'update'
+
+                metrics.store_ops.inc((op, model.RTYPE))
+                getattr(signals, 'pre_' + op).send(model.__class__,
+                                                  model=model)
+                signals.pre_save.send(model.__class__, model=model)
+
+            query, param = self.flush_query(group)
+
+            if query is None:
+                continue
+
+            if lone and not self.queued:
+                self.queued = None
+
+            try:
+                rows = self.query(query, param=param)
+            finally:
+                if self.queued is None:
+                    self.queued = []
 
+            for row in rows:
+                model = group[row.pop('_uow')]
+                op = 'create' if model.rid_value is None else 'update'
+
+                model.merge(row, clean=True)
+                self.identity_set(model)
+
+                getattr(signals, 'post_' + op).send(model.__class__,
+                                                   model=model)
+                signals.post_save.send(model.__class__, model=model)
+
+    def flush_query(self, models):
+        """ Return the SQL to create or update the models at once
+
+        Each model is written by its own data modifying CTE &
+        the RETURNING rows of them all are selected with the
+        `_uow` index of the model in the list:
+
+            WITH w0 AS (INSERT INTO ... RETURNING ...),
+                 w1 AS (UPDATE ... RETURNING ...)
+            SELECT 0 AS _uow, * FROM w0
+            UNION ALL SELECT 1 AS _uow, * FROM w1;
+
+        The models must be of the same resource type. An update
+        without any column changes, like only to-many changes, is
+        skipped & an insert without any uses DEFAULT VALUES.
+
+        :return: tuple (string, dict) with a None query if there's
+            nothing to write
+        """
+
+        ctes = []
         param = {}
-        stmts = []
+        selects = []
+
+        for idx, model in enumerate(models):
+            prefix = 'w%s_' % idx
+            values = self.to_pg(model)
+            dirty = [f for f in model.dirty_fields if f not in model.to_many]
 
-        for filtr in filters:
-            if isinstance(filtr, FilterOr):
-                vals = _filter_or(filtr)
+            if not dirty and model.rid_value is not None:
+                continue
+
+            param.update({prefix + field: values[field] for field in dirty})
+
+            if not dirty:
+                stmt = 'INSERT INTO {table} DEFAULT VALUES'
+            elif model.rid_value is None:
+                stmt = 'INSERT INTO {table} ({cols}) VALUES ({vals})'
             else:
-                vals = _filter(filtr)
+                param[prefix + 'rid_value'] = values[model.rid_field]
+                stmt = 'UPDATE {table} SET {sets} ' \
+                       'WHERE {rid_field} = %({prefix}rid_value)s'
+
+            stmt = stmt.format(
+                cols=', '.join(dirty),
+                prefix=prefix,
+                rid_field=model.rid_field,
+                sets=', '.join('{0} = %({1}{0})s'.format(field, prefix)
+                               for field in dirty),
+                table=model.RTYPE,
+                vals=', '.join('%({}{})s'.format(prefix, field)
+                               for field in dirty),
+            )
 
-            param.update(vals[1])
-            stmts.append(vals[0])
+            ctes.append('w{} AS ({} RETURNING {})'.format(
+                idx, stmt, self.field_cols(model)))
+            selects.append('SELECT {0} AS _uow, * FROM w{0}'.format(idx))
 
-        if stmts:
-            stmt = ' AND '.join(stmts)
-            stmt = ' WHERE ' + stmt
+        if not ctes:
+            return None, param
 
-        return stmt, param
+        query = 'WITH {} {};'.format(', '.join(ctes), ' UNION ALL '.join(
+            selects))
 
-    @staticmethod
-    def pages_query(pages):
-        """ Turn the tuple of pages into a SQL LIMIT/OFFSET query """
+        return query, param
 
-        try:
-            return ' OFFSET {0} LIMIT {1}'.format(pages.offset, pages.limit)
-        except AttributeError:
-            return ''
+    def aggregate(self, rtype, field, vals, aggregates):
+        """ Return the aggregates of the rows grouped by a field
 
-    @staticmethod
-    def sorts_query(sortables):
-        """ Turn the Sortables into a SQL ORDER BY query """
+        A single query grouped by the field with a column per
+        aggregate named like the Aggregate, `year__max` or
+        `count`. The static `search_filters` & `search_query` of
+        the model apply just like a search.
 
-        stmts = []
+        :return: dict
+        """
 
-        for sortable in sortables:
-            if sortable.desc:
-                stmts.append('{} DESC'.format(sortable.field))
-            else:
-                stmts.append('{} ASC'.format(sortable.field))
+        model = rtype_to_model(rtype)
+        cols = ['{} AS _group'.format(field)]
 
-        return ' ORDER BY {}'.format(', '.join(stmts))
+        for agg in aggregates:
+            expr = agg.field or '*'
+            cols.append('{}({}) AS {}'.format(agg.oper, expr, agg))
 
-    @staticmethod
-    def to_pg(model):
-        """ Invoke the models to_primitive properly for pg """
+        filters = [Filter(field, 'in', tuple(vals))]
+        filters += getattr(model, 'search_filters', []) or []
+        where, param = self.filters_query(filters, rtype)
 
-        return model.to_primitive(context={
-            'datetime_date': True,
-            'rel_ids': True,
-        })
+        model_query = getattr(model, 'search_query', '') or ''
+        if model_query:
+            where += ' AND ' + model_query
+
+        query = """
+                SELECT {cols}
+                FROM {table}
+                {where}
+                GROUP BY {field};
+                """
+
+        query = query.format(
+            cols=', '.join(cols),
+            field=field,
+            table=rtype,
+            where=where,
+        )
+
+        metrics.store_ops.inc(('aggregate', rtype))
+
+        groups = {}
+
+        for row in self.query(query, param=param, read=True):
+            row = dict(row)
+            groups[unicode(row.pop('_group'))] = row
+
+        return groups
 
     def create(self, model):
         """ Given a model object instance create it """
 
+        metrics.store_ops.inc(('create', model.rtype))
         signals.pre_create.send(model.__class__, model=model)
         signals.pre_save.send(model.__class__, model=model)
 
@@ -318,11 +564,27 @@ class Store(BaseStore):
         signals.post_create.send(model.__class__, model=model)
         signals.post_save.send(model.__class__, model=model)
 
-        return model.merge(result[0], clean=True)
+        model.merge(result[0], clean=True)
+
+        return self.identity_set(model)
+
+    def create_many(self, models):
+        """ Given a list of model object instances create them
+
+        They're all written by a single flush_query statement so
+        either all or none of them are created.
+
+        :return: list of the models
+        """
+
+        self._flush([models])
+
+        return models
 
     def delete(self, model):
         """ Given a model object instance delete it """
 
+        metrics.store_ops.inc(('delete', model.rtype))
         signals.pre_delete.send(model.__class__, model=model)
 
         param = {'rid_value': self.to_pg(model)[model.rid_field]}
@@ -339,6 +601,7 @@ class Store(BaseStore):
         )
 
         result = self.query(query, param=param)
+        self.identity_discard(model)
 
         signals.post_delete.send(model.__class__, model=model)
 
@@ -353,10 +616,25 @@ class Store(BaseStore):
 
         WARN: This isn't for complex queries! Use search() instead.
 
+        A find by resource id returns the model in the identity
+        map without a query if there is one. The find signals are
+        sent either way.
+
         :return: model or None
         """
 
         model = rtype_to_model(rtype)
+
+        metrics.store_ops.inc(('find', rtype))
+        signals.pre_find.send(model.__class__, model=model)
+
+        if key == model.rid_field:
+            found = self.identity_get(rtype, val)
+
+            if found is not None:
+                signals.post_find.send(model.__class__, model=found)
+                return found
+
         param = {'key': key, 'val': val}
         query = """
                 SELECT {cols} FROM {table}
@@ -369,42 +647,159 @@ class Store(BaseStore):
             table=rtype,
         )
 
-        signals.pre_find.send(model.__class__, model=model)
-
-        result = self.query(query, param=param)
+        result = self.query(query, param=param, read=True)
         if result:
-            result = model(result[0])
+            with phase('hydrate'):
+                result = self.hydrate(model, result)[0]
             signals.post_find.send(model.__class__, model=result)
 
         return result or None
 
-    def query(self, query, param=None):
+    def probe(self, rtype, field, vals):
+        """ Return the values of the field that rows exist with
+
+        A single query selecting only the field of the matching
+        rows.
+
+        :return: list of values
+        """
+
+        query = """
+                SELECT {field} FROM {table}
+                WHERE {field} = ANY(%(vals)s);
+                """
+
+        query = query.format(field=field, table=rtype)
+
+        metrics.store_ops.inc(('exists', rtype))
+
+        result = self.query(query, param={'vals': list(vals)}, read=True)
+
+        return [row[field] for row in result]
+
+    def query(self, query, param=None, read=False):
         """ Perform a SQL based query
 
         This will abort on a failure to communicate with
-        the database.
+        the database. Every query is recorded in the query
+        statistics & slow ones are logged.
+
+        Reads are sent to a replica if the request allows it. A
+        replica that can't be reached is marked unhealthy & the
+        read is retried on the primary.
+
+        Within a unit of work the first write begins a
+        transaction on a primary connection held until the
+        commit or rollback & every later query uses it too.
+
+        No query is started once the deadline of the request
+        has passed.
 
         :query: string query
         :params: parameters for the query
+        :read: boolean if the query only reads
         :return: RecordList from psycopg2
         """
 
-        with self.conn.cursor() as curs:
-            print 'XXX QUERY', curs.mogrify(query, param)
-            try:
-                curs.execute(query, param)
-            except BaseException as exc:
-                msg = 'query: {}, param: {}, exc: {}'.format(query, param, exc)
+        deadline_helpers.check()
+
+        if not read:
+            self.wrote = True
+
+        begin = self.txn is None and self.queued is not None and not read
+
+        if begin or self.txn is not None:
+            pool = CONNECT.primary
+        else:
+            pool = CONNECT.route(read=self.replica_reads and not self.wrote)
+
+        with phase('db'):
+            while True:
+                try:
+                    if begin:
+                        self.txn = pool.getconn()
+
+                    if self.txn is not None:
+                        result, fprint = self._execute(self.txn, query,
+                                                       param, pool,
+                                                       begin=begin)
+                    else:
+                        with pool.connection() as conn:
+                            result, fprint = self._execute(conn, query,
+                                                           param, pool)
+                    break
+                except PoolBusy as exc:
+                    if pool is not CONNECT.primary:
+                        pool = CONNECT.primary
+                        continue
+
+                    handle_exc(exc)
+                except DISCONNECTS as exc:
+                    canceled = getattr(exc, 'pgcode', None) == CANCELED
+
+                    if pool is not CONNECT.primary and not canceled:
+                        pool.healthy = False
+                        pool = CONNECT.primary
+                        continue
+
+                    STATS.record_error(query, param, exc)
+                    handle_exc(exc)
+                except BaseException as exc:
+                    STATS.record_error(query, param, exc)
+                    handle_exc(exc)
+
+        signals.post_query.send(self.__class__, fingerprint=fprint)
 
-                if hasattr(exc, 'pgcode'):
-                    msg = '{}, exc code: {}'.format(msg, exc.pgcode)
+        return result
 
-                print msg
-                handle_exc(exc)
+    @staticmethod
+    def _execute(conn, query, param, pool, begin=False):
+        """ Execute the query on the connection
 
-            result = curs.fetchall()
+        The query is watched so it's cancelled at the deadline.
+        A BEGIN is sent along with the query, rather than on its
+        own, to save a round trip. A slow query is explained on
+        another connection of the pool it came from.
 
-        return result
+        :return: tuple of the RecordList & the query fingerprint
+        """
+
+        deadline = deadline_helpers.deadline()
+        stmt = 'BEGIN; ' + query if begin else query
+
+        with conn.cursor() as curs:
+            start = time.time()
+
+            with WATCHDOG.watch(conn, deadline):
+                curs.execute(stmt, param)
+                result = curs.fetchall()
+
+            fprint = STATS.record(query, param, time.time() - start,
+                                  pool=pool)
+
+        return result, fprint
+
+    def _finish(self, stmt):
+        """ COMMIT or ROLLBACK the transaction & release its connection
+
+        A connection that fails to finish is discarded since
+        its state is unknown.
+        """
+
+        conn, self.txn = self.txn, None
+        close = False
+
+        try:
+            with conn.cursor() as curs:
+                curs.execute(stmt)
+        except psycopg2.Error as exc:
+            close = True
+            STATS.record_error(stmt, None, exc)
+
+            if stmt == 'COMMIT':
+                handle_exc(exc)
+        finally:
+            CONNECT.primary.putconn(conn, close=close)
 
     def search(self, rtype, **kwargs):
         """ Search for the model by assorted criteria
@@ -425,9 +820,7 @@ class Store(BaseStore):
         model = rtype_to_model(rtype)
         param = {}
         pages = self.pages_query(kwargs.get('pages'))
-        sorts = self.sorts_query(kwargs.get(
-            'sorts', [Sortable(goldman.config.SORT)]
-        ))
+        pseudo = None
 
         query = """
                 SELECT {cols}, count(*) OVER() as _count
@@ -442,7 +835,8 @@ class Store(BaseStore):
         filters += getattr(model, 'search_filters', []) or []
 
         if filters:
-            where, param = self.filters_query(filters)
+            where, param = self.filters_query(filters, rtype)
+            pseudo = self.pseudo_sorts_query(filters, rtype)
             query += where
 
         model_query = getattr(model, 'search_query', '') or ''
@@ -452,13 +846,18 @@ class Store(BaseStore):
             model_query = ' WHERE ' + model_query
 
         query += model_query
-        query += sorts
+        query += self.sorts_query(kwargs.get(
+            'sorts', [Sortable(goldman.config.SORT)]
+        ), pseudo=pseudo)
         query += pages
 
+        metrics.store_ops.inc(('search', rtype))
         signals.pre_search.send(model.__class__, model=model)
 
-        result = self.query(query, param=param)
-        models = [model(res) for res in result]
+        result = self.query(query, param=param, read=True)
+
+        with phase('hydrate'):
+            models = self.hydrate(model, result)
 
         if models:
             signals.post_search.send(model.__class__, models=result)
@@ -472,6 +871,7 @@ class Store(BaseStore):
     def update(self, model):
         """ Given a model object instance update it """
 
+        metrics.store_ops.inc(('update', model.rtype))
         signals.pre_update.send(model.__class__, model=model)
         signals.pre_save.send(model.__class__, model=model)
 
@@ -498,4 +898,134 @@ class Store(BaseStore):
         signals.post_update.send(model.__class__, model=model)
         signals.post_save.send(model.__class__, model=model)
 
-        return model.merge(result[0], clean=True)
+        model.merge(result[0], clean=True)
+
+        return self.identity_set(model)
+
+    def upsert_many(self, models, conflict_fields, unchanged=None):
+        """ Create the models or update the ones they conflict with
+
+        All of the models are written by a single statement. See
+        the base store & upsert_query for the details.
+
+        :return:
+            list of True if created, False if updated, or None if
+            not updated due to the unchanged fields per model
+        """
+
+        results = [None] * len(models)
+
+        if not models:
+            return results
+
+        for model in models:
+            metrics.store_ops.inc(('upsert', model.RTYPE))
+            signals.pre_upsert.send(model.__class__, model=model)
+            signals.pre_save.send(model.__class__, model=model)
+
+        query, param = self.upsert_query(models, conflict_fields, unchanged)
+        supplied = [model.rid_value is not None for model in models]
+
+        for row in self.query(query, param=param):
+            idx = row.pop('_uow')
+            results[idx] = row.pop('_created')
+            model = models[idx]
+
+            model.merge(row, clean=True)
+            self.identity_set(model)
+
+            signals.post_upsert.send(model.__class__, model=model)
+            signals.post_save.send(model.__class__, model=model)
+
+        if any(created and rid for created, rid in zip(results, supplied)):
+            self.advance_seq(models[0])
+
+        return results
+
+    def advance_seq(self, model):
+        """ Move the rid sequence past the resource ids in the table
+
+        A row created with a resource id of its own, like by a
+        PUT, leaves the serial sequence behind so a later create
+        would collide with it. The sequence never moves backwards
+        since its nextval is part of the GREATEST. Tables whose
+        rid isn't a serial are left alone.
+        """
+
+        query = """
+                SELECT setval(s.seq::regclass,
+                              GREATEST(m.rid, nextval(s.seq::regclass)))
+                FROM (SELECT pg_get_serial_sequence('{table}', '{rid_field}')
+                      AS seq) s,
+                     (SELECT max({rid_field}) AS rid FROM {table}) m
+                WHERE s.seq IS NOT NULL;
+                """
+
+        query = query.format(rid_field=model.rid_field, table=model.rtype)
+
+        self.query(query)
+
+    def upsert_query(self, models, conflict_fields, unchanged=None):
+        """ Return the SQL to upsert the models at once
+
+        Each model is written by its own data modifying CTE like
+        the flush_query:
+
+            WITH w0 AS (
+                INSERT INTO {table} AS t ({cols}) VALUES ({vals})
+                ON CONFLICT ({conflict_fields})
+                DO UPDATE SET {upsert_field} = EXCLUDED.{upsert_field}
+                WHERE t.{unchanged} IS NOT DISTINCT FROM
+                      EXCLUDED.{unchanged}
+                RETURNING {cols}, xmax = 0 AS _created
+            ), ...
+
+        A freshly inserted row is the only kind without an xmax
+        which tells a create from an update. If there's nothing
+        to update the conflict fields are set to themselves so
+        the existing row is still returned.
+
+        The models must be of the same resource type.
+
+        :return: tuple (string, dict)
+        """
+
+        ctes = []
+        param = {}
+        selects = []
+
+        for idx, model in enumerate(models):
+            prefix = 'w%s_' % idx
+            values = self.to_pg(model)
+            dirty = [f for f in model.dirty_fields if f not in model.to_many]
+            sets = self.upsert_fields(model, conflict_fields) or \
+                conflict_fields[:1]
+
+            param.update({prefix + field: values[field] for field in dirty})
+
+            stmt = 'INSERT INTO {table} AS t ({cols}) VALUES ({vals}) ' \
+                   'ON CONFLICT ({conflicts}) DO UPDATE SET {sets}'
+
+            if unchanged:
+                stmt += ' WHERE ' + ' AND '.join(
+                    't.{0} IS NOT DISTINCT FROM EXCLUDED.{0}'.format(field)
+                    for field in unchanged)
+
+            stmt = stmt.format(
+                cols=', '.join(dirty),
+                conflicts=', '.join(conflict_fields),
+                sets=', '.join('{0} = EXCLUDED.{0}'.format(field)
+                               for field in sets),
+                table=model.RTYPE,
+                vals=', '.join('%({}{})s'.format(prefix, field)
+                               for field in dirty),
+            )
+
+            ctes.append('w{} AS ({} RETURNING {}, xmax = 0 AS _created)'
+                        .format(idx, stmt, self.field_cols(model)))
+            selects.append('SELECT {0} AS _uow, * FROM w{0}'.format(idx))
+
+        query = 'WITH {} {};'.format(', '.join(ctes), ' UNION ALL '.join(
+            selects))
+
+        return query, param
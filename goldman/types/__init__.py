@@ -3,27 +3,32 @@
     ~~~~~
 
     All of our custom schematics model types.
+
+    They're imported on first use, see utils.lazy.
 """
 
-from ..types.datetime import Type as DateTimeType
-from ..types.latitude import Type as LatitudeType
-from ..types.longitude import Type as LongitudeType
-from ..types.phonenumber import Type as PhoneNumberType
-from ..types.resource import Type as ResourceType
-from ..types.state import Type as StateType
-from ..types.to_many import Type as ToManyType
-from ..types.to_one import Type as ToOneType
-from ..types.zipcode import Type as ZipCodeType
+from goldman.utils.lazy import lazy_module
 
 
-TYPES = [
-    DateTimeType,
-    LatitudeType,
-    LongitudeType,
-    PhoneNumberType,
-    ResourceType,
-    StateType,
-    ToManyType,
-    ToOneType,
-    ZipCodeType,
-]
+lazy_module(__name__, {
+    'DateTimeType': ('.datetime', 'Type'),
+    'LatitudeType': ('.latitude', 'Type'),
+    'LongitudeType': ('.longitude', 'Type'),
+    'PhoneNumberType': ('.phonenumber', 'Type'),
+    'ResourceType': ('.resource', 'Type'),
+    'StateType': ('.state', 'Type'),
+    'ToManyType': ('.to_many', 'Type'),
+    'ToOneType': ('.to_one', 'Type'),
+    'ZipCodeType': ('.zipcode', 'Type'),
+    'TYPES': [
+        'DateTimeType',
+        'LatitudeType',
+        'LongitudeType',
+        'PhoneNumberType',
+        'ResourceType',
+        'StateType',
+        'ToManyType',
+        'ToOneType',
+        'ZipCodeType',
+    ],
+})
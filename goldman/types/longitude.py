@@ -9,7 +9,16 @@ from schematics.types import DecimalType
 
 
 class Type(DecimalType):
-    """ Longitude field with validation """
+    """ Longitude field with validation
+
+    Pair it with a LatitudeType field of the same `geo` name to
+    filter on both with the geo filter operators like:
+
+        lat = LatitudeType(geo='loc')
+        lon = LongitudeType(geo='loc')
+
+        filter[loc__near]=40.7,-74.0,5000
+    """
 
     def __init__(self, **kwargs):
 
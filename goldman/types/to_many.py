@@ -8,6 +8,7 @@
 """
 
 import goldman
+import goldman.signals as signals
 
 from goldman.queryparams.filter import Filter
 from schematics.types import BaseType
@@ -20,11 +21,15 @@ class ToMany(object):
     store uses the is_loaded property rather than simply
     checking the models attribute. This is to needed when
     a load has been done but no models exist.
+
+    The name is the relationship field name on the model
+    owning the relationship & is purely informational.
     """
 
-    def __init__(self, rtype, field, rid):
+    def __init__(self, rtype, field, rid, name=None):
 
         self.field = field
+        self.name = name
         self.rtype = rtype
         self.rid = rid
 
@@ -63,7 +68,12 @@ class ToMany(object):
         store = goldman.sess.store
 
         self._is_loaded = True
-        self.models = store.search(self.rtype, filters=filters)
+
+        signals.pre_load.send(self.__class__, rel=self)
+        try:
+            self.models = store.search(self.rtype, filters=filters)
+        finally:
+            signals.post_load.send(self.__class__, rel=self)
 
         return self.models
 
@@ -94,7 +104,8 @@ class Type(BaseType):
         if isinstance(value, ToMany):
             return value
         else:
-            return ToMany(self.rtype, self.field, value)
+            name = getattr(self, 'name', None)
+            return ToMany(self.rtype, self.field, value, name=name)
 
     def to_primitive(self, value, context=None):
         """ Schematics serializer override
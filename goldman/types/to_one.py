@@ -9,6 +9,7 @@
 """
 
 import goldman
+import goldman.signals as signals
 import goldman.validators as validators
 
 from schematics.exceptions import ValidationError
@@ -22,11 +23,15 @@ class ToOne(object):
     store uses the is_loaded property rather than simply
     checking the model attribute. This is to needed when
     a load has been done but no model exists.
+
+    The name is the relationship field name on the model
+    owning the relationship & is purely informational.
     """
 
-    def __init__(self, rtype, field, rid=None):
+    def __init__(self, rtype, field, rid=None, name=None):
 
         self.field = field
+        self.name = name
         self.rtype = rtype
         self.rid = rid
 
@@ -62,6 +67,19 @@ class ToOne(object):
 
         return self._is_loaded
 
+    def exists(self):
+        """ Return True if the related model exists
+
+        It's answered by the loaded model if there was a load
+        attempt. Otherwise the store checks without loading it.
+        """
+
+        if self.is_loaded:
+            return self.model is not None
+
+        store = goldman.sess.store
+        return store.exists(self.rtype, self.field, self.rid)
+
     def load(self):
         """ Return the model from the store """
 
@@ -69,7 +87,11 @@ class ToOne(object):
             store = goldman.sess.store
             self._is_loaded = True
 
-            self.model = store.find(self.rtype, self.field, self.rid)
+            signals.pre_load.send(self.__class__, rel=self)
+            try:
+                self.model = store.find(self.rtype, self.field, self.rid)
+            finally:
+                signals.post_load.send(self.__class__, rel=self)
 
         return self.model
 
@@ -108,7 +130,9 @@ class Type(BaseType):
             return value
 
         value = self._cast_rid(value)
-        return ToOne(self.rtype, self.field, rid=value)
+        name = getattr(self, 'name', None)
+
+        return ToOne(self.rtype, self.field, rid=value, name=name)
 
     def to_primitive(self, value, context=None):
         """ Schematics serializer override
@@ -128,6 +152,6 @@ class Type(BaseType):
             validators.validate_int(value)
 
         if value.rid and not self.skip_exists:
-            if not value.load():
+            if not value.exists():
                 raise ValidationError(self.messages['exists'])
         return value
@@ -0,0 +1,45 @@
+"""
+    utils.deadline_helpers
+    ~~~~~~~~~~~~~~~~~~~~~~
+
+    Helpers for the request deadline set on goldman.sess by the
+    DeadlineMiddleware.
+
+    The deadline is an absolute epoch timestamp or None if the
+    request doesn't have one.
+"""
+
+import goldman
+import goldman.exceptions as exceptions
+import time
+
+from goldman import metrics
+from goldman.utils.error_helpers import abort
+
+
+def deadline():
+    """ Return the epoch deadline of the current request or None """
+
+    return getattr(goldman.sess, 'deadline', None)
+
+
+def exceeded():
+    """ Count the exceeded deadline & abort with a 504 """
+
+    route = getattr(goldman.sess, 'resource', None)
+    route = getattr(route, 'route', None) or 'none'
+
+    metrics.deadlines_exceeded.inc((route,))
+    abort(exceptions.DeadlineExceeded)
+
+
+def check():
+    """ Abort if the deadline of the current request has passed
+
+    Call it before starting anything expensive.
+    """
+
+    expires = deadline()
+
+    if expires is not None and time.time() >= expires:
+        exceeded()
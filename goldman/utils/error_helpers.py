@@ -6,12 +6,14 @@
     to abort() in the Flask micro-web framework.
 """
 
+import copy
+
 from goldman.exceptions import AccessDenied, ModificationDenied
 from goldman.serializers.jsonapi_error import Serializer as \
     JsonApiErrorSerializer
 
 
-__all__ = ['abort', 'access_fail', 'mod_fail']
+__all__ = ['abort', 'access_fail', 'item_errors', 'mod_fail']
 
 
 def abort(error):
@@ -34,6 +36,36 @@ def access_fail(msg=None):
         abort(AccessDenied)
 
 
+def item_errors(exc, idx):
+    """ Return the errors of an item of a bulk request
+
+    The errors were raised processing a single resource object
+    so their source pointers, relative to `/data`, are changed
+    to point at the item in the `/data` array instead.
+
+    :param exc:
+        JsonApiErrorSerializer raised for the item
+    :param idx:
+        int index of the item in the `/data` array
+    :return:
+        list of error dicts
+    """
+
+    errors = copy.deepcopy(exc.errors)
+
+    for error in errors:
+        source = error.get('source') or {}
+        pointer = source.get('pointer') or '/data'
+
+        if pointer.startswith('/data'):
+            pointer = '/data/%s%s' % (idx, pointer[len('/data'):])
+
+        source['pointer'] = pointer
+        error['source'] = source
+
+    return errors
+
+
 def mod_fail(msg=None):
     """ Simple wrapper around aborting with ModificationDenied """
 
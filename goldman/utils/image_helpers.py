@@ -0,0 +1,207 @@
+"""
+    utils.image_helpers
+    ~~~~~~~~~~~~~~~~~~~
+
+    Helpers making resized & recompressed derivatives of the
+    uploaded images.
+
+    The images are decoded & encoded by the IMAGES process pool
+    so the CPU heavy work doesn't hold the GIL of the API's
+    threads. PIL (or Pillow) is only needed once derivatives
+    are configured & only imported by the pool's processes.
+"""
+
+import goldman
+import goldman.extensions as extensions
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+
+from goldman.utils.s3_helpers import S3Upload
+
+
+def derive(src, spec, dst):
+    """ Save the derivative of the image at src in dst
+
+    The image is shrunk to fit the (width, height) size of the
+    spec keeping its aspect ratio & saved in the format of the
+    spec, or of the image, with the quality of the spec if any.
+
+    This runs in the processes of the IMAGES pool.
+
+    :return:
+        string format the derivative was saved in
+    """
+
+    from PIL import Image  # pylint: disable=import-error
+
+    image = Image.open(src)
+    fmt = (spec.get('format') or image.format).upper()
+
+    if fmt == 'JPEG' and image.mode not in ('L', 'RGB'):
+        image = image.convert('RGB')
+
+    image.thumbnail(spec['size'], Image.ANTIALIAS)
+    image.save(dst, fmt, optimize=True, quality=spec.get('quality', 85))
+
+    return fmt
+
+
+class ImagePool(object):
+    """ multiprocessing pool started on first use
+
+    It has goldman.config.IMAGE_WORKERS processes or one per
+    CPU if that's None.
+    """
+
+    def __init__(self):
+
+        self.lock = threading.Lock()
+        self.pool = None
+
+    def apply(self, func, *args):
+        """ Run the func in a process of the pool
+
+        :return:
+            multiprocessing AsyncResult
+        """
+
+        with self.lock:
+            if self.pool is None:
+                workers = goldman.config.IMAGE_WORKERS
+                self.pool = multiprocessing.Pool(workers)
+
+        return self.pool.apply_async(func, args)
+
+
+IMAGES = ImagePool()
+
+
+class Tee(object):
+    """ A file object writing to an upload & a local copy
+
+    The copy is a named temp file the IMAGES processes can open
+    once the upload is closed. Any other attribute is the one
+    of the upload.
+    """
+
+    def __init__(self, upload):
+
+        self.copy = tempfile.NamedTemporaryFile(
+            delete=False,
+            dir=goldman.config.UPLOAD_DIR,
+        )
+        self.upload = upload
+
+    def __getattr__(self, name):
+
+        return getattr(self.upload, name)
+
+    def abort(self):
+        """ Abort the upload & throw away the copy """
+
+        self.upload.abort()
+        self.discard()
+
+    def close(self):
+        """ Close both the copy & the upload """
+
+        self.copy.close()
+        return self.upload.close()
+
+    def discard(self):
+        """ Throw away the copy """
+
+        self.copy.close()
+
+        try:
+            os.remove(self.copy.name)
+        except OSError:
+            pass
+
+    def send(self):
+        """ Send a spooled upload, discarding the copy on failure """
+
+        try:
+            return self.upload.send()
+        except Exception:
+            self.discard()
+            raise
+
+    def write(self, data):
+        """ Write the data to both the upload & the copy """
+
+        self.upload.write(data)
+        self.copy.write(data)
+
+
+class Derivatives(object):
+    """ Upload job making & sending the derivatives of an image
+
+    The original is a Tee of the upload of the image. Each spec
+    is a dict with a name, a (width, height) size, & optionally
+    a format & a quality.
+
+    A derivative is sent next to the original with the name of
+    its spec appended to the key so the thumb derivative of
+    users/99/photos/<timestamp>.png is sent to:
+
+        users/99/photos/<timestamp>_thumb.<extension>
+    """
+
+    def __init__(self, original, specs):
+
+        self.original = original
+        self.specs = specs
+        self.url = original.url
+
+    def _upload(self, spec, fmt):
+        """ Return the S3Upload of a derivative """
+
+        content_type = 'image/%s' % fmt.lower()
+        ext = extensions.get(content_type) or fmt.lower()
+        path = '%s_%s.%s' % (os.path.splitext(self.original.path)[0],
+                             spec['name'], ext)
+
+        return S3Upload(self.original.acl, self.original.bucket,
+                        self.original.conn, content_type, path,
+                        part_size=self.original.part_size)
+
+    def discard(self):
+        """ Throw away the copy of the original """
+
+        self.original.discard()
+
+    def send(self):
+        """ Make the derivatives & send them to S3
+
+        :return:
+            dict of the S3 generated URLs by spec name
+        """
+
+        src = self.original.copy.name
+        tmp = tempfile.mkdtemp(dir=goldman.config.UPLOAD_DIR)
+        results = []
+        urls = {}
+
+        try:
+            for idx, spec in enumerate(self.specs):
+                dst = os.path.join(tmp, str(idx))
+                results.append((spec, dst, IMAGES.apply(derive, src, spec,
+                                                        dst)))
+
+            for spec, dst, result in results:
+                upload = self._upload(spec, result.get())
+
+                with open(dst, 'rb') as fileobj:
+                    urls[spec['name']] = upload.send_file(fileobj)
+        finally:
+            for _, _, result in results:
+                result.wait()
+
+            shutil.rmtree(tmp, ignore_errors=True)
+            self.discard()
+
+        return urls
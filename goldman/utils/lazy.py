@@ -0,0 +1,87 @@
+"""
+    utils.lazy
+    ~~~~~~~~~~
+
+    Lazy module attributes so packages can expose all of their
+    public names without importing them up front.
+
+    A package replaces itself in sys.modules with a LazyModule
+    at the end of its __init__:
+
+        lazy_module(__name__, {
+            'JsonSerializer': ('.json_7159', 'Serializer'),
+            'SERIALIZERS': ['JsonSerializer'],
+        })
+
+    The heavy optional dependencies, like boto for the S3
+    resources, are then only imported on first use.
+"""
+
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """ Module importing its lazy attributes on first access
+
+    A lazy attribute is either a (module, attr) tuple, where
+    the module may be relative to this one & a None attr is
+    the module itself, or a list of the names of other lazy
+    attributes. Once imported it's cached like any other
+    attribute of the module.
+    """
+
+    def __init__(self, module, lazy):
+
+        super(LazyModule, self).__init__(module.__name__, module.__doc__)
+
+        self.__dict__.update(module.__dict__)
+        self.__dict__['__lazy__'] = lazy
+
+        # python 2 wipes the globals of a collected module
+        self.__dict__['_module'] = module
+
+    def __dir__(self):
+
+        return sorted(set(self.__dict__) | set(self.__lazy__))
+
+    def __getattr__(self, name):
+
+        try:
+            spec = self.__lazy__[name]
+        except KeyError:
+            raise AttributeError('module %s has no attribute %s' %
+                                 (self.__name__, name))
+
+        if isinstance(spec, list):
+            val = [getattr(self, attr) for attr in spec]
+        else:
+            modname, attr = spec
+            val = importlib.import_module(modname, self.__name__)
+            val = getattr(val, attr) if attr else val
+
+        setattr(self, name, val)
+        return val
+
+    @property
+    def __all__(self):
+        """ Every public name, importing them all for `import *` """
+
+        return sorted(name for name in dir(self) if not name.startswith('_'))
+
+
+def lazy_module(name, lazy):
+    """ Replace the module in sys.modules with a LazyModule
+
+    :param name:
+        the __name__ of the module
+    :param lazy:
+        dict of lazy attributes as described by LazyModule
+    :return:
+        LazyModule
+    """
+
+    module = sys.modules[name] = LazyModule(sys.modules[name], lazy)
+
+    return module
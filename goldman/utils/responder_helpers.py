@@ -16,6 +16,7 @@ import goldman
 import goldman.exceptions as exceptions
 
 from goldman.utils.error_helpers import abort, mod_fail
+from goldman.utils.model_helpers import rtype_to_model
 from schematics.types import IntType
 
 
@@ -157,6 +158,8 @@ def from_rest(model, props):
         * purge all fields not allowed as incoming data
         * purge all unknown fields from the incoming data
         * lowercase certain fields that need it
+        * assign the on_create & on_update defaults where
+          the request may create or update the model
         * merge new data with existing & validate
             * mutate the existing model
             * abort on validation errors
@@ -174,6 +177,9 @@ def from_rest(model, props):
         _from_rest_on_create(model, props)
     elif req.is_patching:
         _from_rest_on_update(model, props)
+    elif req.is_putting:
+        _from_rest_on_create(model, props)
+        _from_rest_on_update(model, props)
 
     model.merge(props, validate=True)
 
@@ -196,6 +202,49 @@ def _to_rest_hide(model, props):
             continue
 
 
+def _to_rest_aggregates(models, datas):
+    """ Add the requested aggregates of the to_manys to the props
+
+    Each to_many is aggregated for all of the models at once
+    with a single store query instead of loading any of the
+    related models. Models without related models get a count
+    of 0 & None for the rest of the aggregates.
+
+    The aggregates are keyed by relationship in a to_many_meta
+    key of the props.
+    """
+
+    aggregates = getattr(goldman.sess.req, 'aggregates', None)
+
+    if not aggregates or not models:
+        return
+
+    for rel, aggs in aggregates.items():
+        if rel not in models[0].to_many:
+            continue
+
+        field = getattr(models[0], '_fields')[rel]
+        fields = getattr(rtype_to_model(field.rtype), '_fields')
+        rids = [getattr(getattr(model, rel), 'rid', None)
+                for model in models]
+        groups = goldman.sess.store.aggregate(
+            field.rtype, field.field, [rid for rid in rids if rid], aggs)
+
+        for rid, data in zip(rids, datas):
+            group = groups.get(unicode(rid), {})
+            meta = data['to_many_meta'][rel] = {}
+
+            for agg in aggs:
+                val = group.get(str(agg))
+
+                if agg.oper == 'count':
+                    val = val or 0
+                elif val is not None:
+                    val = fields[agg.field].to_primitive(val)
+
+                meta[str(agg)] = val
+
+
 def _to_rest_includes(models, includes):
     """ Fetch the models to be included
 
@@ -248,10 +297,12 @@ def _to_rest_rels(model, props):
     """ Move the relationships to appropriate location in the props
 
     All to_ones should be in a to_one key while all to_manys
-    should be in a to_many key.
+    should be in a to_many key. The meta of the to_manys, if
+    any, is added to the to_many_meta key later.
     """
 
     props['to_many'] = {}
+    props['to_many_meta'] = {}
     props['to_one'] = {}
 
     for key in model.to_one:
@@ -311,6 +362,8 @@ def to_rest_model(model, includes=None):
     props['data'] = _to_rest(model, includes=includes)
     props['included'] = _to_rest_includes(model, includes=includes)
 
+    _to_rest_aggregates([model], [props['data']])
+
     return props
 
 
@@ -331,4 +384,6 @@ def to_rest_models(models, includes=None):
 
     props['included'] = _to_rest_includes(models, includes=includes)
 
+    _to_rest_aggregates(models, props['data'])
+
     return props
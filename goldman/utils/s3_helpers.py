@@ -6,10 +6,97 @@
 
     These interfaces are mostly used by our S3 resource &
     responders but any app could use these as well.
+
+    Each thread reuses its S3 connections, their keep-alive
+    HTTP connections & bucket handles across requests so an
+    upload doesn't pay for the connection setup, TLS handshake
+    & a bucket lookup before sending any bytes.
+
+    Uploads can also be spooled to disk & sent in the background
+    by the UPLOADS queue so the API thread isn't held for the
+    whole S3 transfer.
 """
 
-from boto.s3.connection import S3Connection
+import base64
+import goldman
+import hashlib
+import httplib
+import logging
+import Queue
+import tempfile
+import threading
+import time
+import uuid
+
+from boto.exception import BotoServerError
+from boto.s3.connection import OrdinaryCallingFormat, S3Connection
 from boto.s3.key import Key
+from collections import deque
+from cStringIO import StringIO
+
+
+LOG = logging.getLogger('goldman.upload')
+_LOCAL = threading.local()
+
+
+class Connection(S3Connection):
+    """ S3Connection caching its bucket handles
+
+    Buckets aren't validated with a round trip to S3 when
+    they're looked up. boto doesn't retry on its own since
+    s3_retry retries the whole call with a bounded backoff.
+    """
+
+    def __init__(self, *args, **kwargs):
+
+        super(Connection, self).__init__(*args, **kwargs)
+
+        self.buckets = {}
+        self.num_retries = 0
+
+    def get_bucket(self, bucket_name, validate=False, headers=None):
+        """ Return the cached handle of the bucket """
+
+        try:
+            return self.buckets[bucket_name]
+        except KeyError:
+            bucket = super(Connection, self).get_bucket(bucket_name,
+                                                        validate, headers)
+            self.buckets[bucket_name] = bucket
+            return bucket
+
+
+def _md5_digests(md5):
+    """ Return the (hex, base64) digests of an md5 boto expects """
+
+    return md5.hexdigest(), base64.b64encode(md5.digest())
+
+
+def s3_retry(func, *args, **kwargs):
+    """ Call func & retry it on transient S3 failures
+
+    5xx responses, request timeouts & network errors are
+    retried up to goldman.config.S3_RETRIES times waiting
+    S3_BACKOFF seconds doubled on each retry.
+    """
+
+    retries = goldman.config.S3_RETRIES or 0
+    attempt = 0
+
+    while True:
+        try:
+            return func(*args, **kwargs)
+        except (BotoServerError, IOError, httplib.HTTPException) as exc:
+            status = getattr(exc, 'status', None)
+            code = getattr(exc, 'error_code', None)
+
+            if attempt >= retries:
+                raise
+            elif status and status < 500 and code != 'RequestTimeout':
+                raise
+
+            time.sleep(goldman.config.S3_BACKOFF * 2 ** attempt)
+            attempt += 1
 
 
 def gen_url(bucket, path):
@@ -19,6 +106,9 @@ def gen_url(bucket, path):
     function may not scale well for the complexities of
     future S3 interactions so be mindful.
 
+    The goldman.config.S3_HOST & S3_PORT stand-in is used
+    instead of AWS if configured.
+
     :param key:
         S3 key as generated in our upload() function
 
@@ -26,13 +116,192 @@ def gen_url(bucket, path):
         A string URL to the object
     """
 
-    return 'https://s3.amazonaws.com/%s/%s' % (bucket, path)
+    config = goldman.config
+    host = config.S3_HOST or 's3.amazonaws.com'
+    scheme = 'https' if config.S3_SECURE else 'http'
+
+    if config.S3_PORT:
+        host = '%s:%s' % (host, config.S3_PORT)
+
+    return '%s://%s/%s/%s' % (scheme, host, bucket, path)
 
 
 def s3_connect(key, secret):
-    """ Create an S3 connection object using boto """
+    """ Return the thread's S3 connection object for the key
+
+    boto connections aren't thread-safe so each thread creates
+    its own per key on first use & reuses it afterwards.
+
+    A goldman.config.S3_HOST stand-in is addressed with path
+    style urls like the ones gen_url generates.
+    """
+
+    conns = _LOCAL.__dict__.setdefault('conns', {})
+
+    try:
+        return conns[(key, secret)]
+    except KeyError:
+        pass
+
+    config = goldman.config
+    kwargs = {'is_secure': config.S3_SECURE, 'port': config.S3_PORT}
+
+    if config.S3_HOST:
+        kwargs['calling_format'] = OrdinaryCallingFormat()
+        kwargs['host'] = config.S3_HOST
+
+    conn = conns[(key, secret)] = Connection(key, secret, **kwargs)
+
+    return conn
+
+
+class S3Upload(object):
+    """ A write only file object streaming to an S3 object
+
+    Writes are buffered until part_size bytes are collected
+    & then sent as one part of an S3 multipart upload, so at
+    most a single part is held in memory. Each part & the
+    whole object are hashed as they're written.
+
+    Objects smaller than a part are sent in a single request
+    instead when closed. The object exists in S3 only once the
+    upload is closed & abort() throws away any parts sent.
+
+    Every request to S3 is retried with s3_retry.
+
+    :raise:
+        IOError or boto's S3ResponseError on any failure
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, acl, bucket, conn, content_type, path,
+                 part_size=None):
+
+        self.acl = acl
+        self.bucket = bucket
+        self.conn = conn
+        self.content_type = content_type
+        self.path = path
+        self.part_size = part_size or goldman.config.S3_PART_SIZE
+
+        self.md5 = hashlib.md5()
+        self.size = 0
+        self.url = None
+
+        self._buf = StringIO()
+        self._bucket = None
+        self._multipart = None
+        self._part_md5 = hashlib.md5()
+        self._part_num = 0
+
+    def _get_bucket(self):
+        """ Return the boto bucket without a round trip """
+
+        if not self._bucket:
+            self._bucket = self.conn.get_bucket(self.bucket, validate=False)
+
+        return self._bucket
+
+    def _send_part(self):
+        """ Send the buffered bytes as the next part """
+
+        if not self._multipart:
+            self._multipart = s3_retry(
+                self._get_bucket().initiate_multipart_upload,
+                self.path,
+                headers={'Content-Type': self.content_type},
+                policy=self.acl,
+            )
+
+        md5 = _md5_digests(self._part_md5)
+        size = self._buf.tell()
+        self._part_num += 1
+
+        def send():
+            """ Send the part from its first byte """
+
+            self._buf.seek(0)
+            self._multipart.upload_part_from_file(
+                self._buf, self._part_num, md5=md5, size=size,
+            )
+
+        s3_retry(send)
+
+        self._buf = StringIO()
+        self._part_md5 = hashlib.md5()
+
+    def abort(self):
+        """ Throw away the buffer & any parts already sent """
+
+        self._buf = StringIO()
 
-    return S3Connection(key, secret)
+        if self._multipart:
+            s3_retry(self._multipart.cancel_upload)
+            self._multipart = None
+
+    def close(self):
+        """ Send the rest of the object & complete the upload
+
+        :return:
+            S3 generated URL of the uploaded object
+        """
+
+        if self.url:
+            return self.url
+        elif self._multipart:
+            if self._buf.tell():
+                self._send_part()
+            s3_retry(self._multipart.complete_upload)
+        else:
+            obj = Key(self._get_bucket())
+            obj.content_type = self.content_type
+            obj.key = self.path
+            s3_retry(obj.set_contents_from_string, self._buf.getvalue(),
+                     md5=_md5_digests(self._part_md5), policy=self.acl)
+
+        self._buf = StringIO()
+        self.url = gen_url(self.bucket, self.path)
+
+        return self.url
+
+    def send_file(self, fileobj):
+        """ Send the whole file object & complete the upload
+
+        The upload is sent with the S3 connection of the thread
+        calling this so it can be sent by another thread than
+        the one that created it.
+
+        :return:
+            S3 generated URL of the uploaded object
+        """
+
+        self.conn = s3_connect(self.conn.aws_access_key_id,
+                               self.conn.aws_secret_access_key)
+        self._bucket = None
+
+        try:
+            while True:
+                chunk = fileobj.read(self.part_size)
+                if not chunk:
+                    break
+                self.write(chunk)
+
+            return self.close()
+        except Exception:
+            self.abort()
+            raise
+
+    def write(self, data):
+        """ Buffer the data & send a part once it's big enough """
+
+        self.md5.update(data)
+        self.size += len(data)
+
+        self._buf.write(data)
+        self._part_md5.update(data)
+
+        if self._buf.tell() >= self.part_size:
+            self._send_part()
 
 
 # pylint: disable=too-many-arguments
@@ -59,12 +328,167 @@ def s3_upload(acl, bucket, conn, content, content_type, path):
         S3 generated URL of the uploaded object
     """
 
-    # obj is the object that will be uploaded
-    obj = Key(conn.get_bucket(bucket))
-    obj.content_type = content_type
-    obj.key = path
+    upload = S3Upload(acl, bucket, conn, content_type, path)
+    upload.write(content)
+
+    return upload.close()
+
+
+class Spool(object):
+    """ A file object spooling an upload to local disk
+
+    The spooled file is sent to the S3Upload later by send(),
+    usually by a worker of the UPLOADS queue. The url is where
+    the object will be once it's sent & any other attribute
+    is the one of the upload.
+    """
+
+    def __init__(self, upload):
+
+        self.file = tempfile.TemporaryFile(dir=goldman.config.UPLOAD_DIR)
+        self.upload = upload
+        self.url = gen_url(upload.bucket, upload.path)
+
+    def __getattr__(self, name):
+
+        return getattr(self.upload, name)
+
+    def abort(self):
+        """ Throw away the spooled file """
+
+        self.file.close()
+
+    def close(self):
+        """ Finish spooling so the file can be sent """
+
+        self.file.flush()
+        self.file.seek(0)
+
+    def send(self):
+        """ Send the spooled file to S3 & throw it away
+
+        :return:
+            S3 generated URL of the uploaded object
+        """
+
+        try:
+            return self.upload.send_file(self.file)
+        finally:
+            self.file.close()
+
+    def write(self, data):
+        """ Spool the data to disk """
+
+        self.file.write(data)
+
+
+class UploadQueue(object):
+    """ Bounded pool of threads sending spooled uploads to S3
+
+    goldman.config.UPLOAD_WORKERS threads are started on the
+    first submit & at most UPLOAD_QUEUE_SIZE uploads wait for
+    them. The status of the last KEEP finished uploads is kept
+    around after they're done.
+
+    An upload is any job with a send() method & the url of
+    what it's sending, like a Spool.
+    """
+
+    KEEP = 1000
+
+    def __init__(self):
+
+        self.finished = deque()
+        self.lock = threading.Lock()
+        self.queue = None
+        self.statuses = {}
+
+    def _finish(self, uid, **status):
+        """ Record the status of a finished upload """
+
+        with self.lock:
+            self.statuses[uid].update(status)
+            self.finished.append(uid)
+
+            while len(self.finished) > self.KEEP:
+                del self.statuses[self.finished.popleft()]
+
+    def _start(self):
+        """ Start the worker threads if they aren't yet """
+
+        with self.lock:
+            if self.queue is None:
+                self.queue = Queue.Queue(goldman.config.UPLOAD_QUEUE_SIZE)
+
+                for _ in range(goldman.config.UPLOAD_WORKERS):
+                    worker = threading.Thread(target=self._work,
+                                              name='goldman-upload')
+                    worker.daemon = True
+                    worker.start()
+
+    def _work(self):
+        """ Send the queued uploads forever """
+
+        while True:
+            uid, job, callback = self.queue.get()
+
+            # pylint: disable=broad-except
+            try:
+                result = job.send()
+            except Exception:
+                LOG.exception('upload failed: %s', job.url)
+                self._finish(uid, status='failed')
+            else:
+                self._finish(uid, status='done')
+
+                try:
+                    if callback:
+                        callback(result)
+                except Exception:
+                    LOG.exception('upload callback failed: %s', job.url)
+            finally:
+                self.queue.task_done()
+
+    def status(self, uid):
+        """ Return a copy of the status dict of an upload or None """
+
+        with self.lock:
+            status = self.statuses.get(uid)
+            return dict(status) if status else None
+
+    def submit(self, job, callback=None):
+        """ Queue the job to be sent to S3 in the background
+
+        The callback is called with the result of its send(),
+        like the URL of the object, by the worker once it's
+        uploaded.
+
+        :raise:
+            Queue.Full if too many uploads are waiting already
+        :return:
+            string id of the upload
+        """
+
+        self._start()
+
+        uid = uuid.uuid4().hex
+        status = {
+            'id': uid,
+            'status': 'pending',
+            'url': job.url,
+        }
+
+        with self.lock:
+            self.statuses[uid] = status
+
+        try:
+            self.queue.put_nowait((uid, job, callback))
+        except Queue.Full:
+            with self.lock:
+                del self.statuses[uid]
+            raise
+
+        return uid
 
-    obj.set_contents_from_string(content)
-    obj.set_acl(acl)
 
-    return gen_url(bucket, path)
+UPLOADS = UploadQueue()
@@ -0,0 +1,190 @@
+"""
+    utils.timing_helpers
+    ~~~~~~~~~~~~~~~~~~~~
+
+    Per-request phase instrumentation.
+
+    When goldman.config.SERVER_TIMING is enabled the API anchors
+    a Timings object on the goldman.sess.timings attribute for
+    the life of each request. Code anywhere in the request path
+    can then time a phase of work with:
+
+        with phase('db'):
+            curs.execute(query, param)
+
+    Each phase keeps a count & cumulative duration so repeated
+    phases like store queries are summed up. Once the response
+    is ready the timings are emitted in a `Server-Timing` header
+    as documented here:
+
+        w3.org/TR/server-timing/
+
+    & a structured per-request record is handed to the callable
+    in goldman.config.TIMING_SINK if one is configured.
+
+    When instrumentation is disabled `phase()` is a no-op.
+"""
+
+import goldman
+import time
+import types
+
+from contextlib import contextmanager
+
+
+__all__ = ['phase', 'Timings', 'TimedMiddleware']
+
+
+class Timings(object):
+    """ Phase timings of a single request
+
+    :param method:
+        string HTTP method of the request
+    :param path:
+        string path of the request
+    """
+
+    def __init__(self, method=None, path=None):
+
+        self.method = method
+        self.path = path
+        self.status = None
+
+        self.phases = {}
+        self.order = []
+        self.start = time.time()
+
+    def __repr__(self):
+
+        name = self.__class__.__name__
+        return '%s(\'%s\', \'%s\')' % (name, self.method, self.path)
+
+    @property
+    def elapsed(self):
+        """ Return the float seconds elapsed since the request began """
+
+        return time.time() - self.start
+
+    def add(self, name, duration):
+        """ Record another occurrence of a phase
+
+        :param name:
+            string phase name
+        :param duration:
+            float seconds the phase took
+        """
+
+        try:
+            stat = self.phases[name]
+            stat[0] += 1
+            stat[1] += duration
+        except KeyError:
+            self.phases[name] = [1, duration]
+            self.order.append(name)
+
+    def to_dict(self):
+        """ Convert the Timings into a structured per-request record
+
+        All durations are in milliseconds.
+
+        :return: dict
+        """
+
+        phases = {}
+
+        for name in self.order:
+            count, duration = self.phases[name]
+            phases[name] = {'count': count, 'dur': duration * 1000}
+
+        return {
+            'method': self.method,
+            'path': self.path,
+            'phases': phases,
+            'status': self.status,
+            'total': self.elapsed * 1000,
+        }
+
+    def to_header(self):
+        """ Convert the Timings into a Server-Timing header value
+
+        Each phase is a metric with its cumulative duration &
+        the number of occurrences as the description. A final
+        `total` metric covers the entire request.
+
+        :return: str
+        """
+
+        metrics = []
+
+        for name in self.order:
+            count, duration = self.phases[name]
+            metrics.append('%s;dur=%.2f;desc="%d"' % (name, duration * 1000,
+                                                      count))
+
+        metrics.append('total;dur=%.2f' % (self.elapsed * 1000))
+
+        return ', '.join(metrics)
+
+
+class TimedMiddleware(object):
+    """ Proxy a middleware component timing each of its hooks
+
+    Falcon inspects middleware for bound process_request,
+    process_resource, & process_response methods so only the
+    hooks the wrapped component actually implements are
+    proxied. Each hook becomes a phase named after the
+    middleware's module & hook, like `security.request`.
+
+    :param component:
+        middleware instance to proxy
+    """
+
+    HOOKS = ('process_request', 'process_resource', 'process_response')
+
+    def __init__(self, component):
+
+        self.component = component
+        self.name = component.__class__.__module__.split('.')[-1]
+
+        for hook in self.HOOKS:
+            func = getattr(component, hook, None)
+
+            if func:
+                label = '%s.%s' % (self.name, hook.split('_')[1])
+                timed = _timed_hook(func, label)
+                setattr(self, hook, types.MethodType(timed, self))
+
+
+def _timed_hook(func, label):
+    """ Return a function timing the middleware hook as a phase """
+
+    def hook(self, *args):  # pylint: disable=unused-argument
+        """ Invoke the wrapped middleware hook within a phase """
+
+        with phase(label):
+            return func(*args)
+
+    return hook
+
+
+@contextmanager
+def phase(name):
+    """ Time the enclosed block of work as a named phase
+
+    Nothing is recorded unless the request is instrumented.
+
+    :param name:
+        string phase name
+    """
+
+    timings = getattr(goldman.sess, 'timings', None)
+
+    if timings is None:
+        yield
+    else:
+        start = time.time()
+
+        try:
+            yield
+        finally:
+            timings.add(name, time.time() - start)